@@ -1,6 +1,6 @@
 import calendar
 import datetime
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from decimal import Decimal
 
 from django.conf import settings
@@ -56,23 +56,29 @@ from corehq.util.dates import (
 
 DEFAULT_DAYS_UNTIL_DUE = 30
 
+LineItemPreview = namedtuple('LineItemPreview', 'subscription rate quantity unit_cost')
+
 
 class DomainInvoiceFactory(object):
     """
     This handles all the little details when generating an Invoice.
     """
 
-    def __init__(self, date_start, date_end, domain, recipients=None):
+    def __init__(self, date_start, date_end, domain, recipients=None, usage=None):
         """
         The Invoice generated will always be for the month preceding the
         invoicing_date.
         For example, if today is July 5, 2014 then the invoice will be from
         June 1, 2014 to June 30, 2014.
+
+        :param usage: optional ``BillingPeriodUsage`` for the same period,
+        used by the feature line items instead of per-domain usage queries.
         """
         self.date_start = date_start
         self.date_end = date_end
         self.domain = ensure_domain_instance(domain)
         self.recipients = recipients
+        self.usage = usage
         self.logged_throttle_error = False
         if self.domain is None:
             raise InvoiceError("Domain '%s' is not a valid domain on HQ!" % domain)
@@ -93,6 +99,32 @@ class DomainInvoiceFactory(object):
                     show_stack_trace=True,
                 )
 
+    def get_line_item_previews(self):
+        """
+        Compute the line items ``create_invoices`` would generate without
+        saving anything or sending email. Used for dry runs, so community
+        subscriptions that would be created to fill coverage gaps are not
+        included.
+
+        :returns: list of ``LineItemPreview``
+        """
+        previews = []
+        for subscription in self._get_subscriptions():
+            if subscription.account.is_customer_billing_account:
+                continue
+            if not should_create_invoice(subscription, self.domain, self.date_start, self.date_end):
+                continue
+            invoice = Invoice(
+                subscription=subscription,
+                date_start=self._get_invoice_start(subscription),
+                date_end=self._get_invoice_end(subscription),
+            )
+            for factory in get_line_item_factories(invoice, subscription, self.usage):
+                previews.append(LineItemPreview(
+                    subscription, factory.rate, factory.quantity, factory.unit_cost
+                ))
+        return previews
+
     def _get_subscriptions(self):
         subscriptions = Subscription.visible_objects.filter(
             Q(date_end=None) | (
@@ -145,20 +177,20 @@ class DomainInvoiceFactory(object):
             community_subscription.save()
             subscriptions.append(community_subscription)
 
-    def _create_invoice_for_subscription(self, subscription):
-        def _get_invoice_start(sub, date_start):
-            return max(sub.date_start, date_start)
-
-        def _get_invoice_end(sub, date_end):
-            if sub.date_end is not None and sub.date_end <= date_end:
-                # Since the Subscription is actually terminated on date_end
-                # have the invoice period be until the day before date_end.
-                return sub.date_end - datetime.timedelta(days=1)
-            else:
-                return date_end
+    def _get_invoice_start(self, subscription):
+        return max(subscription.date_start, self.date_start)
 
-        invoice_start = _get_invoice_start(subscription, self.date_start)
-        invoice_end = _get_invoice_end(subscription, self.date_end)
+    def _get_invoice_end(self, subscription):
+        if subscription.date_end is not None and subscription.date_end <= self.date_end:
+            # Since the Subscription is actually terminated on date_end
+            # have the invoice period be until the day before date_end.
+            return subscription.date_end - datetime.timedelta(days=1)
+        else:
+            return self.date_end
+
+    def _create_invoice_for_subscription(self, subscription):
+        invoice_start = self._get_invoice_start(subscription)
+        invoice_end = self._get_invoice_end(subscription)
 
         with transaction.atomic():
             invoice = self._generate_invoice(subscription, invoice_start, invoice_end)
@@ -234,7 +266,7 @@ class DomainInvoiceFactory(object):
                 invoice=invoice,
             )
 
-        generate_line_items(invoice, subscription)
+        generate_line_items(invoice, subscription, self.usage)
         invoice.calculate_credit_adjustments()
         invoice.update_balance()
         invoice.save()
@@ -446,17 +478,92 @@ def should_create_invoice(subscription, domain, invoice_start, invoice_end):
     return True
 
 
-def generate_line_items(invoice, subscription):
+def generate_line_items(invoice, subscription, usage=None):
+    for factory in get_line_item_factories(invoice, subscription, usage):
+        factory.create()
+
+
+def get_line_item_factories(invoice, subscription, usage=None):
     product_rate = subscription.plan_version.product_rate
-    product_factory = ProductLineItemFactory(subscription, product_rate, invoice)
-    product_factory.create()
+    yield ProductLineItemFactory(subscription, product_rate, invoice)
 
     for feature_rate in subscription.plan_version.feature_rates.all():
         feature_factory_class = FeatureLineItemFactory.get_factory_by_feature_type(
             feature_rate.feature.feature_type
         )
-        feature_factory = feature_factory_class(subscription, feature_rate, invoice)
-        feature_factory.create()
+        yield feature_factory_class(subscription, feature_rate, invoice, usage)
+
+
+class BillingPeriodUsage(object):
+    """
+    User and SMS usage of every domain over one billing period.
+
+    Each kind of usage is loaded with a single aggregate query for all
+    domains so that invoicing many domains doesn't need per-domain usage
+    queries. Instances only hold plain dicts, so they can be pickled and
+    shared with worker processes.
+    """
+
+    def __init__(self, date_start, date_end, num_users_by_date, num_sms_by_domain):
+        self.date_start = date_start
+        self.date_end = date_end
+        self.num_users_by_date = num_users_by_date
+        self.num_sms_by_domain = num_sms_by_domain
+
+    @classmethod
+    def precompute(cls, date_start, date_end):
+        num_users_by_date = {
+            record_date: {}
+            for record_date in get_month_ends_in_range(date_start, date_end)
+        }
+        user_histories = DomainUserHistory.objects.filter(
+            record_date__in=list(num_users_by_date),
+        ).values_list('domain', 'record_date', 'num_users')
+        for domain, record_date, num_users in user_histories:
+            num_users_by_date[record_date][domain] = num_users
+
+        sms_totals = SmsBillable.objects.filter(
+            is_valid=True,
+            date_sent__gte=date_start,
+            date_sent__lt=date_end + datetime.timedelta(days=1),
+        ).values('domain').annotate(num_sms=Sum('multipart_count'))
+        num_sms_by_domain = {row['domain']: row['num_sms'] or 0 for row in sms_totals}
+
+        return cls(date_start, date_end, num_users_by_date, num_sms_by_domain)
+
+    def get_num_users(self, domain, record_date):
+        """
+        :returns: ``None`` if usage was not precomputed for ``record_date``.
+        :raises: ``DomainUserHistory.DoesNotExist`` if the domain has no
+        user history for a precomputed ``record_date``.
+        """
+        if record_date not in self.num_users_by_date:
+            return None
+        try:
+            return self.num_users_by_date[record_date][domain]
+        except KeyError:
+            raise DomainUserHistory.DoesNotExist(
+                "No user history for domain %s on %s" % (domain, record_date)
+            )
+
+    def get_num_sms(self, domains, date_start, date_end):
+        """
+        :returns: total SMS parts sent by ``domains`` from ``date_start``
+        through ``date_end``, or ``None`` if that range is not the
+        precomputed billing period.
+        """
+        if (date_start, date_end) != (self.date_start, self.date_end):
+            return None
+        return sum(self.num_sms_by_domain.get(domain, 0) for domain in domains)
+
+
+def get_month_ends_in_range(date_start, date_end):
+    _, month_end = get_first_last_days(date_end.year, date_end.month)
+    dates = []
+    while month_end > date_start:
+        dates.append(month_end)
+        _, month_end = get_previous_month_date_range(month_end)
+    return dates
 
 
 class LineItemFactory(object):
@@ -464,10 +571,11 @@ class LineItemFactory(object):
     This generates a line item based on what type of Feature or Product rate triggers it.
     """
 
-    def __init__(self, subscription, rate, invoice):
+    def __init__(self, subscription, rate, invoice, usage=None):
         self.subscription = subscription
         self.rate = rate
         self.invoice = invoice
+        self.usage = usage
 
     @property
     def unit_description(self):
@@ -714,21 +822,19 @@ class UserLineItemFactory(FeatureLineItemFactory):
         for date in dates:
             total_users = 0
             for domain in self.subscribed_domains:
-                try:
-                    history = DomainUserHistory.objects.get(domain=domain, record_date=date)
-                    total_users += history.num_users
-                except DomainUserHistory.DoesNotExist:
-                    raise
+                total_users += self._get_num_users(domain, date)
             excess_users += max(total_users - self.rate.monthly_limit, 0)
         return excess_users
 
+    def _get_num_users(self, domain, record_date):
+        if self.usage is not None:
+            num_users = self.usage.get_num_users(domain, record_date)
+            if num_users is not None:
+                return num_users
+        return DomainUserHistory.objects.get(domain=domain, record_date=record_date).num_users
+
     def all_month_ends_in_invoice(self):
-        _, month_end = get_first_last_days(self.invoice.date_end.year, self.invoice.date_end.month)
-        dates = []
-        while month_end > self.invoice.date_start:
-            dates.append(month_end)
-            _, month_end = get_previous_month_date_range(month_end)
-        return dates
+        return get_month_ends_in_range(self.invoice.date_start, self.invoice.date_end)
 
     @property
     def unit_description(self):
@@ -886,6 +992,12 @@ class SmsLineItemFactory(FeatureLineItemFactory):
     @property
     @memoized
     def num_sms(self):
+        if self.usage is not None and not self._end_date_count_sms:
+            num_sms = self.usage.get_num_sms(
+                self.subscribed_domains, self.invoice.date_start, self.invoice.date_end
+            )
+            if num_sms is not None:
+                return num_sms
         return self.sms_billables_queryset.aggregate(Sum('multipart_count'))['multipart_count__sum'] or 0
 
     @property
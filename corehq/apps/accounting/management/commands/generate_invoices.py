@@ -0,0 +1,114 @@
+import datetime
+import multiprocessing
+from functools import partial
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from corehq.apps.accounting.invoicing import (
+    BillingPeriodUsage,
+    DomainInvoiceFactory,
+)
+from corehq.apps.accounting.tasks import (
+    generate_domain_invoices,
+    iter_active_domains,
+)
+from corehq.util.dates import get_previous_month_date_range
+from corehq.util.timer import TimingContext
+
+
+class Command(BaseCommand):
+    help = """
+    Generate domain invoices for the month preceding the given date using
+    multiple worker processes. User and SMS usage for all domains is
+    computed once up front and shared with the workers.
+
+    Customer billing account invoices are not generated by this command.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'date',
+            nargs='?',
+            type=lambda value: datetime.datetime.strptime(value, '%Y-%m-%d').date(),
+            help="Invoices are generated for the month before this date (YYYY-MM-DD). "
+                 "Defaults to today.",
+        )
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            default=False,
+            help="Compute line items without saving invoices or sending email, "
+                 "and report the time spent in each phase.",
+        )
+
+    def handle(self, date=None, processes=None, dry_run=False, **options):
+        invoice_start, invoice_end = get_previous_month_date_range(date or datetime.date.today())
+        print("Generating invoices for %s - %s%s" % (
+            invoice_start, invoice_end, " (dry run)" if dry_run else ""
+        ))
+
+        timing_context = TimingContext('generate_invoices')
+        with timing_context:
+            with timing_context('list_domains'):
+                domain_names = [domain.name for domain in iter_active_domains()]
+            with timing_context('precompute_usage'):
+                usage = BillingPeriodUsage.precompute(invoice_start, invoice_end)
+            with timing_context('invoice_domains'):
+                worker = preview_domain_invoices if dry_run else generate_domain_invoices
+                results = _run_in_pool(
+                    worker,
+                    domain_names,
+                    processes,
+                    invoice_start=invoice_start,
+                    invoice_end=invoice_end,
+                    usage=usage,
+                )
+
+        if dry_run:
+            _print_preview(results)
+        print("Processed %s domains" % len(domain_names))
+        for timer in timing_context.to_list():
+            print("%s: %.2fs" % (timer.full_name, timer.duration))
+
+
+# keyword arguments shared by all calls in a worker process, set once per process
+_worker_kwargs = {}
+
+
+def _init_worker(kwargs):
+    _worker_kwargs.update(kwargs)
+
+
+def _call_worker(func, domain_name):
+    return func(domain_name, **_worker_kwargs)
+
+
+def _run_in_pool(func, domain_names, processes, **kwargs):
+    """Call ``func(domain_name, **kwargs)`` for each domain in worker processes
+
+    ``kwargs`` (including the usage of all domains) are sent to each worker
+    process once rather than with every domain.
+    """
+    # worker processes must not share the parent's database connections
+    connections.close_all()
+    pool = multiprocessing.Pool(processes=processes, initializer=_init_worker, initargs=(kwargs,))
+    try:
+        return list(pool.imap_unordered(partial(_call_worker, func), domain_names))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def preview_domain_invoices(domain_name, invoice_start, invoice_end, usage):
+    factory = DomainInvoiceFactory(invoice_start, invoice_end, domain_name, usage=usage)
+    return domain_name, factory.get_line_item_previews()
+
+
+def _print_preview(results):
+    for domain_name, previews in sorted(results):
+        for preview in previews:
+            print("%s\t%s\t%s\t%s x %s" % (
+                domain_name, preview.subscription.pk, preview.rate, preview.quantity, preview.unit_cost
+            ))
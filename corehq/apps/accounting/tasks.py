@@ -30,6 +30,7 @@ from dimagi.utils.couch.database import iter_docs
 from corehq.apps.accounting.enterprise import EnterpriseReport
 from corehq.apps.accounting.exceptions import CreditLineError, InvoiceError
 from corehq.apps.accounting.invoicing import (
+    BillingPeriodUsage,
     CustomerAccountInvoiceFactory,
     DomainInvoiceFactory,
 )
@@ -258,32 +259,9 @@ def generate_invoices(based_on_date=None):
         'start': invoice_start.strftime(USER_DATE_FORMAT),
         'end': invoice_end.strftime(USER_DATE_FORMAT),
     })
-    all_domain_ids = [d['id'] for d in Domain.get_all(include_docs=False)]
-    for domain_doc in iter_docs(Domain.get_db(), all_domain_ids):
-        domain_obj = Domain.wrap(domain_doc)
-        if not domain_obj.is_active:
-            continue
-        try:
-            invoice_factory = DomainInvoiceFactory(invoice_start, invoice_end, domain_obj)
-            invoice_factory.create_invoices()
-            log_accounting_info("Sent invoices for domain %s" % domain_obj.name)
-        except CreditLineError as e:
-            log_accounting_error(
-                "There was an error utilizing credits for "
-                "domain %s: %s" % (domain_obj.name, e),
-                show_stack_trace=True,
-            )
-        except InvoiceError as e:
-            log_accounting_error(
-                "Could not create invoice for domain %s: %s" % (domain_obj.name, e),
-                show_stack_trace=True,
-            )
-        except Exception as e:
-            log_accounting_error(
-                "Error occurred while creating invoice for "
-                "domain %s: %s" % (domain_obj.name, e),
-                show_stack_trace=True,
-            )
+    usage = BillingPeriodUsage.precompute(invoice_start, invoice_end)
+    for domain_obj in iter_active_domains():
+        generate_domain_invoices(domain_obj, invoice_start, invoice_end, usage)
     all_customer_billing_accounts = BillingAccount.objects.filter(is_customer_billing_account=True)
     for account in all_customer_billing_accounts:
         try:
@@ -321,6 +299,45 @@ def generate_invoices(based_on_date=None):
         _invoicing_complete_soft_assert(False, "Invoicing is complete!")
 
 
+def iter_active_domains():
+    all_domain_ids = [d['id'] for d in Domain.get_all(include_docs=False)]
+    for domain_doc in iter_docs(Domain.get_db(), all_domain_ids):
+        domain_obj = Domain.wrap(domain_doc)
+        if domain_obj.is_active:
+            yield domain_obj
+
+
+def generate_domain_invoices(domain, invoice_start, invoice_end, usage=None):
+    """
+    Create the invoices for a single domain, logging (not raising) errors.
+
+    :param domain: domain name or ``Domain`` instance.
+    :param usage: optional ``BillingPeriodUsage`` for the invoice period.
+    """
+    domain_name = getattr(domain, 'name', domain)
+    try:
+        invoice_factory = DomainInvoiceFactory(invoice_start, invoice_end, domain, usage=usage)
+        invoice_factory.create_invoices()
+        log_accounting_info("Sent invoices for domain %s" % domain_name)
+    except CreditLineError as e:
+        log_accounting_error(
+            "There was an error utilizing credits for "
+            "domain %s: %s" % (domain_name, e),
+            show_stack_trace=True,
+        )
+    except InvoiceError as e:
+        log_accounting_error(
+            "Could not create invoice for domain %s: %s" % (domain_name, e),
+            show_stack_trace=True,
+        )
+    except Exception as e:
+        log_accounting_error(
+            "Error occurred while creating invoice for "
+            "domain %s: %s" % (domain_name, e),
+            show_stack_trace=True,
+        )
+
+
 def send_bookkeeper_email(month=None, year=None, emails=None):
     today = datetime.date.today()
 
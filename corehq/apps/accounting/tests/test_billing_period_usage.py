@@ -0,0 +1,49 @@
+import datetime
+
+from django.test import SimpleTestCase
+
+from corehq.apps.accounting.invoicing import (
+    BillingPeriodUsage,
+    get_month_ends_in_range,
+)
+from corehq.apps.accounting.models import DomainUserHistory
+
+
+class TestBillingPeriodUsage(SimpleTestCase):
+
+    def setUp(self):
+        self.date_start = datetime.date(2019, 6, 1)
+        self.date_end = datetime.date(2019, 6, 30)
+        self.usage = BillingPeriodUsage(
+            self.date_start,
+            self.date_end,
+            num_users_by_date={self.date_end: {'domain-a': 12}},
+            num_sms_by_domain={'domain-a': 5, 'domain-b': 7},
+        )
+
+    def test_num_users(self):
+        self.assertEqual(self.usage.get_num_users('domain-a', self.date_end), 12)
+
+    def test_num_users_missing_history(self):
+        with self.assertRaises(DomainUserHistory.DoesNotExist):
+            self.usage.get_num_users('domain-b', self.date_end)
+
+    def test_num_users_date_not_precomputed(self):
+        self.assertIsNone(self.usage.get_num_users('domain-a', datetime.date(2019, 5, 31)))
+
+    def test_num_sms(self):
+        self.assertEqual(
+            self.usage.get_num_sms(['domain-a', 'domain-b', 'domain-c'], self.date_start, self.date_end),
+            12
+        )
+
+    def test_num_sms_partial_period(self):
+        self.assertIsNone(
+            self.usage.get_num_sms(['domain-a'], datetime.date(2019, 6, 15), self.date_end)
+        )
+
+    def test_month_ends_in_range(self):
+        self.assertEqual(
+            get_month_ends_in_range(datetime.date(2019, 4, 1), datetime.date(2019, 6, 30)),
+            [datetime.date(2019, 6, 30), datetime.date(2019, 5, 31), datetime.date(2019, 4, 30)]
+        )
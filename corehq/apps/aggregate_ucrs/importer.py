@@ -43,6 +43,8 @@ def _create_or_update_table_definition(spec):
         db_aggregation_spec.end_column = spec.time_aggregation.end_column
         db_aggregation_spec.save()
         table_definition.time_aggregation = db_aggregation_spec
+    # the spec may have changed how existing data is aggregated
+    table_definition.last_aggregated_at = None
     table_definition.save()
     return table_definition
 
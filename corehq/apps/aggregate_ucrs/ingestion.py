@@ -1,8 +1,13 @@
 """
 This module deals with data ingestion: populating the aggregate tables from other tables.
 """
+import time
 from collections import namedtuple
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
+
+from django.db import connections
 
 import sqlalchemy
 from sqlalchemy.dialects.postgresql import insert
@@ -13,40 +18,117 @@ from corehq.apps.aggregate_ucrs.aggregations import (
     TimePeriodAggregationWindow,
     get_time_period_class,
 )
+from corehq.apps.aggregate_ucrs.models import AggregateTableDefinition
 from corehq.apps.userreports.util import get_indicator_adapter
+from corehq.sql_db.connections import connection_manager
 
 AggregationParam = namedtuple('AggregationParam', 'name value mapped_column_id')
 AggregationWindow = namedtuple('AggregationWindow', 'start end')
+WindowTiming = namedtuple('WindowTiming', 'start end duration')
+
+# rows get their inserted_at value before they are committed to the source
+# tables, so look a little before the checkpoint for rows that were still
+# being saved when the last ingestion started
+CHECKPOINT_OVERLAP = timedelta(minutes=10)
 
+# rows deleted from the source tables (or moved to another time window) leave
+# nothing behind to find, so all data is re-aggregated at least this often
+FULL_AGGREGATION_INTERVAL = timedelta(days=1)
 
-def populate_aggregate_table_data(aggregate_table_adapter):
+
+def populate_aggregate_table_data(aggregate_table_adapter, max_workers=1):
     """
-    Seeds the database table with all data from the table adapter.
+    Populates the aggregate table from its source tables.
+
+    The first run (or the first run after the table is rebuilt) aggregates all data.
+    Subsequent runs only re-aggregate the time windows touched by rows inserted into
+    the source tables since the last run, until ``FULL_AGGREGATION_INTERVAL`` has
+    passed since all data was last aggregated.
+
+    :param max_workers: number of time windows to aggregate concurrently
+    :return: list of ``WindowTiming`` for each window that was aggregated
     """
     aggregate_table_definition = aggregate_table_adapter.config
-    # get checkpoint
+    started_at = datetime.utcnow()
     last_update = get_last_aggregate_checkpoint(aggregate_table_definition)
-    for window in get_time_aggregation_windows(aggregate_table_definition, last_update):
-        populate_aggregate_table_data_for_time_period(
-            aggregate_table_adapter, window,
-        )
+    windows = list(get_time_aggregation_windows(aggregate_table_definition, last_update))
+    if max_workers > 1 and len(windows) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as executor:
+            timings = list(executor.map(
+                partial(_populate_window_in_thread, aggregate_table_adapter), windows
+            ))
+    else:
+        timings = [_populate_window(aggregate_table_adapter, window) for window in windows]
+    update_aggregate_checkpoint(aggregate_table_definition, started_at, full_aggregation=last_update is None)
+    return timings
+
+
+def _populate_window(aggregate_table_adapter, window):
+    start = time.time()
+    populate_aggregate_table_data_for_time_period(aggregate_table_adapter, window)
+    return WindowTiming(
+        start=window.start.value if window else None,
+        end=window.end.value if window else None,
+        duration=time.time() - start,
+    )
+
+
+def _populate_window_in_thread(aggregate_table_adapter, window):
+    try:
+        return _populate_window(aggregate_table_adapter, window)
+    finally:
+        # database connections and sessions are local to the worker thread
+        connection_manager.close_scoped_sessions()
+        connections.close_all()
 
 
 def get_last_aggregate_checkpoint(aggregate_table_definition):
     """
     Checkpoints indicate the last time the aggregation script successfully ran.
-    Will be used to do partial ingestion.
+    Used to do partial ingestion.
+
+    :return: the time after which inserted rows need to be aggregated, or None
+    if all rows do
     """
-    # todo
-    return None
+    # read from the database since the table may have been rebuilt since the definition was loaded
+    last_aggregated_at, last_full_aggregation_at = AggregateTableDefinition.objects.filter(
+        id=aggregate_table_definition.id
+    ).values_list('last_aggregated_at', 'last_full_aggregation_at').first() or (None, None)
+    if last_aggregated_at is None or last_full_aggregation_at is None:
+        return None
+    if last_full_aggregation_at <= datetime.utcnow() - FULL_AGGREGATION_INTERVAL:
+        return None
+    return last_aggregated_at - CHECKPOINT_OVERLAP
+
+
+def update_aggregate_checkpoint(aggregate_table_definition, last_aggregated_at, full_aggregation=False):
+    """
+    :param full_aggregation: whether all data was aggregated, rather than
+    only the windows touched since the last checkpoint
+    """
+    fields = {'last_aggregated_at': last_aggregated_at}
+    if full_aggregation:
+        fields['last_full_aggregation_at'] = last_aggregated_at
+    # update the fields alone so the definition's date_modified is left alone
+    AggregateTableDefinition.objects.filter(id=aggregate_table_definition.id).update(**fields)
+
+
+def reset_aggregate_checkpoint(aggregate_table_definition):
+    """Make the next ingestion aggregate all data, e.g. after the table is rebuilt"""
+    update_aggregate_checkpoint(aggregate_table_definition, None, full_aggregation=True)
 
 
 def get_time_aggregation_windows(aggregate_table_definition, last_update):
+    if last_update is not None and not _has_modified_rows(aggregate_table_definition, last_update):
+        return
     if aggregate_table_definition.time_aggregation is None:
         # if there is no time aggregation just include a single window with no value
         yield None
     else:
         start_time = get_aggregation_start_period(aggregate_table_definition, last_update)
+        if start_time is None:
+            # no rows to aggregate
+            return
         end_time = get_aggregation_end_period(aggregate_table_definition, last_update)
         period_class = get_time_period_class(aggregate_table_definition.time_aggregation.aggregation_unit)
         current_window = TimePeriodAggregationWindow(period_class, start_time)
@@ -68,12 +150,34 @@ def get_time_aggregation_windows(aggregate_table_definition, last_update):
 
 
 def get_aggregation_start_period(aggregate_table_definition, last_update=None):
-    return _get_aggregation_from_primary_table(
+    """
+    :param last_update: if specified, get the start of the earliest window
+    touched by rows inserted after this time
+    """
+    start_time = _get_aggregation_from_primary_table(
         aggregate_table_definition=aggregate_table_definition,
         column_id=aggregate_table_definition.time_aggregation.start_column,
         sqlalchemy_agg_fn=sqlalchemy.func.min,
         last_update=last_update,
     )
+    if last_update is None:
+        return start_time
+
+    start_times = [start_time]
+    for secondary_table in aggregate_table_definition.secondary_tables.all():
+        if secondary_table.time_window_column:
+            start_times.append(_get_aggregation_from_table(
+                secondary_table.data_source,
+                secondary_table.time_window_column,
+                sqlalchemy.func.min,
+                last_update,
+            ))
+        elif _get_aggregation_from_table(
+                secondary_table.data_source, 'inserted_at', sqlalchemy.func.max, last_update):
+            # the rows can't be tied to a window so all windows need updating
+            return get_aggregation_start_period(aggregate_table_definition)
+    start_times = [_as_datetime(value) for value in start_times if value is not None]
+    return min(start_times) if start_times else None
 
 
 def get_aggregation_end_period(aggregate_table_definition, last_update=None):
@@ -89,16 +193,39 @@ def get_aggregation_end_period(aggregate_table_definition, last_update=None):
         return max(value_from_db, datetime.utcnow())
 
 
+def _has_modified_rows(aggregate_table_definition, last_update):
+    data_sources = [aggregate_table_definition.data_source] + [
+        secondary_table.data_source for secondary_table in aggregate_table_definition.secondary_tables.all()
+    ]
+    return any(
+        _get_aggregation_from_table(data_source, 'inserted_at', sqlalchemy.func.max, last_update)
+        for data_source in data_sources
+    )
+
+
 def _get_aggregation_from_primary_table(aggregate_table_definition, column_id, sqlalchemy_agg_fn, last_update):
-    primary_data_source = aggregate_table_definition.data_source
-    primary_data_source_adapter = get_indicator_adapter(primary_data_source)
-    with primary_data_source_adapter.session_helper.session_context() as session:
-        primary_table = primary_data_source_adapter.get_table()
-        aggregation_sql_column = primary_table.c[column_id]
+    return _get_aggregation_from_table(
+        aggregate_table_definition.data_source, column_id, sqlalchemy_agg_fn, last_update
+    )
+
+
+def _get_aggregation_from_table(data_source, column_id, sqlalchemy_agg_fn, last_update):
+    adapter = get_indicator_adapter(data_source)
+    with adapter.session_helper.session_context() as session:
+        table = adapter.get_table()
+        aggregation_sql_column = table.c[column_id]
         query = session.query(sqlalchemy_agg_fn(aggregation_sql_column))
+        if last_update is not None:
+            query = query.filter(table.c.inserted_at >= last_update)
         return session.execute(query).scalar()
 
 
+def _as_datetime(value):
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
 def populate_aggregate_table_data_for_time_period(aggregate_table_adapter, window):
     """
     For a given period (start/end) - populate all data in the aggregate table associated
@@ -0,0 +1,18 @@
+# Generated by Django 1.11.22 on 2019-07-24 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aggregate_ucrs', '0002_auto_20180827_1148'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aggregatetabledefinition',
+            name='last_aggregated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
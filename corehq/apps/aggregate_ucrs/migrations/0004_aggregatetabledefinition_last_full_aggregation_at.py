@@ -0,0 +1,18 @@
+# Generated by Django 1.11.22 on 2019-07-30 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aggregate_ucrs', '0003_aggregatetabledefinition_last_aggregated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aggregatetabledefinition',
+            name='last_full_aggregation_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -75,6 +75,13 @@ class AggregateTableDefinition(models.Model, AbstractUCRDataSource):
     time_aggregation = models.OneToOneField(TimeAggregationDefinition, null=True, blank=True,
                                             on_delete=models.CASCADE)
 
+    # when the last successful ingestion started. Only data inserted into the
+    # source tables after this time is re-aggregated. None means the table
+    # needs to be fully populated.
+    last_aggregated_at = models.DateTimeField(null=True, blank=True)
+    # when the last ingestion of all data started
+    last_full_aggregation_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         unique_together = ('domain', 'table_id')
 
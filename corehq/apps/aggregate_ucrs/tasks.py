@@ -1,12 +1,29 @@
+import logging
+
 from celery.task import task
 
 from corehq.apps.aggregate_ucrs.ingestion import populate_aggregate_table_data
 from corehq.apps.aggregate_ucrs.models import AggregateTableDefinition
 from corehq.apps.userreports.const import UCR_CELERY_QUEUE
 from corehq.apps.userreports.util import get_indicator_adapter
+from corehq.util.datadog.gauges import datadog_histogram
+
+# number of time windows aggregated concurrently
+AGGREGATION_WORKERS = 4
+
+logger = logging.getLogger(__name__)
 
 
 @task(serializer='pickle', queue=UCR_CELERY_QUEUE, ignore_result=True)
 def populate_aggregate_table_data_task(aggregate_table_id):
     definition = AggregateTableDefinition.objects.get(id=aggregate_table_id)
-    return populate_aggregate_table_data(get_indicator_adapter(definition))
+    timings = populate_aggregate_table_data(
+        get_indicator_adapter(definition), max_workers=AGGREGATION_WORKERS
+    )
+    for timing in timings:
+        logger.info("Aggregated %s window %s - %s in %.2fs",
+                    definition.table_id, timing.start, timing.end, timing.duration)
+        datadog_histogram('commcare.aggregate_ucrs.window_aggregation_time', timing.duration, tags=[
+            'domain:{}'.format(definition.domain),
+            'table_id:{}'.format(definition.table_id),
+        ])
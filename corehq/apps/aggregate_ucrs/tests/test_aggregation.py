@@ -1,8 +1,10 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.test import TestCase
 
+from mock import patch
+
 from sqlalchemy import Date, Integer, SmallInteger, UnicodeText
 
 from casexml.apps.case.mock import CaseBlock
@@ -19,6 +21,7 @@ from corehq.apps.aggregate_ucrs.ingestion import (
     get_aggregation_end_period,
     get_aggregation_start_period,
     populate_aggregate_table_data,
+    reset_aggregate_checkpoint,
 )
 from corehq.apps.aggregate_ucrs.models import AggregateTableDefinition
 from corehq.apps.aggregate_ucrs.tests.base import AggregationBaseTestMixin
@@ -312,6 +315,44 @@ class UCRAggregationTest(TestCase, AggregationBaseTestMixin):
         populate_aggregate_table_data(aggregate_table_adapter)
         self._check_monthly_results()
 
+    def test_incremental_aggregation(self):
+        aggregate_table_adapter = self.monthly_adapter
+        aggregate_table_adapter.rebuild_table()
+
+        self.assertNotEqual([], populate_aggregate_table_data(aggregate_table_adapter))
+        with patch('corehq.apps.aggregate_ucrs.ingestion.CHECKPOINT_OVERLAP', timedelta(0)):
+            # nothing was added to the source tables since the last run
+            self.assertEqual([], populate_aggregate_table_data(aggregate_table_adapter))
+        self._check_monthly_results()
+
+        reset_aggregate_checkpoint(aggregate_table_adapter.config)
+        self.assertNotEqual([], populate_aggregate_table_data(aggregate_table_adapter))
+        self._check_monthly_results()
+
+    def test_deleted_rows_reaggregated(self):
+        aggregate_table_adapter = self.monthly_adapter
+        aggregate_table_adapter.rebuild_table()
+        populate_aggregate_table_data(aggregate_table_adapter)
+
+        # delete the follow up form of April 15th
+        self.addCleanup(_iteratively_build_table, self.form_data_source)
+        form_table = self.form_adapter.get_table()
+        with self.form_adapter.session_context() as session:
+            session.execute(form_table.delete().where(form_table.c.received_on >= datetime(2018, 4, 13)))
+
+        with patch('corehq.apps.aggregate_ucrs.ingestion.CHECKPOINT_OVERLAP', timedelta(0)):
+            # the deletion can't be seen in the source tables
+            self.assertEqual([], populate_aggregate_table_data(aggregate_table_adapter))
+            with patch('corehq.apps.aggregate_ucrs.ingestion.FULL_AGGREGATION_INTERVAL', timedelta(0)):
+                self.assertNotEqual([], populate_aggregate_table_data(aggregate_table_adapter))
+
+        aggregate_table = aggregate_table_adapter.get_table()
+        row = aggregate_table_adapter.get_query_object().filter(
+            aggregate_table.c['doc_id'] == self.case_id,
+            aggregate_table.c['month'] == '2018-04-01'
+        ).one()
+        self.assertEqual(1, row.fu_forms_in_month)
+
     def _check_monthly_results(self):
         aggregate_table_adapter = self.monthly_adapter
         aggregate_table = aggregate_table_adapter.get_table()
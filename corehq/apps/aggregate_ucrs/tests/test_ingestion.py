@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase
+
+from mock import MagicMock, patch
+
+from corehq.apps.aggregate_ucrs.ingestion import (
+    AggregationParam,
+    AggregationWindow,
+    populate_aggregate_table_data,
+)
+
+
+def _window(start, end):
+    return AggregationWindow(
+        start=AggregationParam('agg_window_start', start, 'opened_date'),
+        end=AggregationParam('agg_window_end', end, 'closed_date'),
+    )
+
+
+WINDOWS = [
+    _window('2018-01-01', '2018-02-01'),
+    _window('2018-02-01', '2018-03-01'),
+    _window('2018-03-01', '2018-04-01'),
+]
+
+
+@patch('corehq.apps.aggregate_ucrs.ingestion.get_last_aggregate_checkpoint', MagicMock(return_value=None))
+@patch('corehq.apps.aggregate_ucrs.ingestion.get_time_aggregation_windows', MagicMock(return_value=WINDOWS))
+@patch('corehq.apps.aggregate_ucrs.ingestion.update_aggregate_checkpoint')
+@patch('corehq.apps.aggregate_ucrs.ingestion.populate_aggregate_table_data_for_time_period')
+class TestPopulateAggregateTableData(SimpleTestCase):
+
+    def test_concurrent_windows(self, populate_window, update_checkpoint):
+        timings = populate_aggregate_table_data(MagicMock(), max_workers=2)
+        self.assertEqual(populate_window.call_count, 3)
+        self.assertEqual(
+            [(timing.start, timing.end) for timing in timings],
+            [(window.start.value, window.end.value) for window in WINDOWS],
+        )
+        self.assertTrue(update_checkpoint.called)
+
+    def test_checkpoint_not_updated_on_error(self, populate_window, update_checkpoint):
+        populate_window.side_effect = [None, ValueError, None]
+        with self.assertRaises(ValueError):
+            populate_aggregate_table_data(MagicMock(), max_workers=2)
+        self.assertFalse(update_checkpoint.called)
@@ -6,6 +6,7 @@ from django.utils.decorators import method_decorator
 from django.utils.translation import ugettext_lazy
 
 from corehq import toggles
+from corehq.apps.aggregate_ucrs.ingestion import reset_aggregate_checkpoint
 from corehq.apps.aggregate_ucrs.models import AggregateTableDefinition
 from corehq.apps.aggregate_ucrs.tasks import populate_aggregate_table_data_task
 from corehq.apps.domain.decorators import (
@@ -97,6 +98,7 @@ def rebuild_aggregate_ucr(request, domain, table_id):
         initiated_by=request.user.username,
         source='rebuild_aggregate_ucr'
     )
+    reset_aggregate_checkpoint(table_definition)
     populate_aggregate_table_data_task.delay(table_definition.id)
     messages.success(request, 'Table rebuild successfully started.')
     return HttpResponseRedirect(reverse(AggregateUCRView.urlname, args=[domain, table_id]))
@@ -1,6 +1,10 @@
-from collections import namedtuple
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
 from itertools import chain
 
+from django.core.cache import cache
 from django.http import Http404
 from django.utils.translation import ugettext_lazy as _
 
@@ -11,8 +15,8 @@ from dimagi.utils.couch.database import iter_docs
 from corehq.apps.app_manager.exceptions import BuildNotFoundException
 from corehq.apps.es import AppES
 from corehq.apps.es.aggregations import NestedAggregation, TermsAggregation
+from corehq.util.datadog.gauges import datadog_counter, datadog_histogram
 from corehq.util.quickcache import quickcache
-from quickcache.django_quickcache import tiered_django_cache
 
 
 AppBuildVersion = namedtuple('AppBuildVersion', ['app_id', 'build_id', 'version', 'comment'])
@@ -173,28 +177,116 @@ def get_current_app(domain, app_id):
     return wrap_app(get_current_app_doc(domain, app_id))
 
 
+# wrapped builds kept in memory by each process
+LOCAL_BUILD_CACHE_SIZE = 20
+BUILD_CACHE_TIMEOUT = 24 * 3600
+
+
+class _LocalBuildCache(object):
+    """Thread safe LRU cache of wrapped app builds"""
+
+    def __init__(self, size):
+        self.size = size
+        self._builds = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            build = self._builds.pop(key, None)
+            if build is not None:
+                self._builds[key] = build
+            return build
+
+    def set(self, key, build):
+        with self._lock:
+            self._builds.pop(key, None)
+            self._builds[key] = build
+            while len(self._builds) > self.size:
+                self._builds.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._builds.clear()
+
+
+_local_build_cache = _LocalBuildCache(LOCAL_BUILD_CACHE_SIZE)
+
+
 def get_app_cached(domain, app_id):
     """Cached version of ``get_app`` for use in phone
     api calls where most requests will be for app builds
     which are read-only.
-    This only caches app builds."""
-    timeout = 24 * 3600
-    # cache to save in localmemory and then in default cache (redis)
-    #   Invalidation is not necessary as the builds don't get updated
-    cache = tiered_django_cache([
-        ('locmem', timeout, None),
-        ('default', timeout, None)]
-    )
-    key = 'app_build_cache_{}_{}'.format(domain, app_id)
-    app = cache.get(key)
-    if not app:
-        app = get_app(domain, app_id)
-        if app.copy_of:
-            cache.set(key, app)
+    This only caches app builds.
 
+    Builds are wrapped at most once per process while they stay in a
+    process-local LRU cache, and their docs are shared between processes
+    in the default cache (redis). Invalidation is not necessary as the
+    builds don't get updated. The returned build is shared by all callers
+    in the process, so it must not be modified.
+    """
+    key = _get_build_cache_key(domain, app_id)
+    app = _local_build_cache.get(key)
+    if app is not None:
+        _record_build_cache_lookup('local')
+        return app
+
+    app_doc = _get_app_doc_cached(domain, app_id, key)
+    start = time.time()
+    try:
+        app = wrap_app(app_doc)
+    except DocTypeError:
+        raise Http404()
+    if app.copy_of:
+        datadog_histogram('commcare.app_build_cache.wrap_time', time.time() - start)
+        _local_build_cache.set(key, app)
     return app
 
 
+def get_build_doc_cached(domain, build_id):
+    """Get the unwrapped doc of an app build, cached like ``get_app_cached``
+
+    For callers that only need a few top level fields of a build (e.g.
+    ``copy_of``) and should not pay for wrapping the whole app. The doc must
+    not be modified.
+    """
+    key = _get_build_cache_key(domain, build_id)
+    app = _local_build_cache.get(key)
+    if app is not None:
+        _record_build_cache_lookup('local')
+        return app.to_json()
+    return _get_app_doc_cached(domain, build_id, key)
+
+
+def _get_build_cache_key(domain, app_id):
+    return 'app_build_doc_cache_{}_{}'.format(domain, app_id)
+
+
+def _get_app_doc_cached(domain, app_id, key):
+    app_doc = cache.get(key)
+    if app_doc is not None:
+        _record_build_cache_lookup('shared')
+        return app_doc
+
+    _record_build_cache_lookup('miss')
+    from .models import Application
+    if not app_id:
+        raise Http404()
+    try:
+        app_doc = Application.get_db().get(app_id)
+    except ResourceNotFound:
+        raise Http404()
+    if domain and app_doc['domain'] != domain:
+        raise Http404()
+    if app_doc.get('copy_of'):
+        datadog_histogram('commcare.app_build_cache.doc_size', len(json.dumps(app_doc)))
+        cache.set(key, app_doc, BUILD_CACHE_TIMEOUT)
+    return app_doc
+
+
+def _record_build_cache_lookup(result):
+    datadog_counter('commcare.app_build_cache.lookup', tags=['result:{}'.format(result)])
+
+
 def get_app(domain, app_id, wrap_cls=None, latest=False, target=None):
     """
     Utility for getting an app, making sure it's in the domain specified, and
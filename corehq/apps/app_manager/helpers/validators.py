@@ -115,7 +115,7 @@ class ApplicationBaseValidator(object):
 
         if hasattr(self.app, 'get_forms'):
             for form in self.app.get_forms():
-                intents = form.wrapped_xform().odk_intents
+                intents = form.readonly_xform().odk_intents
                 if intents:
                     if not domain_has_privilege(self.domain, privileges.TEMPLATED_INTENTS):
                         return [{
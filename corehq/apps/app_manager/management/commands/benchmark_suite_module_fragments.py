@@ -0,0 +1,78 @@
+import time
+from contextlib import contextmanager
+from statistics import median
+
+from django.core.management import BaseCommand
+
+from corehq import toggles
+from corehq.apps.app_manager.dbaccessors import get_app
+from corehq.apps.app_manager.suite_xml import module_fragments
+
+
+class Command(BaseCommand):
+    help = ("Time generating the suite of an app with the "
+            "SUITE_MODULE_FRAGMENT_CACHE toggle off and on. Nothing is saved.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('app_id')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, domain, app_id, repeat, **options):
+        app = get_app(domain, app_id)
+        print("{} modules, {} forms".format(len(list(app.get_modules())), len(list(app.get_forms()))))
+
+        with _toggle_enabled(domain, False):
+            _report('toggle off', _time(app.create_suite, repeat))
+
+        with _toggle_enabled(domain, True):
+            def _cold():
+                module_fragments._fragments.clear()
+                app.create_suite()
+            _report('toggle on, empty cache', _time(_cold, repeat))
+            _report('toggle on, no changes', _time(app.create_suite, repeat))
+
+            modules = [module for module in app.get_modules() if module.module_type != 'report']
+            edited = modules[len(modules) // 2]
+
+            def _edit_one_module():
+                # invalidates the edited module and the modules linked to it
+                edited.name['en'] = edited.name.get('en', '') + '*'
+                app.create_suite()
+            _report('toggle on, one module edited', _time(_edit_one_module, repeat))
+
+
+@contextmanager
+def _toggle_enabled(domain, enabled):
+    """Enable or disable the toggle for the domain in this process only"""
+    toggle = toggles.SUITE_MODULE_FRAGMENT_CACHE
+    add_to, remove_from = (
+        (toggle.always_enabled, toggle.always_disabled) if enabled
+        else (toggle.always_disabled, toggle.always_enabled)
+    )
+    was_added = domain not in add_to
+    was_removed = domain in remove_from
+    add_to.add(domain)
+    remove_from.discard(domain)
+    try:
+        yield
+    finally:
+        if was_added:
+            add_to.discard(domain)
+        if was_removed:
+            remove_from.add(domain)
+
+
+def _time(fn, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.time()
+        fn()
+        durations.append(time.time() - start)
+    return durations
+
+
+def _report(label, durations):
+    print("{:<32} median {:.3f}s  min {:.3f}s  max {:.3f}s".format(
+        label, median(durations), min(durations), max(durations)
+    ))
@@ -1086,6 +1086,22 @@ class FormBase(DocumentSchema):
     def wrapped_xform(self):
         return XForm(self.source)
 
+    def readonly_xform(self):
+        """
+        The parsed source of the form, shared by everything that only reads
+        it while this form object is in use (e.g. during one request), so
+        validating and building an app parse each form once.
+
+        Must not be modified: use ``wrapped_xform`` for that.
+        """
+        source = self.source
+        # only the latest source is kept
+        cached_source, xform = getattr(self, '_readonly_xform', (None, None))
+        if xform is None or cached_source != source:
+            xform = XForm(source)
+            self._readonly_xform = (source, xform)
+        return xform
+
     def validate_form(self):
         vc = self.get_validation_cache()
         if vc is None:
@@ -1171,7 +1187,7 @@ class FormBase(DocumentSchema):
     def get_questions(self, langs, include_triggers=False,
                       include_groups=False, include_translations=False):
         try:
-            return XForm(self.source).get_questions(
+            return self.readonly_xform().get_questions(
                 langs=langs,
                 include_triggers=include_triggers,
                 include_groups=include_groups,
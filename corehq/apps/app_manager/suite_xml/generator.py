@@ -1,4 +1,5 @@
 from distutils.version import LooseVersion
+from functools import partial
 
 from django.urls import reverse
 
@@ -6,11 +7,15 @@ import six.moves.urllib.error
 import six.moves.urllib.parse
 import six.moves.urllib.request
 
+from corehq import toggles
 from corehq.apps.app_manager import id_strings
 from corehq.apps.app_manager.exceptions import MediaResourceError
 from corehq.apps.app_manager.suite_xml.features.scheduler import (
     SchedulerFixtureContributor,
 )
+from corehq.apps.app_manager.suite_xml.module_fragments import (
+    ModuleFragmentCache,
+)
 from corehq.apps.app_manager.suite_xml.post_process.instances import (
     EntryInstances,
 )
@@ -88,14 +93,24 @@ class SuiteGenerator(object):
         else:
             training_menu = None
 
-        for module in self.modules:
-            self.suite.entries.extend(entries.get_module_contributions(module))
-
-            self.suite.menus.extend(
-                menus.get_module_contributions(module, training_menu)
+        def get_module_contributions(module, training_menu):
+            return (
+                list(entries.get_module_contributions(module)),
+                list(menus.get_module_contributions(module, training_menu)),
+                list(remote_requests.get_module_contributions(module)),
             )
 
-            self.suite.remote_requests.extend(remote_requests.get_module_contributions(module))
+        if toggles.SUITE_MODULE_FRAGMENT_CACHE.enabled(self.app.domain):
+            fragments = ModuleFragmentCache(self.app, self.modules, self.build_profile_id,
+                                            has_training_menu=training_menu is not None)
+            get_module_contributions = partial(fragments.get_module_contributions,
+                                               get_contributions=get_module_contributions)
+
+        for module in self.modules:
+            module_entries, module_menus, module_remote_requests = get_module_contributions(module, training_menu)
+            self.suite.entries.extend(module_entries)
+            self.suite.menus.extend(module_menus)
+            self.suite.remote_requests.extend(module_remote_requests)
 
         if training_menu:
             self.suite.menus.append(training_menu)
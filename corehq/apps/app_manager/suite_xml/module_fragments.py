@@ -0,0 +1,207 @@
+"""
+Process local cache of the suite elements contributed by each module
+
+The entries, menus and remote requests of a module only depend on app level
+settings, the module itself and the modules linked to it, so they are cached
+against a hash of those and reused until one of them changes. This avoids
+regenerating the whole suite each time a single module of a large app is
+edited and the app is validated or built again.
+
+Modules are linked when one refers to the unique id of the other or of one
+of its forms (parent and child modules, shadow modules, parent case
+selection, case list forms, etc.), or when an advanced module refers to the
+case type of the other. Linked modules are hashed together, along with their
+positions and form sources, so a change to any of them invalidates them all.
+
+Fragments are cached in each process rather than shared, so that fragments
+generated by an older version of the code are dropped on deploy.
+"""
+import hashlib
+import json
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from lxml import etree
+
+from corehq import toggles
+from corehq.apps.app_manager.suite_xml.xml_models import (
+    Command,
+    Entry,
+    LocalizedMenu,
+    Menu,
+    RemoteRequest,
+)
+from corehq.apps.app_manager.util import is_usercase_in_use
+from corehq.util.datadog.gauges import datadog_counter
+
+MODULE_FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+MODULE_FRAGMENT_CACHE_SIZE = 500
+
+# app fields that can't affect the suite elements of a module
+EXCLUDED_APP_FIELDS = {
+    'modules',
+    '_rev',
+    '_attachments',
+    'external_blobs',
+    'version',
+    'built_on',
+    'date_created',
+    'last_modified',
+    'last_released',
+    'build_comment',
+    'is_released',
+    'copy_of',
+    'has_submissions',
+    'multimedia_map',
+    'translations',
+}
+
+_fragments = LocMemCache('suite-module-fragments', {
+    'TIMEOUT': MODULE_FRAGMENT_CACHE_TIMEOUT,
+    'MAX_ENTRIES': MODULE_FRAGMENT_CACHE_SIZE,
+})
+
+
+class ModuleFragmentCache(object):
+
+    def __init__(self, app, modules, build_profile_id=None, has_training_menu=False):
+        self.app = app
+        self.modules = modules
+        self.build_profile_id = build_profile_id
+        self.has_training_menu = has_training_menu
+        self._keys = None
+
+    def get_module_contributions(self, module, training_menu, get_contributions):
+        """Get the entries, menus and remote requests contributed by a module
+
+        :param training_menu: Menu that commands of training modules put
+        in the root menu are added to, or None.
+        :param get_contributions: Function of ``(module, training_menu)``
+        generating the contributions of the module when they are not cached.
+        :returns: Tuple of lists of entries, menus and remote requests.
+        """
+        if module.module_type == 'report':
+            # report modules depend on report configurations
+            return get_contributions(module, training_menu)
+
+        key = self._get_keys()[module.unique_id]
+        fragment = _fragments.get(key)
+        if fragment is None:
+            datadog_counter('commcare.app_build.suite_module_fragments', tags=['result:miss'])
+            fragment = self._generate_fragment(module, get_contributions)
+            _fragments.set(key, fragment)
+        else:
+            datadog_counter('commcare.app_build.suite_module_fragments', tags=['result:hit'])
+
+        entries, menus, remote_requests, training_commands = fragment
+        if training_menu:
+            training_menu.commands.extend(_load(Command, training_commands))
+        return _load(Entry, entries), _load(Menu, menus), _load(RemoteRequest, remote_requests)
+
+    def _generate_fragment(self, module, get_contributions):
+        training_menu = LocalizedMenu(id='training-root') if self.has_training_menu else None
+        entries, menus, remote_requests = get_contributions(module, training_menu)
+        return (
+            _dump(entries),
+            _dump(menus),
+            _dump(remote_requests),
+            _dump(training_menu.commands) if training_menu else [],
+        )
+
+    def _get_keys(self):
+        """Get the cache key of each module, by unique id"""
+        if self._keys is None:
+            app_hash = _hash([
+                self.build_profile_id,
+                self.has_training_menu,
+                {key: value for key, value in self.app.to_json().items() if key not in EXCLUDED_APP_FIELDS},
+                bool(is_usercase_in_use(self.app.domain)),
+                self.app.commtrack_enabled,
+                toggles.APP_BUILDER_CONDITIONAL_NAMES.enabled(self.app.domain),
+            ])
+            module_hashes = [self._get_module_hash(position, module)
+                             for position, module in enumerate(self.modules)]
+            self._keys = {}
+            for linked in _get_linked_modules(self.modules):
+                linked_hash = _hash([app_hash] + [module_hashes[position] for position in linked])
+                for position in linked:
+                    self._keys[self.modules[position].unique_id] = 'suite-module-fragment-{}-{}'.format(
+                        linked_hash, position)
+        return self._keys
+
+    def _get_module_hash(self, position, module):
+        form_sources = [
+            hashlib.md5((form.source or '').encode('utf-8')).hexdigest()
+            for form in module.get_forms()
+        ] if module.module_type != 'report' else []
+        return _hash([position, module.to_json(), form_sources])
+
+
+def _get_linked_modules(modules):
+    """Group modules linked to each other, directly or not
+
+    :returns: List of sorted lists of module positions.
+    """
+    parents = list(range(len(modules)))
+
+    def find(position):
+        while parents[position] != position:
+            parents[position] = parents[parents[position]]
+            position = parents[position]
+        return position
+
+    def union(position, other_position):
+        parents[find(position)] = find(other_position)
+
+    positions_by_id = {}
+    positions_by_case_type = {}
+    strings = []
+    for position, module in enumerate(modules):
+        module_json = module.to_json()
+        positions_by_id[module.unique_id] = position
+        for form in module_json.get('forms') or []:
+            positions_by_id.setdefault(form.get('unique_id'), position)
+        case_type = getattr(module, 'case_type', None)
+        if case_type:
+            positions_by_case_type.setdefault(case_type, []).append(position)
+        strings.append(_get_strings(module_json))
+
+    for position, module in enumerate(modules):
+        for value in strings[position]:
+            if value in positions_by_id:
+                union(position, positions_by_id[value])
+            if module.module_type == 'advanced' and value in positions_by_case_type:
+                for other_position in positions_by_case_type[value]:
+                    union(position, other_position)
+
+    linked = {}
+    for position in range(len(modules)):
+        linked.setdefault(find(position), []).append(position)
+    return list(linked.values())
+
+
+def _get_strings(value, strings=None):
+    """Get all strings in a JSON value"""
+    if strings is None:
+        strings = set()
+    if isinstance(value, str):
+        strings.add(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _get_strings(item, strings)
+    elif isinstance(value, list):
+        for item in value:
+            _get_strings(item, strings)
+    return strings
+
+
+def _hash(value):
+    return hashlib.md5(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _dump(elements):
+    return [etree.tostring(element.node) for element in elements]
+
+
+def _load(element_class, fragments):
+    return [element_class(etree.fromstring(fragment)) for fragment in fragments]
@@ -3,9 +3,9 @@ import os
 import tempfile
 import zipfile
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-from mock import patch
+from mock import MagicMock, patch
 
 from corehq.apps.app_manager.tests.app_factory import AppFactory
 from corehq.apps.app_manager.xform_builder import XFormBuilder
@@ -77,3 +77,35 @@ class CCZTest(TestCase):
                 for path, data in files:
                     z.writestr(path, data, zipfile.ZIP_STORED)
         return zip_path
+
+
+class IterMediaFilesTest(SimpleTestCase):
+
+    def _media(self, data):
+        media = MagicMock()
+        media.get_display_file.return_value = (data, 'image/png')
+        return media
+
+    def test_prefetch_order(self):
+        media_objects = [
+            ('jr://file/commcare/image{}.png'.format(i), self._media('data{}'.format(i).encode('utf-8')))
+            for i in range(10)
+        ]
+        files, errors = iter_media_files(media_objects, prefetch_workers=3)
+        self.assertEqual(list(files), [
+            ('commcare/image{}.png'.format(i), 'data{}'.format(i).encode('utf-8'))
+            for i in range(10)
+        ])
+        self.assertEqual(errors, [])
+
+    def test_prefetch_errors(self):
+        broken = MagicMock()
+        broken.get_display_file.side_effect = NameError('missing')
+        media_objects = [
+            ('jr://file/commcare/broken.png', broken),
+            ('jr://file/commcare/image.png', self._media(b'data')),
+        ]
+        files, errors = iter_media_files(media_objects, prefetch_workers=2)
+        self.assertEqual(list(files), [('commcare/image.png', b'data')])
+        self.assertEqual(len(errors), 1)
+        self.assertIn('commcare/broken.png', errors[0])
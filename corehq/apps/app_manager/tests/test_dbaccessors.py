@@ -13,6 +13,7 @@ from corehq.apps.app_manager.dbaccessors import (
     get_apps_in_domain,
     get_brief_app,
     get_brief_apps_in_domain,
+    get_build_doc_cached,
     get_build_doc_by_version,
     get_build_ids,
     get_build_ids_after_version,
@@ -261,6 +262,19 @@ class TestAppGetters(TestCase):
         app_doc = get_app_cached(self.domain, self.v2_build.get_id)
         self.assertEqual(app_doc['is_released'], True)
 
+    def test_get_app_cached_wraps_once(self):
+        build = get_app_cached(self.domain, self.v2_build.get_id)
+        self.assertIs(get_app_cached(self.domain, self.v2_build.get_id), build)
+
+    def test_get_app_cached_current_app(self):
+        app = get_app_cached(self.domain, self.app_id)
+        self.assertIsNot(get_app_cached(self.domain, self.app_id), app)
+
+    def test_get_build_doc_cached(self):
+        build_doc = get_build_doc_cached(self.domain, self.v2_build.get_id)
+        self.assertEqual(build_doc['copy_of'], self.app_id)
+        self.assertEqual(build_doc['version'], self.v2_build.version)
+
     def test_latest_saved_from_build(self):
         app_doc = get_app(self.domain, self.v2_build._id, latest=True, target='save')
         self.assertEqual(app_doc['version'], 5)
@@ -0,0 +1,70 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from corehq.apps.app_manager.suite_xml.sections.entries import (
+    EntriesContributor,
+)
+from corehq.apps.app_manager.tests.app_factory import AppFactory
+from corehq.apps.app_manager.tests.util import (
+    TestXmlMixin,
+    patch_get_xform_resource_overrides,
+)
+from corehq.util.test_utils import flag_disabled, flag_enabled
+
+
+@patch_get_xform_resource_overrides()
+@flag_enabled('SUITE_MODULE_FRAGMENT_CACHE')
+class SuiteModuleFragmentCacheTest(SimpleTestCase, TestXmlMixin):
+
+    def setUp(self):
+        fragments = LocMemCache('suite-module-fragments-test', {})
+        # locmem caches with the same name share their entries
+        self.addCleanup(fragments.clear)
+        for patcher in [
+            patch('corehq.apps.app_manager.suite_xml.module_fragments._fragments', fragments),
+            patch('corehq.apps.app_manager.suite_xml.module_fragments.is_usercase_in_use', return_value=False),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        factory = AppFactory(build_version='2.9.0')
+        self.parent, parent_form = factory.new_basic_module('parent', 'house')
+        factory.form_opens_case(parent_form)
+        self.child, child_form = factory.new_basic_module('child', 'person', parent_module=self.parent)
+        factory.form_requires_case(child_form, case_type='person', parent_case_type='house')
+        self.shadow = factory.new_shadow_module('shadow', self.parent, with_form=False)
+        self.other, other_form = factory.new_basic_module('other', 'other')
+        factory.form_requires_case(other_form)
+        self.app = factory.app
+
+    def _get_regenerated_modules(self):
+        with patch.object(EntriesContributor, 'get_module_contributions', autospec=True,
+                          side_effect=EntriesContributor.get_module_contributions) as get_contributions:
+            self.app.create_suite()
+        return {call[0][1].unique_id for call in get_contributions.call_args_list}
+
+    def test_same_suite(self):
+        with flag_disabled('SUITE_MODULE_FRAGMENT_CACHE'):
+            expected = self.app.create_suite()
+        self.assertXmlEqual(expected, self.app.create_suite())
+        self.assertXmlEqual(expected, self.app.create_suite())
+
+    def test_unchanged_modules_not_regenerated(self):
+        self.assertEqual(self._get_regenerated_modules(), {
+            self.parent.unique_id, self.child.unique_id, self.shadow.unique_id, self.other.unique_id,
+        })
+        self.assertEqual(self._get_regenerated_modules(), set())
+
+    def test_linked_modules_regenerated(self):
+        self.app.create_suite()
+        self.child.case_list.show = True
+        self.assertEqual(self._get_regenerated_modules(), {
+            self.parent.unique_id, self.child.unique_id, self.shadow.unique_id,
+        })
+
+    def test_app_settings_change(self):
+        self.app.create_suite()
+        self.app.use_grid_menus = True
+        self.assertEqual(len(self._get_regenerated_modules()), 4)
@@ -1,5 +1,6 @@
 from django.test import SimpleTestCase
 
+from corehq.apps.app_manager.models import Application, Module
 from corehq.apps.app_manager.tests.util import TestXmlMixin
 from corehq.apps.app_manager.xform import (
     ItextValue,
@@ -47,6 +48,27 @@ class XFormParsingTest(SimpleTestCase, TestXmlMixin):
         self.assertXmlEqual(original.render(), self.get_xml('itext_form_normalized'))
 
 
+class ReadonlyXFormTest(SimpleTestCase, TestXmlMixin):
+    file_path = ('data',)
+
+    def setUp(self):
+        app = Application.new_app('domain', "Application")
+        module = app.add_module(Module.new_module('module', None))
+        self.form = app.new_form(module.id, "Form", None, self.get_xml('label_form').decode('utf-8'))
+
+    def test_shared(self):
+        xform = self.form.readonly_xform()
+        self.assertIs(xform, self.form.readonly_xform())
+        self.assertIsNot(xform, self.form.wrapped_xform())
+        self.assertXmlEqual(self.get_xml('label_form'), xform.render())
+
+    def test_source_changed(self):
+        xform = self.form.readonly_xform()
+        self.form.source = self.get_xml('itext_form').decode('utf-8')
+        self.assertIsNot(xform, self.form.readonly_xform())
+        self.assertXmlEqual(self.get_xml('itext_form'), self.form.readonly_xform().render())
+
+
 class ItextValueTest(SimpleTestCase):
 
     def _test(self, escaped_itext, expected):
@@ -61,12 +61,32 @@ def make_result_saver(statedb, count_cases=lambda n: None):
     """Make function to save case diff results to statedb"""
     def save_result(data):
         count_cases(len(data.doc_ids))
-        statedb.add_diffed_cases(data.doc_ids)
-        statedb.replace_case_diffs(data.diffs)
-        statedb.replace_case_changes(data.changes)
+        with statedb.session() as session:
+            statedb.add_diffed_cases(data.doc_ids, session=session)
+            statedb.replace_case_diffs(data.diffs, session=session)
+            statedb.replace_case_changes(data.changes, session=session)
     return save_result
 
 
+def iter_batched_results(results, min_batch_size):
+    """Combine `DiffData` results so they can be saved in fewer transactions
+
+    :param results: iterable of `DiffData` objects.
+    :param min_batch_size: minimum number of diffed docs per yielded
+    `DiffData` (the last one may be smaller).
+    """
+    batch = DiffData()
+    for data in results:
+        batch.doc_ids.extend(data.doc_ids)
+        batch.diffs.extend(data.diffs)
+        batch.changes.extend(data.changes)
+        if len(batch.doc_ids) >= min_batch_size:
+            yield batch
+            batch = DiffData()
+    if batch.doc_ids or batch.diffs or batch.changes:
+        yield batch
+
+
 def diff_cases(couch_cases, log_cases=False):
     """Diff cases and return diff data
 
@@ -17,6 +17,7 @@ from .casediff import (
     diff_cases,
     get_couch_cases,
     global_diff_state,
+    iter_batched_results,
     make_result_saver,
     should_diff,
 )
@@ -32,6 +33,7 @@ from .util import get_ids_from_string_or_file
 log = logging.getLogger(__name__)
 
 PENDING_WARNING = "Diffs pending. Run again with --cases=pending"
+SAVE_BATCH_SIZE = 1000  # minimum number of diffed cases saved per transaction
 
 
 def get_migrator(domain, state_dir):
@@ -64,7 +66,10 @@ def do_case_diffs(migrator, cases, stop, batch_size):
     log.info("cutoff_date = %s", casediff.cutoff_date)
     with casediff.context() as add_cases:
         save_result = make_result_saver(casediff.statedb, add_cases)
-        for data in casediff.iter_case_diff_results():
+        results = casediff.iter_case_diff_results()
+        if not stop:
+            results = iter_batched_results(results, SAVE_BATCH_SIZE)
+        for data in results:
             save_result(data)
     if casediff.should_diff_pending():
         return PENDING_WARNING
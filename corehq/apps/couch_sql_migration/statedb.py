@@ -21,6 +21,8 @@ from sqlalchemy import (
 )
 from sqlalchemy.exc import IntegrityError
 
+from dimagi.utils.chunked import chunked
+
 from corehq.apps.hqwebapp.encoders import LazyEncoder
 from corehq.apps.tzmigration.planning import Base, DiffDB, PlanningDiff as Diff
 from corehq.apps.tzmigration.timezonemigration import MISSING, json_diff
@@ -30,6 +32,7 @@ from corehq.util.log import with_progress_bar
 from .diff import filter_form_diffs
 
 log = logging.getLogger(__name__)
+MAX_SQL_VARIABLES = 500  # stay well below SQLITE_MAX_VARIABLE_NUMBER
 
 
 def init_state_db(domain, state_dir):
@@ -206,19 +209,20 @@ class StateDB(DiffDB):
                 [{"id": x} for x in case_ids],
             )
 
-    def add_diffed_cases(self, case_ids):
+    def add_diffed_cases(self, case_ids, *, session=None):
         if not case_ids:
             return
-        with self.session() as session:
+        with self.session(session) as session:
             session.execute(
                 f"INSERT OR IGNORE INTO {DiffedCase.__tablename__} (id) VALUES (:id)",
                 [{"id": x} for x in case_ids],
             )
-            (
-                session.query(CaseToDiff)
-                .filter(CaseToDiff.id.in_(case_ids))
-                .delete(synchronize_session=False)
-            )
+            for chunk in chunked(case_ids, MAX_SQL_VARIABLES, list):
+                (
+                    session.query(CaseToDiff)
+                    .filter(CaseToDiff.id.in_(chunk))
+                    .delete(synchronize_session=False)
+                )
 
     def iter_undiffed_case_ids(self):
         query = self.Session().query(CaseToDiff.id)
@@ -350,7 +354,11 @@ class StateDB(DiffDB):
         if diffs:
             dd_count("commcare.couchsqlmigration.form.has_diff")
 
-    def replace_case_diffs(self, case_diffs, **kw):
+    def replace_case_diffs(self, case_diffs, *, session=None, _model=None):
+        """Replace diffs for many documents in a single transaction
+
+        Documents without diffs have their existing diffs removed.
+        """
         diffs_by_doc = defaultdict(list)
         for kind, doc_id, diffs in case_diffs:
             assert all(isinstance(d.path, (list, tuple)) for d in diffs), diffs
@@ -363,8 +371,35 @@ class StateDB(DiffDB):
                 diffs_by_doc[("CommCareCase", case_id)].extend(diffs)
             else:
                 diffs_by_doc[(kind, doc_id)].extend(diffs)
-        for (doc_type, case_id), diffs in diffs_by_doc.items():
-            self.add_diffs(doc_type, case_id, diffs, **kw)
+        with self.session(session) as session:
+            self._replace_diffs(diffs_by_doc, session, _model)
+
+    def _replace_diffs(self, diffs_by_doc, session, _model=None):
+        if _model is None:
+            _model = DocDiffs
+        to_dict = _model.diff_to_dict
+        replacements = []
+        no_diffs = defaultdict(list)
+        for (kind, doc_id), diffs in diffs_by_doc.items():
+            if diffs:
+                diff_json = json.dumps([to_dict(d) for d in diffs], cls=LazyEncoder)
+                replacements.append({"kind": kind, "doc_id": doc_id, "diffs": diff_json})
+            else:
+                no_diffs[kind].append(doc_id)
+        if replacements:
+            session.execute(
+                f"""
+                REPLACE INTO {_model.__tablename__} (kind, doc_id, diffs)
+                VALUES (:kind, :doc_id, :diffs)
+                """,
+                replacements,
+            )
+        for kind, doc_ids in no_diffs.items():
+            for chunk in chunked(doc_ids, MAX_SQL_VARIABLES, list):
+                session.query(_model).filter(
+                    _model.kind == kind,
+                    _model.doc_id.in_(chunk),
+                ).delete(synchronize_session=False)
 
     def add_diffs(self, kind, doc_id, diffs, *, session=None, _model=None):
         if _model is None:
@@ -389,8 +424,8 @@ class StateDB(DiffDB):
                     _model.doc_id == doc_id,
                 ).delete(synchronize_session=False)
 
-    def replace_case_changes(self, changes):
-        self.replace_case_diffs(changes, _model=DocChanges)
+    def replace_case_changes(self, changes, *, session=None):
+        self.replace_case_diffs(changes, session=session, _model=DocChanges)
 
     def iter_diffs(self, *, _model=None):
         if _model is None:
@@ -245,6 +245,15 @@ def test_replace_case_diffs():
         )
 
 
+def test_replace_case_diffs_in_large_batch():
+    with init_db() as db:
+        case_ids = ["case-%s" % n for n in range(mod.MAX_SQL_VARIABLES * 2 + 1)]
+        db.replace_case_diffs([("CommCareCase", x, [make_diff(0)]) for x in case_ids])
+        eq(db.count_case_ids_with_diffs(), len(case_ids))
+        db.replace_case_diffs([("CommCareCase", x, []) for x in case_ids[1:]])
+        eq(list(db.iter_case_ids_with_diffs()), ["case-0"])
+
+
 def test_save_form_diffs():
     def doc(name):
         return {"doc_type": "XFormInstance", "_id": "test", "name": name}
@@ -1,5 +1,7 @@
 import gzip
 import os
+import shutil
+import tempfile
 import zipfile
 from collections import Counter
 from datetime import datetime
@@ -29,6 +31,9 @@ class Command(BaseCommand):
         )
         parser.add_argument('--dumper', dest='dumpers', action='append', default=[],
                             help='Dumper slug to run (use multiple --dumper to run multiple dumpers).')
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Dump SQL models in parallel using this many processes. Each model '
+                                 'and database is written to a separate compressed file.')
 
     def handle(self, domain_name, **options):
         excludes = options.get('exclude')
@@ -47,7 +52,12 @@ class Command(BaseCommand):
         if requested_dumpers:
             dumpers = [dumper for dumper in dumpers if dumper.slug in requested_dumpers]
 
+        processes = options.get('processes')
         for dumper in dumpers:
+            if processes and dumper is SqlDataDumper and not console:
+                stats += self._dump_sql_parts(domain_name, excludes, processes, zipname)
+                continue
+
             filename = _get_dump_stream_filename(dumper.slug, domain_name, utcnow)
             stream = self.stdout if console else gzip.open(filename, 'wt')
             try:
@@ -76,6 +86,19 @@ class Command(BaseCommand):
 
         self.stdout.write('\nData dumped to file: {}'.format(zipname))
 
+    def _dump_sql_parts(self, domain_name, excludes, processes, zipname):
+        output_dir = tempfile.mkdtemp(prefix='dump-sql-{}-'.format(domain_name))
+        try:
+            stats, paths = SqlDataDumper(domain_name, excludes, stdout=self.stdout).dump_parts(
+                output_dir, processes
+            )
+            with zipfile.ZipFile(zipname, mode='a', allowZip64=True) as z:
+                for path in paths:
+                    z.write(path, '{}/{}'.format(SqlDataDumper.slug, os.path.basename(path)))
+        finally:
+            shutil.rmtree(output_dir)
+        return stats
+
 
 def _get_dump_stream_filename(slug, domain, utcnow):
     return 'dump-{}-{}-{}.gz'.format(slug, domain, utcnow)
@@ -1,9 +1,13 @@
+import gzip
+import multiprocessing
+import os
+import time
 from collections import Counter, OrderedDict
 
 from django.apps import apps
 from django.conf import settings
 from django.core import serializers
-from django.db import router
+from django.db import connections, router
 
 from corehq.apps.dump_reload.exceptions import DomainDumpError
 from corehq.apps.dump_reload.interface import DataDumper
@@ -131,6 +135,62 @@ class SqlDataDumper(DataDumper):
         )
         return stats
 
+    def dump_parts(self, output_dir, processes):
+        """
+        Dump each model / database pair to its own gzipped file, using
+        multiple processes. Files are named so that sorting them gives the
+        order they must be loaded in.
+
+        :return: tuple(Counter of models dumped, list of file paths)
+        """
+        work = [
+            (self.domain, index, get_model_label(model_class), db_alias, output_dir)
+            for index, (model_class, db_alias) in enumerate(get_model_db_pairs_to_dump(self.domain, self.excludes))
+        ]
+        stats = Counter()
+        paths = []
+        # worker processes must not share the parent's database connections
+        connections.close_all()
+        pool = multiprocessing.Pool(processes=processes)
+        try:
+            for model_label, db_alias, path, count, duration in pool.imap_unordered(_dump_model_part, work):
+                stats[model_label] += count
+                if count:
+                    paths.append(path)
+                else:
+                    os.remove(path)
+                self.stdout.write('Dumped {} {} from {} ({:.0f} rows/sec)\n'.format(
+                    count, model_label, db_alias, count / duration if duration else 0
+                ))
+        finally:
+            pool.close()
+            pool.join()
+        return stats, sorted(paths)
+
+
+def _dump_model_part(args):
+    domain, index, model_label, db_alias, output_dir = args
+    model_class = apps.get_model(model_label)
+    path = os.path.join(output_dir, '{:04d}-{}-{}.gz'.format(index, model_label, db_alias))
+    start = time.time()
+    stats = Counter()
+    with gzip.open(path, 'wt') as output_stream:
+        for _, builder in get_all_model_iterators_builders_for_domain(model_class, domain, db_alias):
+            JsonLinesSerializer().serialize(
+                _iter_and_count(builder, model_label, stats),
+                use_natural_foreign_keys=False,
+                use_natural_primary_keys=True,
+                stream=output_stream
+            )
+    return model_label, db_alias, path, stats[model_label], time.time() - start
+
+
+def _iter_and_count(builder, model_label, stats_counter):
+    for iterator in builder.iterators():
+        for obj in iterator:
+            stats_counter.update([model_label])
+            yield obj
+
 
 def get_objects_to_dump(domain, excludes, stats_counter=None, stdout=None):
     """
@@ -170,11 +230,22 @@ def get_model_iterator_builders_to_dump(domain, excludes):
             yield model_class, builder
 
 
-def get_all_model_iterators_builders_for_domain(model_class, domain, limit_to_db=None):
+def get_model_db_pairs_to_dump(domain, excludes):
+    """
+    :return: generator yielding (model_class, db_alias) tuples in dump order
+    """
+    for model_class, builder in get_model_iterator_builders_to_dump(domain, excludes):
+        yield model_class, builder.db_alias
+
+
+def _get_db_aliases_for_model(model_class):
     if settings.USE_PARTITIONED_DATABASE and hasattr(model_class, 'partition_attr'):
-        using = plproxy_config.form_processing_dbs
-    else:
-        using = [router.db_for_read(model_class)]
+        return plproxy_config.form_processing_dbs
+    return [router.db_for_read(model_class)]
+
+
+def get_all_model_iterators_builders_for_domain(model_class, domain, limit_to_db=None):
+    using = _get_db_aliases_for_model(model_class)
 
     if limit_to_db:
         if limit_to_db not in using:
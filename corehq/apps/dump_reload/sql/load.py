@@ -1,5 +1,9 @@
+import gzip
 import json
+import os
+import time
 from collections import Counter, defaultdict
+from itertools import groupby
 
 from django.apps import apps
 from django.core.management.color import no_style
@@ -11,6 +15,7 @@ from django.db import (
     router,
     transaction,
 )
+from django.db.models.signals import post_save, pre_save
 from django.utils.encoding import force_text
 
 from corehq.apps.dump_reload.interface import DataLoader
@@ -35,15 +40,35 @@ class LoadStat(object):
 class SqlDataLoader(DataLoader):
     slug = 'sql'
 
+    def load_from_file(self, extracted_dump_path, force=False):
+        """Load from the per model part files written by ``SqlDataDumper.dump_parts``
+        if they are present, otherwise from the single ``sql.gz`` dump file"""
+        parts_path = os.path.join(extracted_dump_path, self.slug)
+        if not os.path.isdir(parts_path):
+            return super(SqlDataLoader, self).load_from_file(extracted_dump_path, force)
+
+        def _iter_part_lines():
+            for filename in sorted(os.listdir(parts_path)):
+                with gzip.open(os.path.join(parts_path, filename)) as part_file:
+                    for line in part_file:
+                        yield line
+
+        return self.load_objects(_iter_part_lines(), force)
+
     def load_objects(self, object_strings, force=False):
         # Keep a count of the installed objects
         load_stats_by_db = {}
         total_object_counts = []
+        start = time.time()
 
         def _process_chunk(chunk, total_object_counts=total_object_counts, load_stats_by_db=load_stats_by_db):
             chunk_stats = load_objects(chunk)
             total_object_counts.append(len(chunk))
-            self.stdout.write('Loaded {} SQL objects'.format(sum(total_object_counts)))
+            total = sum(total_object_counts)
+            elapsed = time.time() - start
+            self.stdout.write('Loaded {} SQL objects ({:.0f} rows/sec)'.format(
+                total, total / elapsed if elapsed else 0
+            ))
             _update_stats(load_stats_by_db, chunk_stats)
 
         chunk = []
@@ -118,19 +143,12 @@ def load_data_for_db(db_alias, objects):
 
     model_counter = Counter()
     with connection.constraint_checks_disabled():
-        for obj in PythonDeserializer(objects, using=db_alias):
-            if router.allow_migrate_model(db_alias, obj.object.__class__):
-                model_counter.update([obj.object.__class__])
-                try:
-                    obj.save(using=db_alias)
-                except (DatabaseError, IntegrityError) as e:
-                    e.args = ("Could not load %(app_label)s.%(object_name)s(pk=%(pk)s): %(error_msg)s" % {
-                        'app_label': obj.object._meta.app_label,
-                        'object_name': obj.object._meta.object_name,
-                        'pk': obj.object.pk,
-                        'error_msg': force_text(e)
-                    },)
-                    raise
+        deserialized = PythonDeserializer(objects, using=db_alias)
+        for model, model_objects in groupby(deserialized, key=lambda obj: obj.object.__class__):
+            if router.allow_migrate_model(db_alias, model):
+                model_objects = list(model_objects)
+                model_counter[model] += len(model_objects)
+                _save_objects(db_alias, model, model_objects)
 
     # Since we disabled constraint checks, we must manually check for
     # any invalid keys that might have been added
@@ -144,6 +162,58 @@ def load_data_for_db(db_alias, objects):
     return LoadStat(db_alias, model_counter)
 
 
+def _save_objects(db_alias, model, deserialized_objects):
+    """Insert objects of a single model in batches where possible.
+
+    Falls back to saving objects one at a time (which also updates existing
+    rows) for models with many-to-many data or ``pre_save`` / ``post_save``
+    handlers, and if the bulk insert fails.
+    """
+    if _can_bulk_create(model, deserialized_objects):
+        try:
+            with transaction.atomic(using=db_alias):
+                _bulk_insert_raw(db_alias, model, [obj.object for obj in deserialized_objects])
+            return
+        except IntegrityError:
+            pass
+
+    for obj in deserialized_objects:
+        try:
+            obj.save(using=db_alias)
+        except (DatabaseError, IntegrityError) as e:
+            e.args = ("Could not load %(app_label)s.%(object_name)s(pk=%(pk)s): %(error_msg)s" % {
+                'app_label': obj.object._meta.app_label,
+                'object_name': obj.object._meta.object_name,
+                'pk': obj.object.pk,
+                'error_msg': force_text(e)
+            },)
+            raise
+
+
+def _bulk_insert_raw(db_alias, model, objects):
+    """Insert objects with the values they were dumped with
+
+    Like ``DeserializedObject.save()``, the insert is raw, so field
+    ``pre_save`` hooks are not run (e.g. ``auto_now`` fields keep their
+    dumped values). ``bulk_create`` cannot do raw inserts.
+    """
+    fields = model._meta.local_concrete_fields
+    manager = model._base_manager.using(db_alias)
+    batch_size = max(connections[db_alias].ops.bulk_batch_size(fields, objects), 1)
+    for start in range(0, len(objects), batch_size):
+        manager._insert(objects[start:start + batch_size], fields=fields, using=db_alias, raw=True)
+
+
+def _can_bulk_create(model, deserialized_objects):
+    return (
+        not model._meta.parents
+        and not pre_save.has_listeners(model)
+        and not post_save.has_listeners(model)
+        and all(obj.object.pk is not None for obj in deserialized_objects)
+        and not any(obj.m2m_data for obj in deserialized_objects)
+    )
+
+
 def _group_objects_by_db(objects):
     """
     :param objects: Deserialized object dictionaries
@@ -1,5 +1,9 @@
+import gzip
 import inspect
 import json
+import os
+import shutil
+import tempfile
 import uuid
 from collections import Counter
 from datetime import datetime
@@ -8,7 +12,7 @@ from io import StringIO
 from django.contrib.admin.utils import NestedObjects
 from django.core import serializers
 from django.db.models.signals import post_save
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.test.utils import override_settings
 
 from nose.plugins.attrib import attr
@@ -46,10 +50,10 @@ from corehq.form_processor.tests.utils import (
 )
 
 
-class BaseDumpLoadTest(TestCase):
+class DumpLoadTestMixin(object):
     @classmethod
     def setUpClass(cls):
-        super(BaseDumpLoadTest, cls).setUpClass()
+        super(DumpLoadTestMixin, cls).setUpClass()
         cls.domain_name = uuid.uuid4().hex
         cls.domain = Domain(name=cls.domain_name)
         cls.domain.save()
@@ -61,7 +65,7 @@ class BaseDumpLoadTest(TestCase):
     @classmethod
     def tearDownClass(cls):
         cls.domain.delete()
-        super(BaseDumpLoadTest, cls).tearDownClass()
+        super(DumpLoadTestMixin, cls).tearDownClass()
 
     def delete_sql_data(self):
         for model_class, builder in get_model_iterator_builders_to_dump(self.domain_name, []):
@@ -74,7 +78,7 @@ class BaseDumpLoadTest(TestCase):
 
     def tearDown(self):
         self.delete_sql_data()
-        super(BaseDumpLoadTest, self).tearDown()
+        super(DumpLoadTestMixin, self).tearDown()
 
     def _dump_and_load(self, expected_object_counts):
         expected_object_counts.update(self.default_objects_counts)
@@ -126,6 +130,10 @@ class BaseDumpLoadTest(TestCase):
                 self.assertIn('raw', args, message)
 
 
+class BaseDumpLoadTest(DumpLoadTestMixin, TestCase):
+    pass
+
+
 @attr(sql_backend=True)
 @override_settings(TESTS_SHOULD_USE_SQL_BACKEND=True)
 class TestSQLDumpLoadShardedModels(BaseDumpLoadTest):
@@ -492,6 +500,52 @@ class TestSQLDumpLoad(BaseDumpLoadTest):
         self._dump_and_load(expected_object_counts)
 
 
+class TestSQLDumpLoadParts(DumpLoadTestMixin, TransactionTestCase):
+    """``dump_parts`` dumps from worker processes, which can't see data
+    created in a ``TestCase`` transaction"""
+
+    def setUp(self):
+        super(TestSQLDumpLoadParts, self).setUp()
+        self.dump_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dump_path)
+
+    def test_dump_load_parts(self):
+        products = [
+            SQLProduct.objects.create(domain=self.domain_name, product_id='test{}'.format(i), name='test')
+            for i in range(3)
+        ]
+        SQLProduct.objects.filter(pk=products[0].pk).update(last_modified=datetime(2015, 1, 1))
+        expected_values = list(SQLProduct.objects.filter(domain=self.domain_name).order_by('pk').values())
+
+        parts_path = os.path.join(self.dump_path, 'sql')
+        os.mkdir(parts_path)
+        stats, paths = SqlDataDumper(self.domain_name, [], stdout=StringIO()).dump_parts(parts_path, processes=2)
+
+        expected_counts = _normalize_object_counter(Counter({SQLProduct: 3}) + self.default_objects_counts)
+        self.assertDictEqual(dict(expected_counts), {label: count for label, count in stats.items() if count})
+        # models with no rows don't leave empty parts behind
+        self.assertEqual(sorted(os.listdir(parts_path)), [os.path.basename(path) for path in paths])
+        self.assertEqual(len(paths), len(expected_counts))
+
+        self.delete_sql_data()
+        # an empty part still loads
+        with gzip.open(os.path.join(parts_path, '9999-products.sqlproduct-default.gz'), 'wt'):
+            pass
+
+        total_object_count, loaded_model_counts = SqlDataLoader(stdout=StringIO()).load_from_file(self.dump_path)
+
+        self.assertEqual(sum(expected_counts.values()), total_object_count)
+        self.assertDictEqual(
+            dict(_normalize_object_counter(Counter({SQLProduct: 3}) + self.default_objects_counts, for_loaded=True)),
+            dict(loaded_model_counts)
+        )
+        # auto_now / auto_now_add fields keep the values they were dumped with
+        self.assertEqual(
+            expected_values,
+            list(SQLProduct.objects.filter(domain=self.domain_name).order_by('pk').values())
+        )
+
+
 def _normalize_object_counter(counter, for_loaded=False):
     """Converts a <Model Class> keyed counter to an model label keyed counter"""
     def _model_class_to_label(model_class):
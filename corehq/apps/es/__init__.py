@@ -9,7 +9,7 @@ from . import (
     queries,
     users,
 )
-from .es_query import ESQuery, HQESQuery
+from .es_query import ESQuery, HQESQuery, run_queries
 
 AppES = apps.AppES
 CaseES = cases.CaseES
@@ -0,0 +1,118 @@
+"""
+Opt-in cache of Elasticsearch query results
+
+Report pages often run the same aggregations for the same domain and date
+range several times within a few minutes. Queries marked with
+``ESQuery.cached()`` store their raw results in the shared cache keyed by
+the index and the normalized query JSON, so repeat requests are served
+without hitting the cluster.
+
+Invalidation is time based: results are kept for a short, per-index time
+and may be that much out of date, since documents are indexed continuously
+and writes to an index are not tracked. The only explicit invalidation is
+``refresh_elasticsearch_index``, which tests and reindex tools call.
+
+Results larger than ``MAX_CACHED_RESULT_SIZE`` are never cached. At most
+``MAX_CACHED_SIZE_PER_PERIOD`` bytes of results are cached per
+``CACHE_SIZE_PERIOD``, and results expire within a period, so the cache
+never holds more than twice that.
+"""
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from corehq.util.datadog.gauges import datadog_counter
+
+DEFAULT_CACHE_TIMEOUT = 60
+
+CACHE_TIMEOUTS = {
+    "forms": 60,
+    "cases": 60,
+    "active_cases": 60,
+    "report_cases": 60,
+    "report_xforms": 60,
+    "case_search": 60,
+    "sms": 60,
+    "users": 2 * 60,
+    "users_all": 2 * 60,
+    "groups": 2 * 60,
+    "domains": 5 * 60,
+    "apps": 5 * 60,
+}
+
+# in bytes of serialized JSON
+MAX_CACHED_RESULT_SIZE = 512 * 1024
+MAX_CACHED_SIZE_PER_PERIOD = 100 * 1024 * 1024
+
+# seconds, also the longest time results are kept
+CACHE_SIZE_PERIOD = 5 * 60
+
+
+def query_cache_enabled():
+    # tests query documents moments after indexing them
+    return not settings.UNIT_TESTING
+
+
+def get_cache_timeout(index_name):
+    return CACHE_TIMEOUTS.get(index_name, DEFAULT_CACHE_TIMEOUT)
+
+
+def get_cached_result(index_name, raw_query, es_instance_alias):
+    """
+    :return: ``(cache key, raw result)``. The result is ``None`` if it
+    was not found in the cache.
+    """
+    key = _get_result_key(index_name, raw_query, es_instance_alias)
+    result = cache.get(key)
+    datadog_counter('commcare.es.query_cache', tags=[
+        'index:{}'.format(index_name),
+        'result:{}'.format('miss' if result is None else 'hit'),
+    ])
+    return key, result
+
+
+def cache_result(key, index_name, result, timeout):
+    size = len(json.dumps(result))
+    if size > MAX_CACHED_RESULT_SIZE:
+        datadog_counter('commcare.es.query_cache.too_large', tags=['index:{}'.format(index_name)])
+        return
+    if not _reserve_cache_size(size):
+        datadog_counter('commcare.es.query_cache.full', tags=['index:{}'.format(index_name)])
+        return
+    cache.set(key, result, min(timeout, CACHE_SIZE_PERIOD))
+
+
+def _reserve_cache_size(size):
+    """Count ``size`` against the bytes cached in the current period
+
+    :return: ``False`` if the period's limit is exceeded
+    """
+    key = 'es-query-cache-size-{}'.format(int(time.time() // CACHE_SIZE_PERIOD))
+    cache.add(key, 0, 2 * CACHE_SIZE_PERIOD)
+    try:
+        cached_size = cache.incr(key, size)
+    except ValueError:
+        # expired since it was added
+        return False
+    return cached_size <= MAX_CACHED_SIZE_PER_PERIOD
+
+
+def invalidate_cached_results(index_name):
+    """Make all results cached for the index stale"""
+    cache.set(_get_generation_key(index_name), uuid.uuid4().hex, None)
+
+
+def _get_result_key(index_name, raw_query, es_instance_alias):
+    generation = cache.get(_get_generation_key(index_name))
+    normalized = json.dumps(raw_query, sort_keys=True, default=str)
+    return 'es-query-result-{}'.format(hashlib.sha1('{}:{}:{}:{}'.format(
+        index_name, es_instance_alias, generation, normalized
+    ).encode('utf-8')).hexdigest())
+
+
+def _get_generation_key(index_name):
+    return 'es-query-generation-{}'.format(index_name)
@@ -98,7 +98,7 @@ Language
     Add esquery.iter() method
 """
 import json
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from copy import deepcopy
 
 from memoized import memoized
@@ -110,11 +110,18 @@ from corehq.elastic import (
     SIZE_LIMIT,
     ESError,
     ScanResult,
+    run_multi_query,
     run_query,
     scroll_query,
 )
 
 from . import aggregations, filters, queries
+from .cache import (
+    cache_result,
+    get_cache_timeout,
+    get_cached_result,
+    query_cache_enabled,
+)
 from .utils import flatten_field_dict, values_list
 
 
@@ -143,6 +150,7 @@ class ESQuery(object):
     _size = None
     _aggregations = None
     _source = None
+    _cache_timeout = None
     default_filters = {
         "match_all": filters.match_all()
     }
@@ -213,29 +221,58 @@ class ESQuery(object):
     def run(self, include_hits=False):
         """Actually run the query.  Returns an ESQuerySet object."""
         query = self._clean_before_run(include_hits)
-        raw = run_query(
-            query.index,
-            query.raw_query,
-            debug_host=query.debug_host,
-            es_instance_alias=self.es_instance_alias,
-        )
+        if query._cache_timeout is not None and not query.debug_host and query_cache_enabled():
+            raw = query._run_cached()
+        else:
+            raw = run_query(
+                query.index,
+                query.raw_query,
+                debug_host=query.debug_host,
+                es_instance_alias=self.es_instance_alias,
+            )
         return ESQuerySet(raw, deepcopy(query))
 
+    def _run_cached(self):
+        key, raw = get_cached_result(self.index, self.raw_query, self.es_instance_alias)
+        if raw is None:
+            raw = run_query(self.index, self.raw_query, es_instance_alias=self.es_instance_alias)
+            cache_result(key, self.index, raw, self._cache_timeout)
+        return raw
+
+    def cached(self, timeout=None):
+        """
+        Serve results of this query from a short-lived cache shared by all
+        processes. Use for queries that are repeated often (e.g. report
+        aggregations) and where results a minute or so old are acceptable:
+        results are not invalidated when documents are indexed.
+
+        :param timeout: seconds to keep results, at most five minutes.
+        Defaults to a time that depends on the index (see
+        ``corehq.apps.es.cache``).
+        """
+        query = deepcopy(self)
+        query._cache_timeout = timeout or get_cache_timeout(query.index)
+        return query
+
     def _clean_before_run(self, include_hits=False):
         query = deepcopy(self)
         if not include_hits and query.uses_aggregations():
             query = query.size(0)
         return query
 
-    def scroll(self):
+    def scroll(self, parallel=False):
         """
         Run the query against the scroll api. Returns an iterator yielding each
         document that matches the query.
+
+        :param parallel: Scroll the shards of the index in parallel threads.
+        Documents are yielded as they arrive, so sorting is not preserved.
         """
         query = deepcopy(self)
         if query._size is None:
             query._size = SCROLL_PAGE_SIZE_LIMIT
-        result = scroll_query(query.index, query.raw_query, es_instance_alias=self.es_instance_alias)
+        result = scroll_query(query.index, query.raw_query, es_instance_alias=self.es_instance_alias,
+                              parallel=parallel)
         return ScanResult(
             result.count,
             (ESQuerySet.normalize_result(query, r) for r in result)
@@ -478,9 +515,60 @@ class ESQuery(object):
         For very large sets of IDs, use ``scroll_ids`` instead"""
         return self.exclude_source().run().doc_ids
 
-    def scroll_ids(self):
+    def scroll_ids(self, parallel=False):
         """Returns a generator of all matching ids"""
-        return self.exclude_source().size(5000).scroll()
+        return self.exclude_source().size(5000).scroll(parallel=parallel)
+
+
+def run_queries(queries, include_hits=False):
+    """
+    Run several independent queries together. Returns a list of ESQuerySet
+    objects, one for each query, as ``query.run()`` would.
+
+    Queries not served from the cache are sent to Elasticsearch in a single
+    multi search request, so the time taken is about that of the slowest
+    query rather than the sum of them all.
+
+    .. code-block:: python
+
+        rows, totals = run_queries([rows_query, totals_query])
+    """
+    queries = [query._clean_before_run(include_hits) for query in queries]
+    raw_results = [None] * len(queries)
+    pending = defaultdict(list)
+    for i, query in enumerate(queries):
+        cache_key = None
+        if query.debug_host:
+            raw_results[i] = run_query(
+                query.index,
+                query.raw_query,
+                debug_host=query.debug_host,
+                es_instance_alias=query.es_instance_alias,
+            )
+            continue
+        if query._cache_timeout is not None and query_cache_enabled():
+            cache_key, raw_results[i] = get_cached_result(
+                query.index, query.raw_query, query.es_instance_alias)
+            if raw_results[i] is not None:
+                continue
+        pending[query.es_instance_alias].append((i, cache_key))
+
+    for es_instance_alias, to_run in pending.items():
+        if len(to_run) == 1:
+            i, cache_key = to_run[0]
+            responses = [run_query(queries[i].index, queries[i].raw_query,
+                                   es_instance_alias=es_instance_alias)]
+        else:
+            responses = run_multi_query(
+                [(queries[i].index, queries[i].raw_query) for i, cache_key in to_run],
+                es_instance_alias=es_instance_alias,
+            )
+        for (i, cache_key), raw in zip(to_run, responses):
+            if cache_key is not None:
+                cache_result(cache_key, queries[i].index, raw, queries[i]._cache_timeout)
+            raw_results[i] = raw
+
+    return [ESQuerySet(raw, deepcopy(query)) for raw, query in zip(raw_results, queries)]
 
 
 class ESQuerySet(object):
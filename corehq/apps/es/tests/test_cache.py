@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from mock import patch
+
+from corehq.apps.es.cache import invalidate_cached_results
+from corehq.apps.es.forms import FormES
+
+RESPONSE = {
+    '_shards': {'failed': 0, 'successful': 5, 'total': 5},
+    'hits': {'hits': [], 'max_score': 1.0, 'total': 5247},
+    'timed_out': False,
+    'took': 4,
+}
+
+
+@patch('corehq.apps.es.es_query.query_cache_enabled', lambda: True)
+@patch('corehq.apps.es.es_query.run_query', return_value=RESPONSE)
+class TestESQueryCache(TestCase):
+
+    def setUp(self):
+        self.cache = LocMemCache('es-query-cache-test', {})
+        # locmem caches with the same name share their entries
+        self.addCleanup(self.cache.clear)
+        patcher = patch('corehq.apps.es.cache.cache', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_query_runs_once(self, run_query):
+        self.assertEqual(FormES().domain('test').cached().count(), 5247)
+        self.assertEqual(FormES().domain('test').cached().count(), 5247)
+        self.assertEqual(run_query.call_count, 1)
+
+    def test_different_queries(self, run_query):
+        FormES().domain('test').cached().count()
+        FormES().domain('other').cached().count()
+        self.assertEqual(run_query.call_count, 2)
+
+    def test_uncached_query(self, run_query):
+        FormES().domain('test').count()
+        FormES().domain('test').count()
+        self.assertEqual(run_query.call_count, 2)
+
+    def test_invalidate(self, run_query):
+        FormES().domain('test').cached().count()
+        invalidate_cached_results('forms')
+        FormES().domain('test').cached().count()
+        self.assertEqual(run_query.call_count, 2)
+
+    def test_large_results_not_cached(self, run_query):
+        with patch('corehq.apps.es.cache.MAX_CACHED_RESULT_SIZE', 10):
+            FormES().domain('test').cached().count()
+            FormES().domain('test').cached().count()
+        self.assertEqual(run_query.call_count, 2)
+
+    def test_total_size_limited(self, run_query):
+        with patch('corehq.apps.es.cache.MAX_CACHED_SIZE_PER_PERIOD', 200):
+            FormES().domain('test').cached().count()
+            FormES().domain('other').cached().count()
+            FormES().domain('test').cached().count()
+            FormES().domain('other').cached().count()
+        self.assertEqual(run_query.call_count, 3)
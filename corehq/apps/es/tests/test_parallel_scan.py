@@ -0,0 +1,88 @@
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from corehq.elastic import iter_es_docs, parallel_scan
+
+
+class FakeClient(object):
+    """Fake ES client with one page of hits per shard per scroll request"""
+
+    def __init__(self, hits_by_shard, page_size=2):
+        self.hits_by_shard = hits_by_shard
+        self.page_size = page_size
+        self.requests = []
+
+    def search_shards(self, index=None, doc_type=None):
+        return {'shards': [[{'shard': n}] for n in range(len(self.hits_by_shard))]}
+
+    def search(self, index, doc_type, body=None, params=None, preference=None, **kwargs):
+        if preference is None:
+            assert body['size'] == 0, body
+            return {
+                '_shards': {'failed': 0, 'total': len(self.hits_by_shard)},
+                'hits': {'total': sum(len(hits) for hits in self.hits_by_shard), 'hits': []},
+            }
+        shard = int(preference.split(':')[1])
+        self.requests.append(('search', shard))
+        return {
+            '_scroll_id': '{}:0'.format(shard),
+            '_shards': {'failed': 0, 'total': 1},
+            'hits': {'total': len(self.hits_by_shard[shard]), 'hits': []},
+        }
+
+    def scroll(self, scroll_id, body=None, params=None, **kwargs):
+        shard, page = map(int, scroll_id.split(':'))
+        self.requests.append(('scroll', shard))
+        start = page * self.page_size
+        hits = self.hits_by_shard[shard][start:start + self.page_size]
+        if hits == ['error']:
+            raise ValueError('scroll failed')
+        return {
+            '_scroll_id': '{}:{}'.format(shard, page + 1),
+            '_shards': {'failed': 0, 'total': 1},
+            'hits': {'hits': [{'_id': hit} for hit in hits]},
+        }
+
+
+class TestParallelScan(SimpleTestCase):
+
+    def test_all_shards(self):
+        client = FakeClient([['a', 'b', 'c'], [], ['d', 'e', 'f', 'g', 'h']])
+        result = parallel_scan(client, query={}, index='index', doc_type='type', buffer_size=1)
+        self.assertEqual(result.count, 8)
+        self.assertEqual(sorted(hit['_id'] for hit in result), list('abcdefgh'))
+
+    def test_error(self):
+        client = FakeClient([['a', 'b', 'c'], ['d', 'e', 'error']])
+        result = parallel_scan(client, query={}, index='index', doc_type='type')
+        with self.assertRaises(ValueError):
+            list(result)
+
+    def test_stop_early(self):
+        client = FakeClient([list(range(100)), list(range(100))])
+        result = parallel_scan(client, query={}, index='index', doc_type='type', buffer_size=1)
+        iterator = iter(result)
+        next(iterator)
+        iterator.close()
+
+    def test_scroll_opened_when_shard_is_read(self):
+        client = FakeClient([['a', 'b', 'c'], ['d'], ['e', 'f']])
+        result = parallel_scan(client, query={}, index='index', doc_type='type', max_workers=1)
+        self.assertEqual(result.count, 6)
+        self.assertEqual(client.requests, [])
+        self.assertEqual(sorted(hit['_id'] for hit in result), list('abcdef'))
+        self.assertEqual(client.requests, [
+            ('search', 0), ('scroll', 0), ('scroll', 0), ('scroll', 0),
+            ('search', 1), ('scroll', 1), ('scroll', 1),
+            ('search', 2), ('scroll', 2), ('scroll', 2),
+        ])
+
+
+class TestIterESDocsPrefetch(SimpleTestCase):
+
+    @patch('corehq.elastic.mget_query', lambda index, ids: [{'_id': doc_id} for doc_id in ids])
+    def test_order_is_preserved(self):
+        ids = [str(n) for n in range(1000)]
+        docs = list(iter_es_docs('forms', iter(ids), prefetch_workers=3))
+        self.assertEqual([doc['_id'] for doc in docs], ids)
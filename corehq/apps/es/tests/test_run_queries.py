@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+from mock import patch
+
+from corehq.apps.es.es_query import run_queries
+from corehq.apps.es.forms import FormES
+from corehq.apps.es.users import UserES
+
+
+def _response(total):
+    return {
+        '_shards': {'failed': 0, 'successful': 5, 'total': 5},
+        'hits': {'hits': [], 'max_score': 1.0, 'total': total},
+        'timed_out': False,
+        'took': 4,
+    }
+
+
+class TestRunQueries(TestCase):
+
+    @patch('corehq.apps.es.es_query.run_query')
+    @patch('corehq.apps.es.es_query.run_multi_query')
+    def test_single_request(self, run_multi_query, run_query):
+        run_multi_query.return_value = [_response(3), _response(5)]
+        forms_query = FormES().domain('test').size(0)
+        users_query = UserES().domain('test').size(0)
+
+        forms_result, users_result = run_queries([forms_query, users_query])
+
+        self.assertEqual((forms_result.total, users_result.total), (3, 5))
+        self.assertFalse(run_query.called)
+        run_multi_query.assert_called_once_with(
+            [('forms', forms_query.raw_query), ('users', users_query.raw_query)],
+            es_instance_alias=forms_query.es_instance_alias,
+        )
+
+    @patch('corehq.apps.es.es_query.run_query', return_value=_response(3))
+    @patch('corehq.apps.es.es_query.run_multi_query')
+    def test_one_query(self, run_multi_query, run_query):
+        [result] = run_queries([FormES().domain('test')])
+        self.assertEqual(result.total, 3)
+        self.assertFalse(run_multi_query.called)
@@ -23,8 +23,9 @@ from corehq.apps.export.models.new import (
     FormExportInstance,
     SMSExportInstance,
 )
+from corehq.apps.export.plan import ExportPlan
 from corehq.elastic import iter_es_docs_from_query
-from corehq.toggles import PAGINATED_EXPORTS
+from corehq.toggles import INCREMENTAL_SAVED_EXPORTS, PAGINATED_EXPORTS
 from corehq.util.datadog.gauges import datadog_histogram, datadog_track_errors
 from corehq.util.datadog.utils import DAY_SCALE_TIME_BUCKETS, load_counter
 from corehq.util.files import TransientTempfile, safe_filename
@@ -78,11 +79,16 @@ class _ExportWriter(object):
             # open the ExportWriter
             headers = []
             table_titles = {}
+            column_types = {}
             for instance_index, instance in enumerate(export_instances):
                 headers += [
                     (t, (t.get_headers(split_columns=instance.split_multiselects),))
                     for t in instance.selected_tables
                 ]
+                column_types.update(
+                    (t, t.get_column_types(split_columns=instance.split_multiselects))
+                    for t in instance.selected_tables
+                )
                 for table_index, table in enumerate(instance.selected_tables):
                     sheet_name = table.label or "Sheet{}".format(table_index + 1)
                     # If it's a bulk export and the sheet has the same name as another sheet,
@@ -93,7 +99,12 @@ class _ExportWriter(object):
                             sheet_name
                         )
                     table_titles[table] = sheet_name
-            self.writer.open(headers, file, table_titles=table_titles, archive_basepath=name)
+            self.writer.open(
+                headers, file,
+                table_titles=table_titles,
+                archive_basepath=name,
+                column_types=column_types,
+            )
             try:
                 yield
             finally:
@@ -106,13 +117,25 @@ class _ExportWriter(object):
         :param table: A TableConfiguration
         :param row: An ExportRow
         """
+        return self.write_rows(table, [row])
+
+    def write_rows(self, table, rows):
+        """
+        Write the given rows to the given table of the export.
+        _Writer must be opened first.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
         return self.writer.write([
-            (table, [FormattedRow(
-                data=row.data,
-                hyperlink_column_indices=row.hyperlink_column_indices,
-                skip_excel_formatting=row.skip_excel_formatting
-                if hasattr(row, 'skip_excel_formatting') else ()
-            )])
+            (table, [
+                FormattedRow(
+                    data=row.data,
+                    hyperlink_column_indices=row.hyperlink_column_indices,
+                    skip_excel_formatting=row.skip_excel_formatting
+                    if hasattr(row, 'skip_excel_formatting') else ()
+                )
+                for row in rows
+            ])
         ])
 
     def get_preview(self):
@@ -139,6 +162,7 @@ class _PaginatedExportWriter(object):
 
         self.name = self._get_name(export_instances)
         self.headers = self._get_headers(export_instances)
+        self.column_types = self._get_column_types(export_instances)
         self.table_names = self._get_table_names(export_instances)
 
         with open(self.path, 'wb') as file_handle:
@@ -146,7 +170,11 @@ class _PaginatedExportWriter(object):
                 self._get_paginated_headers().items(),
                 file_handle,
                 table_titles=self._get_paginated_table_titles(),
-                archive_basepath=self.name
+                archive_basepath=self.name,
+                column_types={
+                    self._paged_table_index(table): column_types
+                    for table, column_types in self.column_types.items()
+                },
             )
             try:
                 yield
@@ -180,6 +208,13 @@ class _PaginatedExportWriter(object):
 
         return headers
 
+    def _get_column_types(self, export_instances):
+        return {
+            table: table.get_column_types(split_columns=instance.split_multiselects)
+            for instance in export_instances
+            for table in instance.selected_tables
+        }
+
     def _get_table_names(self, export_instances):
         '''
         Returns a dictionary that maps all TableConfigurations in the list of ExportInstances to a
@@ -261,11 +296,33 @@ class _PaginatedExportWriter(object):
                 self._paged_table_index(table),
                 self._get_paginated_headers()[self._paged_table_index(table)][0],
                 table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
+                column_types=self.column_types[table],
             )
 
         self.writer.write([(self._paged_table_index(table), [FormattedRow(data=row.data)])])
         self.rows_written[table] += 1
 
+    def write_rows(self, table, rows):
+        """
+        Write the given rows to the given table of the export, starting
+        new tables as needed.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        while rows:
+            page_end = MAX_EXPORTABLE_ROWS * (self.pages[table] + 1)
+            if self.rows_written[table] >= page_end:
+                # start the next table
+                self.write(table, rows[0])
+                rows = rows[1:]
+                continue
+            batch = rows[:page_end - self.rows_written[table]]
+            self.writer.write([
+                (self._paged_table_index(table), [FormattedRow(data=row.data) for row in batch])
+            ])
+            self.rows_written[table] += len(batch)
+            rows = rows[len(batch):]
+
 
 def get_export_writer(export_instances, temp_path, allow_pagination=True):
     """
@@ -319,11 +376,11 @@ def get_export_file(export_instances, filters, temp_path, progress_tracker=None)
 
 def get_export_documents(export_instance, filters):
     # Pull doc ids from elasticsearch and stream to disk
-    query = _get_export_query(export_instance, filters)
+    query = get_export_query(export_instance, filters)
     return iter_es_docs_from_query(query)
 
 
-def _get_export_query(export_instance, filters):
+def get_export_query(export_instance, filters):
     query = _get_base_query(export_instance)
     for filter in filters:
         query = query.filter(filter.to_es_filter())
@@ -331,10 +388,10 @@ def _get_export_query(export_instance, filters):
 
 
 def get_export_size(export_instance, filters):
-    return _get_export_query(export_instance, filters).count()
+    return get_export_query(export_instance, filters).count()
 
 
-def write_export_instance(writer, export_instance, documents, progress_tracker=None):
+def write_export_instance(writer, export_instance, documents, progress_tracker=None, row_offset=0):
     """
     Write rows to the given open _Writer.
     Rows will be written to each table in the export instance for each of
@@ -343,6 +400,8 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
     :param export_instance: An ExportInstance
     :param documents: An iterable yielding documents
     :param progress_tracker: A task for soil to track progress against
+    :param row_offset: Row number of the first document, when the documents
+    are a page of a larger export
     :return: None
     """
     if progress_tracker:
@@ -355,22 +414,18 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
     write_total = 0
     track_load = load_counter(export_instance.type, "export", export_instance.domain)
 
+    plan = ExportPlan(export_instance)
     for row_number, doc in enumerate(documents):
         total_bytes += sys.getsizeof(doc)
-        for table in export_instance.selected_tables:
+        for table_plan in plan.tables:
             compute_start = _time_in_milliseconds()
             try:
-                rows = table.get_rows(
-                    doc,
-                    row_number,
-                    split_columns=export_instance.split_multiselects,
-                    transform_dates=export_instance.transform_dates,
-                )
+                rows = table_plan.get_rows(doc, row_offset + row_number)
             except Exception as e:
                 notify_exception(None, "Error exporting doc", details={
                     'domain': export_instance.domain,
                     'export_instance_id': export_instance.get_id,
-                    'export_table': table.label,
+                    'export_table': table_plan.table.label,
                     'doc_id': doc.get('_id'),
                 })
                 e.sentry_capture = False
@@ -378,10 +433,7 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
             compute_total += _time_in_milliseconds() - compute_start
 
             write_start = _time_in_milliseconds()
-            for row in rows:
-                # It might be bad to write one row at a time when you can do more (from a performance perspective)
-                # Regardless, we should handle the batching of rows in the _Writer class, not here.
-                writer.write(table, row)
+            writer.write_rows(table_plan.table, rows)
             write_total += _time_in_milliseconds() - write_start
 
             total_rows += len(rows)
@@ -474,6 +526,15 @@ def rebuild_export(export_instance, progress_tracker):
     """
     Rebuild the given daily saved ExportInstance
     """
+    from corehq.apps.export.incremental import (
+        rebuild_export_incrementally,
+        supports_incremental_rebuild,
+    )
+    if (INCREMENTAL_SAVED_EXPORTS.enabled(export_instance.domain)
+            and supports_incremental_rebuild(export_instance)):
+        rebuild_export_incrementally(export_instance, progress_tracker)
+        return
+
     filters = export_instance.get_filters()
     with TransientTempfile() as temp_path:
         export_file = get_export_file([export_instance], filters or [], temp_path, progress_tracker)
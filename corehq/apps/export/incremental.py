@@ -0,0 +1,267 @@
+"""
+Incremental rebuilds of daily saved exports.
+
+A full rebuild computes export rows for every document matching the export
+query. An incremental rebuild keeps the rows computed for each document
+by the previous rebuild in a blob attached to the export instance (the
+"row store") together with a checkpoint: the time the previous rebuild
+started. On the next rebuild only documents modified since the checkpoint,
+or new to the query, are fetched from Elasticsearch. Their rows replace
+the stored rows, rows of documents that no longer match the query are
+dropped, and the export file is regenerated from the row store.
+
+Entries in the row store are kept in the sort order of the export query so
+the regenerated file matches a full rebuild. Row numbers depend on the
+position of the document in the export, so rows are stored with a
+placeholder row number that is replaced when the file is written.
+
+The row store is discarded (and a full rebuild done) whenever the export
+configuration or filters change.
+"""
+import gzip
+import hashlib
+import heapq
+import json
+import pickle
+import shutil
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+
+from dimagi.utils.chunked import chunked
+from soil import DownloadBase
+
+from corehq.apps.es.filters import date_range
+from corehq.apps.export.export import (
+    ExportFile,
+    get_export_query,
+    get_export_writer,
+    save_export_payload,
+)
+from corehq.apps.export.models.new import (
+    CaseExportInstance,
+    ExportRow,
+    FormExportInstance,
+)
+from corehq.apps.export.page_cache import MODIFIED_ON_FIELD, get_query_cache_key
+from corehq.apps.export.plan import ExportPlan
+from corehq.elastic import iter_es_docs, iter_es_docs_from_query
+from corehq.util.files import TransientTempfile
+
+ROW_STORE_ATTACHMENT_NAME = "incremental_rows"
+
+# Bump when the format of row store entries changes
+ROW_STORE_VERSION = 1
+
+# Documents saved shortly before a rebuild may not be searchable yet, so
+# the checkpoint is moved back by this much to pick them up next time.
+CHECKPOINT_LAG = timedelta(minutes=15)
+
+# Above this many changed documents a full rebuild is done instead since
+# changed rows are sorted in memory.
+MAX_INCREMENTAL_DOCS = 100000
+
+# A full rebuild sorts rows on disk, in sorted runs of this many documents
+# that are then merged.
+SORT_RUN_SIZE = 20000
+
+SORT_FIELDS = {
+    FormExportInstance: 'received_on',
+    CaseExportInstance: 'opened_on',
+}
+
+
+def supports_incremental_rebuild(export_instance):
+    return type(export_instance) in SORT_FIELDS
+
+
+def rebuild_export_incrementally(export_instance, progress_tracker=None):
+    """Rebuild a daily saved export, reusing the rows of unchanged documents
+
+    :return: number of documents whose rows were (re)computed.
+    """
+    assert supports_incremental_rebuild(export_instance), type(export_instance)
+    filters = export_instance.get_filters() or []
+    query = get_export_query(export_instance, filters)
+    builder = _IncrementalExportBuilder(export_instance, query)
+    with TransientTempfile() as previous_path, \
+            TransientTempfile() as store_path, \
+            TransientTempfile() as export_path:
+        if ROW_STORE_ATTACHMENT_NAME in export_instance.blobs:
+            with open(previous_path, 'wb') as f:
+                shutil.copyfileobj(
+                    export_instance.fetch_attachment(ROW_STORE_ATTACHMENT_NAME, stream=True), f
+                )
+        else:
+            previous_path = None
+        computed, export_file = builder.build(previous_path, store_path, export_path, progress_tracker)
+        with export_file as payload:
+            save_export_payload(export_instance, payload)
+        with open(store_path, 'rb') as row_store:
+            export_instance.put_attachment(row_store, ROW_STORE_ATTACHMENT_NAME)
+    return computed
+
+
+def get_export_config_key(export_instance, query):
+    """Key that changes whenever the rows of an export would change"""
+    config = {
+        'query': get_query_cache_key(query),
+        'tables': [table.to_json() for table in export_instance.selected_tables],
+        'split_multiselects': export_instance.split_multiselects,
+        'transform_dates': export_instance.transform_dates,
+    }
+    raw = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class _RowNumber(object):
+    """Placeholder for the row number of a document in stored rows"""
+
+    def __str__(self):
+        return ROW_NUMBER_TOKEN
+
+
+ROW_NUMBER_TOKEN = '\x00row\x00'
+
+
+class _IncrementalExportBuilder(object):
+
+    def __init__(self, export_instance, query):
+        self.export_instance = export_instance
+        self.query = query
+        self.tables = export_instance.selected_tables
+        self.plan = ExportPlan(export_instance)
+        self.sort_field = SORT_FIELDS[type(export_instance)]
+        self.config_key = get_export_config_key(export_instance, query)
+
+    def build(self, previous_path, store_path, export_path, progress_tracker=None):
+        """Write the new row store and export file
+
+        :param previous_path: Path of the row store written by the
+        previous rebuild, or ``None`` if there is none.
+        :return: ``(number of documents computed, ExportFile)``
+        """
+        checkpoint = datetime.utcnow() - CHECKPOINT_LAG
+        header = self._get_store_header(previous_path) if previous_path else None
+        if header is None:
+            return self._build_fully(checkpoint, store_path, export_path, progress_tracker)
+
+        current_ids = set(self.query.scroll_ids())
+        stored_ids = {entry[1] for entry in _iter_store_entries(previous_path)}
+        modified_query = self.query.filter(date_range(MODIFIED_ON_FIELD, gte=header['checkpoint']))
+        to_compute = (set(modified_query.scroll_ids()) | (current_ids - stored_ids)) & current_ids
+        if len(to_compute) > MAX_INCREMENTAL_DOCS:
+            del current_ids, stored_ids, to_compute
+            return self._build_fully(checkpoint, store_path, export_path, progress_tracker)
+
+        stored = (
+            entry for entry in _iter_store_entries(previous_path)
+            if entry[1] in current_ids and entry[1] not in to_compute
+        )
+        computed = sorted(
+            (self._get_entry(doc) for doc in iter_es_docs(self.query.index, to_compute)),
+            key=_entry_sort_key,
+        )
+        entries = heapq.merge(stored, computed, key=_entry_sort_key)
+        export_file = self._write(
+            entries, len(current_ids), checkpoint, store_path, export_path, progress_tracker)
+        return len(computed), export_file
+
+    def _build_fully(self, checkpoint, store_path, export_path, progress_tracker):
+        """Compute the rows of all documents, streaming them from
+        Elasticsearch and sorting them on disk"""
+        docs = iter_es_docs_from_query(self.query)
+        with ExitStack() as run_files:
+            entries, computed = _sort_on_disk(
+                (self._get_entry(doc) for doc in docs), run_files)
+            export_file = self._write(
+                entries, docs.count, checkpoint, store_path, export_path, progress_tracker)
+        return computed, export_file
+
+    def _get_store_header(self, path):
+        with gzip.open(path, 'rb') as f:
+            header = pickle.load(f)
+        if header.get('version') != ROW_STORE_VERSION or header['config_key'] != self.config_key:
+            return None
+        return header
+
+    def _get_entry(self, doc):
+        rows = [
+            [
+                (row.data, row.hyperlink_column_indices, row.skip_excel_formatting)
+                for row in table_plan.get_rows(doc, _RowNumber())
+            ]
+            for table_plan in self.plan.tables
+        ]
+        # Elasticsearch sorts documents missing the sort field last
+        sort_value = doc.get(self.sort_field)
+        return ((sort_value is None, sort_value or ''), doc['_id'], rows)
+
+    def _write(self, entries, total, checkpoint, store_path, export_path, progress_tracker):
+        if progress_tracker:
+            DownloadBase.set_progress(progress_tracker, 0, total)
+        writer = get_export_writer([self.export_instance], export_path)
+        with writer.open([self.export_instance]), gzip.open(store_path, 'wb') as store:
+            pickle.dump({
+                'version': ROW_STORE_VERSION,
+                'config_key': self.config_key,
+                'checkpoint': checkpoint,
+            }, store)
+            for row_number, entry in enumerate(entries):
+                pickle.dump(entry, store)
+                for table, rows in zip(self.tables, entry[2]):
+                    for data, hyperlink_column_indices, skip_excel_formatting in rows:
+                        writer.write(table, ExportRow(
+                            data=[_replace_row_number(value, row_number) for value in data],
+                            hyperlink_column_indices=hyperlink_column_indices,
+                            skip_excel_formatting=skip_excel_formatting,
+                        ))
+                if progress_tracker:
+                    DownloadBase.set_progress(progress_tracker, row_number + 1, total)
+        return ExportFile(writer.path, writer.format)
+
+
+def _entry_sort_key(entry):
+    return entry[0], entry[1]
+
+
+def _sort_on_disk(entries, run_files):
+    """Sort row store entries with an external merge sort
+
+    :param run_files: ``ExitStack`` removing the temporary files of the
+    sorted runs, once the returned entries have been read.
+    :return: ``(iterator of sorted entries, number of entries)``
+    """
+    run_paths = []
+    count = 0
+    for run in chunked(entries, SORT_RUN_SIZE, list):
+        run.sort(key=_entry_sort_key)
+        path = run_files.enter_context(TransientTempfile())
+        with gzip.open(path, 'wb', compresslevel=1) as f:
+            for entry in run:
+                pickle.dump(entry, f)
+        run_paths.append(path)
+        count += len(run)
+    return heapq.merge(*[_iter_pickled(path) for path in run_paths], key=_entry_sort_key), count
+
+
+def _iter_store_entries(path):
+    entries = _iter_pickled(path)
+    next(entries)  # header
+    yield from entries
+
+
+def _iter_pickled(path):
+    with gzip.open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def _replace_row_number(value, row_number):
+    if isinstance(value, _RowNumber):
+        return row_number
+    if isinstance(value, str) and value.startswith(ROW_NUMBER_TOKEN):
+        return str(row_number) + value[len(ROW_NUMBER_TOKEN):]
+    return value
@@ -26,6 +26,12 @@ class Command(BaseCommand):
             default=multiprocessing.cpu_count() - 1,
             help='Number of parallel processes to run.'
         )
+        parser.add_argument(
+            '--cache-dir',
+            dest='cache_root',
+            help='Cache the raw documents in this directory so that subsequent rebuilds '
+                 'only fetch documents modified since the previous rebuild.'
+        )
 
     def handle(self, **options):
         if __debug__:
@@ -34,7 +40,8 @@ class Command(BaseCommand):
         export_id = options.pop('export_id')
         page_size = options.pop('page_size')
         processes = options.pop('processes')
+        cache_root = options.pop('cache_root')
 
-        rebuild_export_mutiprocess(export_id, processes, page_size)
+        rebuild_export_mutiprocess(export_id, processes, page_size, cache_root)
 
         self.stdout.write(self.style.SUCCESS('Rebuild Complete'))
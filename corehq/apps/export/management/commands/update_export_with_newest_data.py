@@ -91,7 +91,8 @@ def get_last_run_meta(export_instance, export_archive_path):
     if last_page_path:
         folder, filename = last_page_path.rsplit('/', 1)
         matcher = re.match(r'(\d+)_.*', filename)
-        last_page_number = int(matcher.group(1))
+        # pages of CSV exports are concatenated into a single unnumbered file
+        last_page_number = int(matcher.group(1)) if matcher else 0
     else:
         last_page_number = 0
     last_form_id, date_col_string = _get_column_value_from_last_line(
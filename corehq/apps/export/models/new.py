@@ -412,6 +412,17 @@ class ExportColumn(DocumentSchema):
         else:
             return [self.label]
 
+    def get_column_types(self, split_column=False):
+        """
+        Return the data type of each header returned by get_headers: the
+        datatype of the item, or None where the value is not of that type
+        """
+        headers = self.get_headers(split_column=split_column)
+        if (type(self) is ExportColumn and len(headers) == 1
+                and not self.item.transform and not self.deid_transform):
+            return [self.item.datatype]
+        return [None] * len(headers)
+
     @classmethod
     def wrap(cls, data):
         if cls is ExportColumn:
@@ -484,6 +495,15 @@ class TableConfiguration(DocumentSchema):
             headers.extend(column.get_headers(split_column=split_columns))
         return headers
 
+    def get_column_types(self, split_columns=False):
+        """
+        Return a list of column data types aligned with get_headers
+        """
+        column_types = []
+        for column in self.selected_columns:
+            column_types.extend(column.get_column_types(split_column=split_columns))
+        return column_types
+
     def get_rows(self, document, row_number, split_columns=False,
                  transform_dates=False, as_json=False):
         """
@@ -16,13 +16,19 @@ The export works as follows:
   * Results returned back to the main process
     * Unsuccessful results can be retried
   * Add successful pages to final ZIP archive
+    * For CSV exports each page is written as a headerless part file per
+      table and the parts are concatenated into one file per table
   * Add raw data dumps for unsuccessful pages to final ZIP archive
 """
+import contextlib
+import csv
 import gzip
+import io
 import json
 import logging
 import multiprocessing
 import os
+import shutil
 import tempfile
 import time
 import zipfile
@@ -32,18 +38,21 @@ from datetime import timedelta
 from six.moves.queue import Empty
 
 from couchexport.export import get_writer
+from couchexport.models import Format
 from couchexport.writers import ZippedExportWriter
 
 from corehq.apps.export.dbaccessors import get_properly_wrapped_export_instance
 from corehq.apps.export.export import (
     get_export_documents,
+    get_export_query,
     get_export_size,
     get_export_writer,
     save_export_payload,
     write_export_instance,
 )
+from corehq.apps.export.page_cache import ExportPageCache
 from corehq.elastic import ScanResult
-from corehq.util.files import safe_filename
+from corehq.util.files import TransientTempfile, safe_filename
 
 TEMP_FILE_PREFIX = 'cchq_export_dump_'
 
@@ -67,6 +76,11 @@ class BaseResult(object):
 class SuccessResult(BaseResult):
     success = True
 
+    def __init__(self, page_number, page_path, page_size, table_paths=None):
+        super(SuccessResult, self).__init__(page_number, page_path, page_size)
+        # headerless CSV part file of each table when the page was written as parts
+        self.table_paths = table_paths
+
 
 class RetryResult(BaseResult):
     def __init__(self, page_number, page_path, page_size, retry_count):
@@ -119,19 +133,60 @@ class OutputPaginator(object):
         return RetryResult(self.page, self.path, self.page_size, 0)
 
 
-def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000):
+def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000, cache_root=None):
+    """
+    :param cache_root: Optional directory for an ``ExportPageCache``. When
+    given, only documents changed since the previous rebuild using the same
+    cache are fetched from Elasticsearch.
+    """
     assert num_processes > 0
 
     export_instance = get_properly_wrapped_export_instance(export_id)
     filters = export_instance.get_filters()
+    if cache_root:
+        run_cached_multiprocess_exporter(export_instance, filters, num_processes, page_size, cache_root)
+        return
+
     total_docs = get_export_size(export_instance, filters)
-    exporter = MultiprocessExporter(export_instance, total_docs, num_processes)
+    exporter = MultiprocessExporter(
+        export_instance, total_docs, num_processes, table_parts=can_write_table_parts(export_instance)
+    )
     paginator = OutputPaginator(export_id)
 
     logger.info('Starting data dump of {} docs'.format(total_docs))
     run_multiprocess_exporter(exporter, filters, paginator, page_size)
 
 
+def run_cached_multiprocess_exporter(export_instance, filters, num_processes, page_size, cache_root):
+    cache = ExportPageCache(cache_root, get_export_query(export_instance, filters), page_size)
+    logger.info('Refreshing cached export pages in %s', cache.path)
+    pages = cache.refresh()
+    total_docs = sum(count for _, count in pages)
+    logger.info('Cached export pages refreshed: {} docs in {} pages'.format(total_docs, len(pages)))
+
+    exporter = MultiprocessExporter(
+        export_instance, total_docs, num_processes, table_parts=can_write_table_parts(export_instance)
+    )
+    with exporter:
+        for page_number, (path, count) in enumerate(pages):
+            # pages are removed once processed so give each worker its own copy
+            exporter.process_page(RetryResult(page_number, _link_to_temp_file(path), count, 0))
+
+    exporter.wait_till_completion()
+
+
+def _link_to_temp_file(path):
+    fd, temp_path = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX)
+    os.close(fd)
+    os.remove(temp_path)
+    try:
+        os.link(path, temp_path)
+    except OSError:
+        # not on the same file system
+        shutil.copyfile(path, temp_path)
+    return temp_path
+
+
 def run_multiprocess_exporter(exporter, filters, paginator, page_size):
     def _log_page_dumped(paginator):
         logger.info('  Dump page {} complete: {} docs'.format(paginator.page, paginator.page_size))
@@ -150,7 +205,14 @@ def run_multiprocess_exporter(exporter, filters, paginator, page_size):
     exporter.wait_till_completion()
 
 
-def run_export_with_logging(export_instance, page_number, dump_path, doc_count, attempts):
+def can_write_table_parts(export_instance):
+    """Whether pages of the export can be written as table part files
+    that are concatenated into the final archive"""
+    return export_instance.export_format == Format.CSV
+
+
+def run_export_with_logging(export_instance, page_number, dump_path, doc_count, attempts, table_parts=False,
+                            row_offset=0):
     """Log any exceptions here since logging on the other side of the process queue
     won't show the traceback
     """
@@ -159,7 +221,9 @@ def run_export_with_logging(export_instance, page_number, dump_path, doc_count,
     update_frequency = min(1000, int(doc_count // 10) or 1)
     progress_tracker = LoggingProgressTracker(page_number, progress_queue, update_frequency)
     try:
-        result = run_export(export_instance, page_number, dump_path, doc_count, progress_tracker)
+        result = run_export(
+            export_instance, page_number, dump_path, doc_count, progress_tracker, table_parts, row_offset
+        )
         if progress_queue:
             # just to make sure we set progress to 100%
             progress_queue.put(ProgressValue(page_number, doc_count, doc_count))
@@ -170,9 +234,17 @@ def run_export_with_logging(export_instance, page_number, dump_path, doc_count,
         raise
 
 
-def run_export(export_instance, page_number, dump_path, doc_count, progress_tracker=None):
+def run_export(export_instance, page_number, dump_path, doc_count, progress_tracker=None, table_parts=False,
+               row_offset=0):
+    """
+    :param row_offset: Row number of the first document of the page, so that
+    the row numbers of all pages follow on from each other
+    """
     docs = _get_export_documents_from_file(dump_path, doc_count)
-    export_file_path = _get_export_file_path(export_instance, docs, progress_tracker)
+    if table_parts:
+        table_paths = _write_table_parts(export_instance, docs, progress_tracker, row_offset)
+        return SuccessResult(page_number, None, doc_count, table_paths=table_paths)
+    export_file_path = _get_export_file_path(export_instance, docs, progress_tracker, row_offset)
     return SuccessResult(page_number, export_file_path, doc_count)
 
 
@@ -187,7 +259,7 @@ def _get_export_documents_from_file(dump_path, doc_count):
     return ScanResult(doc_count, _doc_iter())
 
 
-def _get_export_file_path(export_instance, docs, progress_tracker=None):
+def _get_export_file_path(export_instance, docs, progress_tracker=None, row_offset=0):
     export_instances = [export_instance]
     # Multiprocess exports sometimes intentionally keep the tempfile,
     # so TransientTempfile isn't appropriate here
@@ -195,10 +267,59 @@ def _get_export_file_path(export_instance, docs, progress_tracker=None):
     os.close(fd)
     writer = get_export_writer(export_instances, temp_path, allow_pagination=False)
     with writer.open(export_instances):
-        write_export_instance(writer, export_instance, docs, progress_tracker)
+        write_export_instance(writer, export_instance, docs, progress_tracker, row_offset)
         return writer.path
 
 
+def _write_table_parts(export_instance, docs, progress_tracker=None, row_offset=0):
+    writer = _TablePartsWriter(export_instance)
+    with writer.open():
+        write_export_instance(writer, export_instance, docs, progress_tracker, row_offset)
+    return writer.paths
+
+
+class _TablePartsWriter(object):
+    """Writes the rows of each table to a CSV file without a header
+
+    Rows are written exactly as ``CsvExportWriter`` writes them so the
+    parts of all pages can be appended to the header of the table.
+    Implements the part of the ``_ExportWriter`` interface used by
+    ``write_export_instance``.
+    """
+    format = Format.CSV
+
+    def __init__(self, export_instance):
+        self.tables = export_instance.selected_tables
+        # table index -> part file path
+        self.paths = []
+        self._csv_writers = {}
+
+    @contextlib.contextmanager
+    def open(self):
+        with contextlib.ExitStack() as stack:
+            for table in self.tables:
+                fd, path = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX)
+                self.paths.append(path)
+                part = stack.enter_context(io.open(fd, 'w', encoding='utf-8', newline=''))
+                self._csv_writers[table] = csv.writer(part, csv.excel)
+            yield
+
+    def write_rows(self, table, rows):
+        self._csv_writers[table].writerows(
+            [_get_csv_value(value) for value in row.data]
+            for row in rows
+        )
+
+
+def _get_csv_value(value):
+    # same as OnDiskExportWriter and CsvFileWriter combined
+    if value is None:
+        return ''
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
 class LoggingProgressTracker(object):
     """Ducktyped class that mimics the interface of a celery task
     to keep track of export progress
@@ -227,11 +348,23 @@ class LoggingProgressTracker(object):
 class MultiprocessExporter(object):
     """Helper class to manage multi-process exporting"""
 
-    def __init__(self, export_instance, total_docs, num_processes, existing_archive_path=None, keep_file=False):
+    def __init__(self, export_instance, total_docs, num_processes, existing_archive_path=None, keep_file=False,
+                 table_parts=False):
+        """
+        :param table_parts: Write each page as headerless CSV part files that
+        are concatenated into a single file per table in the final archive.
+        Only valid for CSV exports. See ``can_write_table_parts``.
+        """
+        assert not table_parts or can_write_table_parts(export_instance), export_instance.export_format
+        assert not (table_parts and existing_archive_path), "can't append table parts to an existing archive"
         self.keep_file = keep_file
+        self.table_parts = table_parts
         self.export_instance = export_instance
         self.existing_archive_path = existing_archive_path
         self.results = []
+        # page number -> row number of the first document of the page
+        self.row_offsets = {}
+        self.next_row_offset = 0
         self.progress_queue = multiprocessing.Queue()
         self.progress = multiprocessing.Process(target=_output_progress, args=(self.progress_queue, total_docs))
 
@@ -268,10 +401,19 @@ class MultiprocessExporter(object):
                            - page: page number (int)
                            - path: path to raw data dump
                            - page_size: number of docs in raw data dump
+
+        Pages must first be processed in page order for the row numbers of
+        each page to follow on from those of the previous page.
         """
         attempts = page_info.retry_count + 1
+        if page_info.page not in self.row_offsets:
+            self.row_offsets[page_info.page] = self.next_row_offset
+            self.next_row_offset += page_info.page_size
         self.progress_queue.put(ProgressValue(page_info.page, 0, page_info.page_size))
-        args = self.export_instance, page_info.page, page_info.path, page_info.page_size, attempts
+        args = (
+            self.export_instance, page_info.page, page_info.path, page_info.page_size, attempts, self.table_parts,
+            self.row_offsets[page_info.page]
+        )
         result = self.pool.apply_async(self.export_function, args=args)
         self.results.append(QueuedResult(result, page_info.page, page_info.path, page_info.page_size, attempts))
 
@@ -346,6 +488,7 @@ class MultiprocessExporter(object):
         final_zip = self._get_zipfile_for_final_archive()
         with final_zip:
             pages = len(export_results)
+            successful_results = []
             for result in export_results:
                 if not result.success:
                     logger.error('  Error in page %s so not added to final output', result.page)
@@ -357,12 +500,19 @@ class MultiprocessExporter(object):
                         os.remove(raw_dump_path)
                     continue
 
+                if result.table_paths is not None:
+                    successful_results.append(result)
+                    continue
+
                 logger.info('  Adding page {} of {} to final file'.format(result.page, pages))
                 if self.is_zip:
                     _add_compressed_page_to_zip(final_zip, result.page, result.path)
                 else:
                     final_zip.write(result.path, '{}_{}'.format(base_name, result.page))
 
+            if successful_results:
+                _add_table_parts_to_zip(final_zip, self.export_instance, successful_results)
+
         return final_zip.filename
 
     def upload(self, final_path):
@@ -373,6 +523,28 @@ class MultiprocessExporter(object):
             os.remove(final_path)
 
 
+def _add_table_parts_to_zip(final_zip, export_instance, export_results):
+    """Write one file per table: the header followed by the part file
+    of each page, in page order"""
+    export_results = sorted(export_results, key=lambda result: result.page)
+    with TransientTempfile() as headers_path:
+        # an export without rows has the header (and file name) of each table
+        writer = get_export_writer([export_instance], headers_path, allow_pagination=False)
+        with writer.open([export_instance]):
+            pass
+        with zipfile.ZipFile(headers_path) as headers_zip:
+            for table_index, name in enumerate(headers_zip.namelist()):
+                logger.info('  Adding {} pages of {} to final file'.format(len(export_results), name))
+                with final_zip.open(name, 'w', force_zip64=True) as table_file:
+                    with headers_zip.open(name) as header:
+                        shutil.copyfileobj(header, table_file)
+                    for result in export_results:
+                        part_path = result.table_paths[table_index]
+                        with open(part_path, 'rb') as part:
+                            shutil.copyfileobj(part, table_file)
+                        os.remove(part_path)
+
+
 def _add_compressed_page_to_zip(zip_file, page_number, zip_path_to_add):
     with zipfile.ZipFile(zip_path_to_add, 'r') as page_file:
         for path in page_file.namelist():
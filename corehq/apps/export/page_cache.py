@@ -0,0 +1,172 @@
+"""
+On-disk cache of the raw documents an export is built from.
+
+Rebuilding a large export is dominated by fetching every document from
+Elasticsearch. The cache stores the documents of the last rebuild as
+gzipped pages of JSON lines (the same format the multiprocess exporter
+dumps) along with a watermark: the time the documents were fetched.
+
+On the next rebuild only the ids matching the export query are scrolled.
+Documents modified since the watermark, and documents that are new to the
+query, are fetched from Elasticsearch; every other document is read back
+from the cached pages. Documents that no longer match the query are
+dropped.
+
+Pages are written in cache order, not in the sort order of the export
+query, so rows for documents modified since the previous rebuild come
+last.
+
+The cache is keyed by the export query (including its filters) and the
+index it runs against, so changing the filters starts a new cache.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+
+from corehq.apps.es.filters import date_range
+from corehq.elastic import iter_es_docs
+
+MODIFIED_ON_FIELD = 'server_modified_on'
+
+# Documents saved shortly before a rebuild may not be searchable yet, so
+# the watermark is moved back by this much to pick them up next time.
+WATERMARK_LAG = timedelta(minutes=15)
+
+MANIFEST_NAME = 'manifest.json'
+WATERMARK_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def get_query_cache_key(query):
+    raw = json.dumps({'index': query.index, 'query': query.raw_query}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ExportPageCache(object):
+    """Raw document page cache for a single export query
+
+    :param cache_root: Directory containing the caches of all queries.
+    :param query: The ``ESQuery`` used to fetch the export's documents.
+    :param page_size: Maximum number of documents per page.
+    """
+
+    def __init__(self, cache_root, query, page_size=100000):
+        self.query = query
+        self.page_size = page_size
+        self.path = os.path.join(cache_root, get_query_cache_key(query))
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.path, MANIFEST_NAME)
+
+    def get_manifest(self):
+        """
+        :return: dict with ``watermark`` and ``pages`` (list of
+        ``[filename, doc_count]``), or ``None`` if nothing is cached.
+        """
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def get_pages(self):
+        """
+        :return: list of ``(path, doc_count)`` tuples for the cached pages.
+        """
+        manifest = self.get_manifest()
+        if manifest is None:
+            return []
+        return [
+            (os.path.join(self.path, manifest['version'], filename), count)
+            for filename, count in manifest['pages']
+        ]
+
+    def refresh(self):
+        """Bring the cached pages up to date with Elasticsearch
+
+        :return: same as ``get_pages``.
+        """
+        manifest = self.get_manifest()
+        watermark = datetime.utcnow() - WATERMARK_LAG
+        current_ids = set(self.query.scroll_ids())
+        if manifest is None:
+            changed_ids = current_ids
+        else:
+            modified_since = datetime.strptime(manifest['watermark'], WATERMARK_FORMAT)
+            changed_ids = set(
+                self.query.filter(date_range(MODIFIED_ON_FIELD, gte=modified_since)).scroll_ids()
+            )
+
+        version = uuid.uuid4().hex
+        writer = _PageWriter(os.path.join(self.path, version), self.page_size)
+        with writer:
+            cached_ids = set()
+            for path, _ in self.get_pages():
+                for doc in _iter_page_docs(path):
+                    doc_id = doc['_id']
+                    if doc_id in current_ids and doc_id not in changed_ids:
+                        cached_ids.add(doc_id)
+                        writer.write(doc)
+            to_fetch = (doc_id for doc_id in current_ids if doc_id not in cached_ids)
+            for doc in iter_es_docs(self.query.index, to_fetch):
+                writer.write(doc)
+
+        self._save_manifest({
+            'version': version,
+            'watermark': watermark.strftime(WATERMARK_FORMAT),
+            'pages': writer.pages,
+        })
+        if manifest is not None:
+            shutil.rmtree(os.path.join(self.path, manifest['version']), ignore_errors=True)
+        return self.get_pages()
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _save_manifest(self, manifest):
+        temp_path = '{}.{}'.format(self.manifest_path, uuid.uuid4().hex)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self.manifest_path)
+
+
+class _PageWriter(object):
+
+    def __init__(self, path, page_size):
+        self.path = path
+        self.page_size = page_size
+        self.pages = []
+        self.file = None
+
+    def __enter__(self):
+        os.makedirs(self.path)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._close_page()
+        if exc_type is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def write(self, doc):
+        if self.file is None:
+            filename = 'page_{}.json.gz'.format(len(self.pages))
+            self.file = gzip.open(os.path.join(self.path, filename), 'wt', encoding='utf-8')
+            self.pages.append([filename, 0])
+        self.file.write('{}\n'.format(json.dumps(doc)))
+        self.pages[-1][1] += 1
+        if self.pages[-1][1] >= self.page_size:
+            self._close_page()
+
+    def _close_page(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def _iter_page_docs(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
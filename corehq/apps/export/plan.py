@@ -0,0 +1,151 @@
+"""
+Compiled row extraction for exports.
+
+``TableConfiguration.get_rows`` resolves every selected column of a table
+for every document: it rebuilds the list of selected columns and hyperlink
+indices, and each column walks the document from the root along its own
+path. For exports with hundreds of columns that is most of the time spent
+computing rows.
+
+An ``ExportPlan`` does that work once per export instance. The paths of
+plain ``ExportColumn`` columns (the vast majority) are merged into a tree
+so columns with a common prefix share the traversal, and each document is
+walked once per table. Other column types still use their own
+``get_value``.
+
+The rows produced are identical to those of ``TableConfiguration.get_rows``.
+"""
+from corehq.apps.export.models.new import (
+    ExportColumn,
+    ExportRow,
+    RowNumberColumn,
+)
+
+
+class ExportPlan(object):
+    """Row extraction compiled for the selected tables of an ExportInstance"""
+
+    def __init__(self, export_instance):
+        self.tables = [
+            TablePlan(
+                table,
+                split_columns=export_instance.split_multiselects,
+                transform_dates=export_instance.transform_dates,
+            )
+            for table in export_instance.selected_tables
+        ]
+
+
+class TablePlan(object):
+    """Row extraction compiled for a single TableConfiguration"""
+
+    def __init__(self, table, split_columns=False, transform_dates=False):
+        self.table = table
+        self.split_columns = split_columns
+        self.transform_dates = transform_dates
+        self.columns = table.selected_columns
+        self.hyperlink_column_indices = table.get_hyperlink_column_indices(split_columns)
+        self.row_number_columns = [isinstance(col, RowNumberColumn) for col in self.columns]
+        self.accessors = _AccessorNode()
+        self.compiled_columns = []
+        for index, column in enumerate(self.columns):
+            path = _get_compiled_path(column, table.path)
+            if path is not None:
+                self.accessors.add(path, index)
+                self.compiled_columns.append(index)
+        self.compiled_column_set = set(self.compiled_columns)
+
+    def get_rows(self, document, row_number):
+        """Same as ``TableConfiguration.get_rows`` with ``as_json=False``"""
+        document_id = document.get('_id')
+
+        sub_documents = self.table._get_sub_documents(document, row_number, document_id=document_id)
+
+        domain = document.get('domain')
+
+        assert domain is not None, 'Form or Case must be associated with domain'
+        assert document_id is not None, 'Form or Case must have an id'
+
+        rows = []
+        for doc, row_index in sub_documents:
+            row_data = []
+            skip_excel_formatting = []
+            for val, is_row_number in zip(
+                self._get_values(domain, document_id, doc, row_index),
+                self.row_number_columns,
+            ):
+                col_index = len(row_data)
+                if isinstance(val, list):
+                    row_data.extend(val)
+                else:
+                    row_data.append(val)
+                # we never want to auto-format RowNumberColumn
+                # (always treat as text)
+                if is_row_number:
+                    skip_excel_formatting.extend(range(col_index, len(row_data)))
+            rows.append(ExportRow(
+                data=row_data,
+                hyperlink_column_indices=self.hyperlink_column_indices,
+                skip_excel_formatting=skip_excel_formatting,
+            ))
+        return rows
+
+    def _get_values(self, domain, document_id, doc, row_index):
+        raw_values = {}
+        if isinstance(doc, dict):
+            self.accessors.collect(doc, raw_values)
+        values = []
+        for index, column in enumerate(self.columns):
+            if index in self.compiled_column_set:
+                values.append(column._transform(raw_values.get(index), doc, self.transform_dates))
+            else:
+                values.append(column.get_value(
+                    domain,
+                    document_id,
+                    doc,
+                    self.table.path,
+                    row_index=row_index,
+                    split_column=self.split_columns,
+                    transform_dates=self.transform_dates,
+                ))
+        return values
+
+
+class _AccessorNode(object):
+    """Node in the tree of column paths relative to a table's documents"""
+    __slots__ = ('column_indices', 'children')
+
+    def __init__(self):
+        self.column_indices = []
+        self.children = {}
+
+    def add(self, path, column_index):
+        node = self
+        for name in path:
+            node = node.children.setdefault(name, _AccessorNode())
+        node.column_indices.append(column_index)
+
+    def collect(self, value, raw_values):
+        # Mirrors NestedDictGetter: only dicts can be descended into and
+        # missing keys resolve to None (the default for absent entries).
+        for name, child in self.children.items():
+            if name in value:
+                child_value = value[name]
+                for index in child.column_indices:
+                    raw_values[index] = child_value
+                if child.children and isinstance(child_value, dict):
+                    child.collect(child_value, raw_values)
+
+
+def _get_compiled_path(column, base_path):
+    """
+    :return: list of names from the table's documents to the column's
+    value, or ``None`` if the column must be resolved by its ``get_value``.
+    """
+    if type(column) is not ExportColumn:
+        return None
+    if base_path != column.item.path[:len(base_path)]:
+        # let get_value raise when the column is used
+        return None
+    path = [node.name for node in column.item.path[len(base_path):]]
+    return path or None
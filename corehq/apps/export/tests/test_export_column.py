@@ -198,6 +198,30 @@ class StockExportColumnTest(SimpleTestCase):
             self.assertEqual(headers, ['water (123)', 'water (abc)'])
 
 
+class TestExportColumnTypes(SimpleTestCase):
+
+    def test_item_datatype(self):
+        column = ExportColumn(item=ExportItem(path=[PathNode(name='form'), PathNode(name='dob')], datatype='date'))
+        self.assertEqual(column.get_column_types(), ['date'])
+
+    def test_transformed_value_is_untyped(self):
+        column = ExportColumn(
+            item=ExportItem(path=[PathNode(name='form'), PathNode(name='dob')], datatype='date'),
+            deid_transform='deid_date',
+        )
+        self.assertEqual(column.get_column_types(), [None])
+
+    def test_split_column(self):
+        column = SplitExportColumn(
+            label='mc',
+            item=MultipleChoiceItem(
+                path=[PathNode(name='form'), PathNode(name='mc')],
+                options=[Option(value='a'), Option(value='b')],
+            ),
+        )
+        self.assertEqual(column.get_column_types(split_column=True), [None, None, None])
+
+
 class TestRowNumberColumn(SimpleTestCase):
 
     def test_get_headers(self):
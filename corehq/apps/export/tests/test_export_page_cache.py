@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from corehq.apps.export.page_cache import ExportPageCache, _iter_page_docs
+
+
+class FakeQuery(object):
+    index = 'forms'
+
+    def __init__(self, docs, modified_ids=None, filters=None):
+        self.docs = docs
+        self.modified_ids = modified_ids or []
+        self.filters = filters or []
+
+    @property
+    def raw_query(self):
+        return {'query': 'test', 'filters': self.filters}
+
+    def filter(self, filter):
+        return FakeQuery(self.docs, self.modified_ids, self.filters + [filter])
+
+    def scroll_ids(self):
+        if self.filters:
+            return iter(self.modified_ids)
+        return iter(self.docs)
+
+
+class TestExportPageCache(SimpleTestCase):
+
+    def setUp(self):
+        self.cache_root = tempfile.mkdtemp()
+        self.fetched = []
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_root)
+
+    def _refresh(self, query):
+        def iter_es_docs(index, ids):
+            for doc_id in ids:
+                self.fetched.append(doc_id)
+                yield query.docs[doc_id]
+
+        with patch('corehq.apps.export.page_cache.iter_es_docs', iter_es_docs):
+            pages = ExportPageCache(self.cache_root, query, page_size=2).refresh()
+        return {
+            doc['_id']: doc
+            for path, _ in pages
+            for doc in _iter_page_docs(path)
+        }
+
+    def test_first_refresh_fetches_all(self):
+        docs = {'a': {'_id': 'a'}, 'b': {'_id': 'b'}, 'c': {'_id': 'c'}}
+        self.assertEqual(self._refresh(FakeQuery(docs)), docs)
+        self.assertEqual(sorted(self.fetched), ['a', 'b', 'c'])
+
+    def test_refresh_only_fetches_changed_docs(self):
+        self._refresh(FakeQuery({'a': {'_id': 'a'}, 'b': {'_id': 'b'}, 'c': {'_id': 'c', 'v': 1}}))
+        self.fetched = []
+
+        docs = {'b': {'_id': 'b'}, 'c': {'_id': 'c', 'v': 2}, 'd': {'_id': 'd'}}
+        cached = self._refresh(FakeQuery(docs, modified_ids=['c']))
+        self.assertEqual(cached, docs)
+        self.assertEqual(sorted(self.fetched), ['c', 'd'])
+
+    def test_page_size(self):
+        docs = {str(n): {'_id': str(n)} for n in range(5)}
+        query = FakeQuery(docs)
+        with patch('corehq.apps.export.page_cache.iter_es_docs',
+                   lambda index, ids: (docs[doc_id] for doc_id in ids)):
+            pages = ExportPageCache(self.cache_root, query, page_size=2).refresh()
+        self.assertEqual([count for _, count in pages], [2, 2, 1])
+
+    def test_cache_key_includes_filters(self):
+        query = FakeQuery({})
+        other = query.filter({'term': {'xmlns': 'other'}})
+        self.assertNotEqual(
+            ExportPageCache(self.cache_root, query).path,
+            ExportPageCache(self.cache_root, other).path,
+        )
+        self.assertEqual(
+            ExportPageCache(self.cache_root, query).path,
+            ExportPageCache(self.cache_root, FakeQuery({})).path,
+        )
@@ -0,0 +1,101 @@
+from django.test import SimpleTestCase
+
+from corehq.apps.export.const import CASE_ID_TO_LINK
+from corehq.apps.export.models import (
+    MAIN_TABLE,
+    ExportColumn,
+    MultipleChoiceItem,
+    Option,
+    PathNode,
+    RowNumberColumn,
+    ScalarItem,
+    SplitExportColumn,
+    TableConfiguration,
+)
+from corehq.apps.export.plan import TablePlan
+
+
+def _column(*path, **kwargs):
+    return ExportColumn(
+        item=ScalarItem(path=[PathNode(name=name, is_repeat=name.startswith('repeat')) for name in path],
+                        **kwargs),
+        selected=True,
+    )
+
+
+class TablePlanTest(SimpleTestCase):
+    doc = {
+        '_id': 'form-1',
+        'domain': 'my-domain',
+        'received_on': '2020-01-01T10:00:00.000000Z',
+        'form': {
+            'q1': 'foo',
+            'group': {'q2': 'bar', 'q3': {'#text': 'baz', '@id': 'x'}, 'q4': {'a': 'b'}},
+            'mc': 'one three',
+            'case': {'@case_id': 'case-1'},
+            'list': ['a', 'b'],
+            'repeat': [
+                {'q5': 'r1', 'nested': {'q6': 'n1'}},
+                {'q5': 'r2', 'nested': 'not a dict'},
+                'not a dict',
+            ],
+        },
+    }
+
+    def _assert_same_rows(self, table, split_columns=False, transform_dates=False):
+        expected = table.get_rows(
+            self.doc, 3, split_columns=split_columns, transform_dates=transform_dates)
+        actual = TablePlan(
+            table, split_columns=split_columns, transform_dates=transform_dates
+        ).get_rows(self.doc, 3)
+        self.assertEqual(
+            [(row.data, row.hyperlink_column_indices, row.skip_excel_formatting) for row in actual],
+            [(row.data, row.hyperlink_column_indices, row.skip_excel_formatting) for row in expected],
+        )
+        return actual
+
+    def _main_table(self):
+        return TableConfiguration(
+            path=MAIN_TABLE,
+            columns=[
+                RowNumberColumn(selected=True),
+                _column('form', 'q1'),
+                _column('form', 'group', 'q2'),
+                _column('form', 'group', 'q3'),
+                _column('form', 'group', 'q4'),
+                _column('form', 'group', 'missing'),
+                _column('form', 'q1', 'not_a_dict'),
+                _column('form', 'list'),
+                _column('form', 'case', '@case_id', transform=CASE_ID_TO_LINK),
+                _column('received_on'),
+                ExportColumn(item=ScalarItem(path=[PathNode(name='form'), PathNode(name='q1')])),
+                SplitExportColumn(
+                    label='mc',
+                    item=MultipleChoiceItem(
+                        path=[PathNode(name='form'), PathNode(name='mc')],
+                        options=[Option(value='one'), Option(value='two')],
+                    ),
+                    selected=True,
+                ),
+                _column('form', 'q1'),
+            ]
+        )
+
+    def test_main_table(self):
+        rows = self._assert_same_rows(self._main_table())
+        self.assertEqual(rows[0].data[:3], ['3', 'foo', 'bar'])
+
+    def test_split_columns_and_transform_dates(self):
+        self._assert_same_rows(self._main_table(), split_columns=True, transform_dates=True)
+
+    def test_repeat_table(self):
+        table = TableConfiguration(
+            path=[PathNode(name='form'), PathNode(name='repeat', is_repeat=True)],
+            columns=[
+                RowNumberColumn(selected=True, repeat=1),
+                _column('form', 'repeat', 'q5'),
+                _column('form', 'repeat', 'nested', 'q6'),
+            ]
+        )
+        rows = self._assert_same_rows(table)
+        self.assertEqual(len(rows), 3)
@@ -0,0 +1,171 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from couchexport.models import Format
+
+from corehq.apps.export.export import (
+    ExportFile,
+    get_export_writer,
+    write_export_instance,
+)
+from corehq.apps.export.incremental import _IncrementalExportBuilder
+from corehq.apps.export.models import (
+    MAIN_TABLE,
+    ExportColumn,
+    FormExportInstance,
+    PathNode,
+    RowNumberColumn,
+    ScalarItem,
+    TableConfiguration,
+)
+from corehq.apps.export.tests.test_export_page_cache import FakeQuery
+from corehq.elastic import ScanResult
+from corehq.util.files import TransientTempfile
+
+
+def _form(form_id, received_on, q1, repeat=()):
+    return {
+        '_id': form_id,
+        'domain': 'my-domain',
+        'received_on': received_on,
+        'form': {'q1': q1, 'repeat': [{'q2': value} for value in repeat]},
+    }
+
+
+class TestIncrementalExport(SimpleTestCase):
+
+    def setUp(self):
+        self.export_instance = FormExportInstance(
+            export_format=Format.JSON,
+            tables=[
+                TableConfiguration(
+                    label="Forms",
+                    selected=True,
+                    path=MAIN_TABLE,
+                    columns=[
+                        RowNumberColumn(label="number", selected=True),
+                        ExportColumn(
+                            label="Q1",
+                            item=ScalarItem(path=[PathNode(name='form'), PathNode(name='q1')]),
+                            selected=True,
+                        ),
+                    ],
+                ),
+                TableConfiguration(
+                    label="Repeat",
+                    selected=True,
+                    path=[PathNode(name='form'), PathNode(name='repeat', is_repeat=True)],
+                    columns=[
+                        RowNumberColumn(label="number", repeat=1, selected=True),
+                        ExportColumn(
+                            label="Q2",
+                            item=ScalarItem(path=[
+                                PathNode(name='form'),
+                                PathNode(name='repeat', is_repeat=True),
+                                PathNode(name='q2'),
+                            ]),
+                            selected=True,
+                        ),
+                    ],
+                ),
+            ],
+        )
+        self.store_dir = tempfile.mkdtemp()
+        self.previous_path = None
+        self.fetched = []
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir)
+
+    def _build_incrementally(self, query):
+        def iter_es_docs(index, ids):
+            for doc_id in ids:
+                self.fetched.append(doc_id)
+                yield query.docs[doc_id]
+
+        def iter_es_docs_from_query(query):
+            return ScanResult(len(query.docs), iter_es_docs(query.index, list(query.scroll_ids())))
+
+        store_path = os.path.join(self.store_dir, 'rows_{}'.format(len(os.listdir(self.store_dir))))
+        with TransientTempfile() as export_path, \
+                patch('corehq.apps.export.incremental.iter_es_docs', iter_es_docs), \
+                patch('corehq.apps.export.incremental.iter_es_docs_from_query', iter_es_docs_from_query):
+            builder = _IncrementalExportBuilder(self.export_instance, query)
+            _, export_file = builder.build(self.previous_path, store_path, export_path)
+            with export_file as export:
+                result = json.loads(export.read())
+        self.previous_path = store_path
+        return result
+
+    def _build_fully(self, query):
+        docs = sorted(query.docs.values(), key=lambda doc: doc['received_on'])
+        with TransientTempfile() as temp_path:
+            writer = get_export_writer([self.export_instance], temp_path)
+            with writer.open([self.export_instance]):
+                write_export_instance(writer, self.export_instance, docs)
+            with ExportFile(writer.path, writer.format) as export:
+                return json.loads(export.read())
+
+    def _assert_matches_full_build(self, query):
+        with patch('corehq.apps.export.models.FormExportInstance.save'):
+            self.assertEqual(self._build_incrementally(query), self._build_fully(query))
+
+    def test_first_build(self):
+        query = FakeQuery({
+            'a': _form('a', '2020-01-02T00:00:00', 'apple', ['x', 'y']),
+            'b': _form('b', '2020-01-01T00:00:00', 'banana'),
+        })
+        self._assert_matches_full_build(query)
+        self.assertEqual(sorted(self.fetched), ['a', 'b'])
+
+    def test_only_changed_docs_are_recomputed(self):
+        self._assert_matches_full_build(FakeQuery({
+            'a': _form('a', '2020-01-02T00:00:00', 'apple', ['x', 'y']),
+            'b': _form('b', '2020-01-01T00:00:00', 'banana'),
+            'c': _form('c', '2020-01-03T00:00:00', 'cherry', ['z']),
+        }))
+        self.fetched = []
+
+        query = FakeQuery({
+            'a': _form('a', '2020-01-02T00:00:00', 'apple', ['x', 'y']),
+            'c': _form('c', '2020-01-03T00:00:00', 'cranberry', ['z', 'w']),
+            'd': _form('d', '2019-12-31T00:00:00', 'date', ['v']),
+        }, modified_ids=['c'])
+        self._assert_matches_full_build(query)
+        self.assertEqual(sorted(self.fetched), ['c', 'd'])
+
+    def test_config_change_recomputes_all(self):
+        docs = {
+            'a': _form('a', '2020-01-02T00:00:00', 'apple'),
+            'b': _form('b', '2020-01-01T00:00:00', 'banana'),
+        }
+        self._assert_matches_full_build(FakeQuery(docs))
+        self.fetched = []
+
+        self.export_instance.tables[1].selected = False
+        self._assert_matches_full_build(FakeQuery(docs))
+        self.assertEqual(sorted(self.fetched), ['a', 'b'])
+
+    @patch('corehq.apps.export.incremental.SORT_RUN_SIZE', 2)
+    def test_too_many_changes_recomputes_all(self):
+        docs = {
+            'a': _form('a', '2020-01-02T00:00:00', 'apple', ['x']),
+            'b': _form('b', '2020-01-01T00:00:00', 'banana'),
+            'c': _form('c', '2020-01-03T00:00:00', 'cherry', ['z']),
+        }
+        self._assert_matches_full_build(FakeQuery(docs))
+        self.fetched = []
+
+        docs['b'] = _form('b', '2020-01-01T00:00:00', 'blueberry', ['y'])
+        docs['c'] = _form('c', '2020-01-03T00:00:00', 'cranberry')
+        docs['d'] = _form('d', '2020-01-01T00:00:00', 'date')
+        docs['e'] = _form('e', '2019-12-31T00:00:00', 'elderberry', ['v', 'w'])
+        with patch('corehq.apps.export.incremental.MAX_INCREMENTAL_DOCS', 2):
+            self._assert_matches_full_build(FakeQuery(docs, modified_ids=['b', 'c']))
+        self.assertEqual(sorted(self.fetched), ['a', 'b', 'c', 'd', 'e'])
@@ -0,0 +1,115 @@
+import zipfile
+
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from couchexport.models import Format
+
+from corehq.apps.export.export import get_export_file
+from corehq.apps.export.models import (
+    MAIN_TABLE,
+    ExportColumn,
+    FormExportInstance,
+    PathNode,
+    RowNumberColumn,
+    ScalarItem,
+    TableConfiguration,
+)
+from corehq.apps.export.multiprocess import (
+    SuccessResult,
+    _add_table_parts_to_zip,
+    _write_table_parts,
+)
+from corehq.elastic import ScanResult
+from corehq.util.files import TransientTempfile
+
+
+def _form(form_id, q1, repeat=()):
+    return {
+        '_id': form_id,
+        'domain': 'my-domain',
+        'form': {'q1': q1, 'repeat': [{'q2': value} for value in repeat]},
+    }
+
+
+@patch('corehq.apps.export.export._record_export_duration', new=lambda duration, export: None)
+class TestTablePartsExport(SimpleTestCase):
+
+    def setUp(self):
+        self.export_instance = FormExportInstance(
+            name='My export',
+            export_format=Format.CSV,
+            tables=[
+                TableConfiguration(
+                    label="Forms",
+                    selected=True,
+                    path=MAIN_TABLE,
+                    columns=[
+                        ExportColumn(
+                            label="Q1",
+                            item=ScalarItem(path=[PathNode(name='form'), PathNode(name='q1')]),
+                            selected=True,
+                        ),
+                    ],
+                ),
+                TableConfiguration(
+                    label="Repeat",
+                    selected=True,
+                    path=[PathNode(name='form'), PathNode(name='repeat', is_repeat=True)],
+                    columns=[
+                        ExportColumn(
+                            label="Q2",
+                            item=ScalarItem(path=[
+                                PathNode(name='form'),
+                                PathNode(name='repeat', is_repeat=True),
+                                PathNode(name='q2'),
+                            ]),
+                            selected=True,
+                        ),
+                    ],
+                ),
+            ],
+        )
+
+    def _read_zip(self, path):
+        with zipfile.ZipFile(path) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+
+    def test_concatenated_parts_match_single_export(self):
+        self._test_concatenated_parts_match_single_export([
+            [_form('a', 'foo', ['x', 'y']), _form('b', 'bär, "quoted"')],
+            [_form('c', None, ['z'])],
+        ])
+
+    def test_row_numbers_continue_across_pages(self):
+        main_table, repeat_table = self.export_instance.tables
+        main_table.columns = [RowNumberColumn(label="number", selected=True)] + list(main_table.columns)
+        repeat_table.columns = (
+            [RowNumberColumn(label="number", repeat=1, selected=True)] + list(repeat_table.columns)
+        )
+        self._test_concatenated_parts_match_single_export([
+            [_form('a', 'foo', ['x', 'y']), _form('b', 'bar')],
+            [_form('c', None, ['z']), _form('d', 'baz', ['w', 'v'])],
+            [_form('e', 'qux', ['u'])],
+        ])
+
+    def _test_concatenated_parts_match_single_export(self, pages):
+        all_docs = [doc for docs in pages for doc in docs]
+        with patch('corehq.apps.export.export.get_export_documents',
+                   return_value=ScanResult(len(all_docs), iter(all_docs))), \
+                TransientTempfile() as temp_path:
+            get_export_file([self.export_instance], [], temp_path)
+            expected = self._read_zip(temp_path)
+
+        results = []
+        row_offset = 0
+        for page_number, docs in enumerate(pages):
+            results.append(SuccessResult(page_number, None, len(docs), table_paths=_write_table_parts(
+                self.export_instance, ScanResult(len(docs), iter(docs)), row_offset=row_offset
+            )))
+            row_offset += len(docs)
+        with TransientTempfile() as final_path:
+            with zipfile.ZipFile(final_path, 'w') as final_zip:
+                _add_table_parts_to_zip(final_zip, self.export_instance, reversed(results))
+            self.assertEqual(self._read_zip(final_path), expected)
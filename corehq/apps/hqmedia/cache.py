@@ -72,6 +72,7 @@ class BulkMultimediaStatusCache(BaseMultimediaStatusCache):
         self.matched_files = dict((m.__name__, []) for m in self.allowed_media)
         self.total_files = None
         self.processed_files = None
+        self.phase_timings = []
 
     @property
     def allowed_media(self):
@@ -85,6 +86,7 @@ class BulkMultimediaStatusCache(BaseMultimediaStatusCache):
             'total_files': self.total_files,
             'processed_files': self.processed_files,
             'skipped_files': self.skipped_files,
+            'phase_timings': self.phase_timings,
         })
         return response
 
@@ -109,6 +111,13 @@ class BulkMultimediaStatusCache(BaseMultimediaStatusCache):
             'reason': reason,
         })
 
+    def add_phase_timing(self, phase, duration):
+        """Record how long a phase of processing the upload took, in seconds"""
+        self.phase_timings.append({
+            'phase': phase,
+            'duration': round(duration, 3),
+        })
+
     def add_matched_path(self, media_class, media_info):
         if media_class.__name__ in self.matched_files:
             self.matched_files[media_class.__name__].append(media_info)
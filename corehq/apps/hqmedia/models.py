@@ -137,9 +137,14 @@ class CommCareMultimedia(BlobMixin, SafeSaveDocument):
         return reverse("hqmedia_download", args=[self.doc_type, self._id])
 
     def attach_data(self, data, original_filename=None, username=None, attachment_id=None,
-                    media_meta=None):
+                    media_meta=None, should_save=True):
         """
         This creates the auxmedia attachment with the downloaded data.
+
+        With ``should_save=False`` the doc is not saved. It must then be
+        called within ``atomic_blobs`` or ``bulk_atomic_blobs`` and the
+        caller is responsible for saving the doc in that context, so the
+        attachment is deleted if the doc can't be saved.
         """
         self.last_modified = datetime.utcnow()
 
@@ -147,7 +152,7 @@ class CommCareMultimedia(BlobMixin, SafeSaveDocument):
             attachment_id = self.file_hash
 
         if not self.blobs or attachment_id not in self.blobs:
-            if not getattr(self, '_id'):
+            if should_save and not getattr(self, '_id'):
                 # put_attchment blows away existing data, so make sure an id has been assigned
                 # to this guy before we do it. This is the usual path; remote apps are the exception.
                 self.save()
@@ -166,10 +171,11 @@ class CommCareMultimedia(BlobMixin, SafeSaveDocument):
         if media_meta:
             new_media.media_meta = media_meta
         self.aux_media.append(new_media)
-        self.save()
+        if should_save:
+            self.save()
         return True
 
-    def add_domain(self, domain, owner=None, **kwargs):
+    def add_domain(self, domain, owner=None, should_save=True, **kwargs):
         if len(self.owners) == 0:
             # this is intended to simulate migration--if it happens that a media file somehow gets no more owners
             # (which should be impossible) it will transfer ownership to all copiers... not necessarily a bad thing,
@@ -193,7 +199,8 @@ class CommCareMultimedia(BlobMixin, SafeSaveDocument):
 
         if domain not in self.valid_domains:
             self.valid_domains.append(domain)
-        self.save()
+        if should_save:
+            self.save()
 
     def get_display_file(self, return_type=True):
         if self.attachment_id:
@@ -346,7 +353,8 @@ class CommCareImage(CommCareMultimedia):
     class Config(object):
         search_view = 'hqmedia/image_search'
 
-    def attach_data(self, data, original_filename=None, username=None, attachment_id=None, media_meta=None):
+    def attach_data(self, data, original_filename=None, username=None, attachment_id=None, media_meta=None,
+                    should_save=True):
         image = self.get_image_object(data)
         attachment_id = "%dx%d" % image.size
         attachment_id = "%s-%s.%s" % (self.file_hash, attachment_id, image.format)
@@ -357,7 +365,8 @@ class CommCareImage(CommCareMultimedia):
             "height": image.size[1]
         }
         return super(CommCareImage, self).attach_data(data, original_filename=original_filename, username=username,
-                                                      attachment_id=attachment_id, media_meta=media_meta)
+                                                      attachment_id=attachment_id, media_meta=media_meta,
+                                                      should_save=should_save)
 
     def get_media_info(self, path, is_updated=False, original_path=None):
         info = super(CommCareImage, self).get_media_info(path, is_updated=is_updated, original_path=original_path)
@@ -714,7 +723,7 @@ class FormMediaMixin(MediaMixin):
 
         # Form questions
         try:
-            parsed = self.wrapped_xform()
+            parsed = self.readonly_xform()
             if parsed.exists():
                 self.validate_form()
             else:
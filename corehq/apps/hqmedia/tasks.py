@@ -1,9 +1,15 @@
+import hashlib
 import itertools
 import json
 import os
 import re
+import shutil
 import tempfile
+import time
 import zipfile
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from wsgiref.util import FileWrapper
 
 from django.conf import settings
@@ -11,7 +17,9 @@ from django.utils.translation import ugettext as _
 
 from celery.task import task
 from celery.utils.log import get_task_logger
+from couchdbkit.exceptions import BulkSaveError
 
+from dimagi.utils.chunked import chunked
 from dimagi.utils.logging import notify_exception
 from soil import DownloadBase
 from soil.util import expose_cached_download, expose_file_download
@@ -20,11 +28,32 @@ from corehq import toggles
 from corehq.apps.app_manager.dbaccessors import get_app
 from corehq.apps.hqmedia.cache import BulkMultimediaStatusCache
 from corehq.apps.hqmedia.models import CommCareMultimedia
+from corehq.blobs import CODES, get_blob_db
+from corehq.blobs.exceptions import NotFound
+from corehq.blobs.mixin import bulk_atomic_blobs
+from corehq.util.datadog.gauges import datadog_counter
 from corehq.util.files import file_extention_from_filename
 
 logging = get_task_logger(__name__)
 
-MULTIMEDIA_EXTENSIONS = ('.mp3', '.wav', '.jpg', '.png', '.gif', '.3gp', '.mp4', '.zip', )
+# already compressed (or not worth compressing) media, stored without compression
+MULTIMEDIA_EXTENSIONS = ('.mp3', '.wav', '.jpg', '.jpeg', '.png', '.gif', '.3gp', '.mp4', '.m4a', '.ogg',
+                         '.webm', '.zip', )
+
+# number of multimedia files fetched concurrently (and held in memory) while building a CCZ
+CCZ_MEDIA_PREFETCH_WORKERS = 8
+
+# minutes to keep built CCZs of released builds
+CCZ_CACHE_TIMEOUT = 24 * 60
+
+# number of threads reading, hashing and classifying the files of a bulk upload zip
+BULK_UPLOAD_WORKERS = 8
+
+# number of multimedia docs looked up or saved per request while processing a bulk upload zip
+BULK_UPLOAD_BATCH_SIZE = 100
+
+ZipMember = namedtuple('ZipMember', 'path file_hash media_class mime_type read_error')
+ZipMemberMatch = namedtuple('ZipMemberMatch', 'member form_path')
 
 
 @task(serializer='pickle')
@@ -32,6 +61,10 @@ def process_bulk_upload_zip(processing_id, domain, app_id, username=None, share_
                             license_name=None, author=None, attribution_notes=None):
     """
         Responsible for processing the uploaded zip from Bulk Upload.
+
+        Files are read, hashed and classified in parallel threads, existing
+        multimedia is looked up by hash in bulk, and multimedia docs are
+        saved in batches. The duration of each phase is reported in the status.
     """
 
     status = BulkMultimediaStatusCache.get(processing_id)
@@ -51,67 +84,66 @@ def process_bulk_upload_zip(processing_id, domain, app_id, username=None, share_
 
     zipped_files = uploaded_zip.namelist()
     status.total_files = len(zipped_files)
-    checked_paths = []
 
     try:
+        with _bulk_upload_phase(status, 'classify'):
+            members = _classify_zip_members(uploaded_zip, zipped_files)
+
+        with _bulk_upload_phase(status, 'match'):
+            matches_by_hash = _match_app_paths(app, members, status)
+        num_processed = len(zipped_files) - sum(len(matches) for matches in matches_by_hash.values())
+        status.update_progress(num_processed)
+
+        with _bulk_upload_phase(status, 'lookup'):
+            existing_docs = _get_multimedia_docs_by_hash(list(matches_by_hash))
+
         save_app = False
-        for index, path in enumerate(zipped_files):
-            status.update_progress(len(checked_paths))
-            checked_paths.append(path)
-            file_name = os.path.basename(path)
-            try:
-                data = uploaded_zip.read(path)
-            except Exception as e:
-                status.add_unmatched_path(path, _("Error reading file: %s" % e))
-                continue
-
-            media_class = CommCareMultimedia.get_class_by_data(data, filename=path)
-            if not media_class:
-                status.add_skipped_path(path, CommCareMultimedia.get_mime_type(data))
-                continue
-
-            app_paths = list(app.get_all_paths_of_type(media_class.__name__))
-            app_paths_lower = [p.lower() for p in app_paths]
-            form_path = media_class.get_form_path(path, lowercase=True)
-
-            if not form_path in app_paths_lower:
-                status.add_unmatched_path(path,
-                                          _("Did not match any %s paths in application." % media_class.get_nice_name()))
-                continue
-
-            index_of_path = app_paths_lower.index(form_path)
-            form_path = app_paths[index_of_path]  # this is the correct capitalization as specified in the form
-
-            multimedia = media_class.get_by_data(data)
-            if not multimedia:
-                status.add_unmatched_path(path,
-                                          _("Matching path found, but could not save the data to couch."))
-                continue
-
-            is_new = form_path not in app.multimedia_map
-            is_updated = multimedia.attach_data(data,
-                                                original_filename=file_name,
-                                                username=username)
-
-            if not is_updated and not getattr(multimedia, '_id'):
-                status.add_unmatched_path(form_path,
-                                          _("Matching path found, but didn't save new multimedia correctly."))
-                continue
-
-            if is_updated or is_new:
-                multimedia.add_domain(domain, owner=True)
-                if share_media:
-                    multimedia.update_or_add_license(domain, type=license_name, author=author,
-                                                     attribution_notes=attribution_notes)
-                save_app = True
-                app.create_mapping(multimedia, form_path, save=False)
-
-            media_info = multimedia.get_media_info(form_path, is_updated=is_updated, original_path=path)
-            status.add_matched_path(media_class, media_info)
+        with _bulk_upload_phase(status, 'save'):
+            for batch in chunked(matches_by_hash.items(), BULK_UPLOAD_BATCH_SIZE):
+                saved = []
+                for file_hash, matches in batch:
+                    media_class = matches[0].member.media_class
+                    doc = existing_docs.get(file_hash)
+                    multimedia = media_class.wrap(doc) if doc else media_class(file_hash=file_hash)
+                    saved.append((multimedia, matches))
+
+                docs = [multimedia for multimedia, matches in saved]
+                # blobs written in this context are deleted if the batch can't be saved
+                with bulk_atomic_blobs(docs):
+                    old_blob_keys = {doc._id: _get_blob_keys(doc) for doc in docs}
+                    for multimedia, matches in saved:
+                        for match in matches:
+                            multimedia.attach_data(uploaded_zip.read(match.member.path),
+                                                   original_filename=os.path.basename(match.member.path),
+                                                   username=username,
+                                                   should_save=False)
+                        multimedia.add_domain(domain, owner=True, should_save=False)
+                        if share_media:
+                            multimedia.update_or_add_license(domain, type=license_name, author=author,
+                                                             attribution_notes=attribution_notes,
+                                                             should_save=False)
+                    failed_ids = _bulk_save_multimedia(docs)
+                for doc in docs:
+                    if doc._id in failed_ids:
+                        _delete_new_blobs(doc, old_blob_keys[doc._id])
+
+                for multimedia, matches in saved:
+                    for match in matches:
+                        if multimedia._id in failed_ids:
+                            status.add_unmatched_path(match.form_path,
+                                                      _("Matching path found, but didn't save new multimedia correctly."))
+                            continue
+                        save_app = True
+                        app.create_mapping(multimedia, match.form_path, save=False)
+                        media_info = multimedia.get_media_info(match.form_path, is_updated=True,
+                                                               original_path=match.member.path)
+                        status.add_matched_path(multimedia.__class__, media_info)
+                num_processed += sum(len(matches) for file_hash, matches in batch)
+                status.update_progress(num_processed)
 
         if save_app:
             app.save()
-        status.update_progress(len(checked_paths))
+        status.update_progress(len(zipped_files))
     except Exception as e:
         status.mark_with_error(_("Error while processing zip: %s" % e))
     uploaded_zip.close()
@@ -120,6 +152,108 @@ def process_bulk_upload_zip(processing_id, domain, app_id, username=None, share_
     status.save()
 
 
+@contextmanager
+def _bulk_upload_phase(status, phase):
+    start = time.time()
+    yield
+    status.add_phase_timing(phase, time.time() - start)
+
+
+def _classify_zip_members(uploaded_zip, paths):
+    """Read, hash and classify the files of an uploaded zip in parallel threads
+
+    Hashing, decompressing and mime type detection release the GIL, and only
+    the files being classified are held in memory.
+
+    :returns: List of ``ZipMember`` in the order of ``paths``
+    """
+    def _classify(path):
+        try:
+            data = uploaded_zip.read(path)
+        except Exception as e:
+            return ZipMember(path, None, None, None, str(e))
+        media_class = CommCareMultimedia.get_class_by_data(data, filename=path)
+        mime_type = None if media_class else CommCareMultimedia.get_mime_type(data)
+        return ZipMember(path, CommCareMultimedia.generate_hash(data), media_class, mime_type, None)
+
+    with ThreadPoolExecutor(max_workers=BULK_UPLOAD_WORKERS) as executor:
+        return list(executor.map(_classify, paths))
+
+
+def _match_app_paths(app, members, status):
+    """Match zip members to the multimedia paths of the app
+
+    Members that can't be matched are recorded in the status.
+
+    :returns: OrderedDict of file hash to the list of ``ZipMemberMatch`` of
+    the members with that content
+    """
+    app_paths_by_class = {}
+    matches_by_hash = OrderedDict()
+    for member in members:
+        if member.read_error is not None:
+            status.add_unmatched_path(member.path, _("Error reading file: %s" % member.read_error))
+            continue
+
+        media_class = member.media_class
+        if not media_class:
+            status.add_skipped_path(member.path, member.mime_type)
+            continue
+
+        if media_class not in app_paths_by_class:
+            # lowercase path -> path with the capitalization as specified in the form
+            app_paths = {}
+            for app_path in app.get_all_paths_of_type(media_class.__name__):
+                app_paths.setdefault(app_path.lower(), app_path)
+            app_paths_by_class[media_class] = app_paths
+        app_paths = app_paths_by_class[media_class]
+        form_path = media_class.get_form_path(member.path, lowercase=True)
+        if form_path not in app_paths:
+            status.add_unmatched_path(member.path,
+                                      _("Did not match any %s paths in application." % media_class.get_nice_name()))
+            continue
+
+        matches_by_hash.setdefault(member.file_hash, []).append(ZipMemberMatch(member, app_paths[form_path]))
+    return matches_by_hash
+
+
+def _get_multimedia_docs_by_hash(file_hashes):
+    """Get the first multimedia doc with each file hash, in bulk"""
+    docs = {}
+    for hashes in chunked(file_hashes, BULK_UPLOAD_BATCH_SIZE, list):
+        rows = CommCareMultimedia.get_db().view('hqmedia/by_hash', keys=hashes, include_docs=True)
+        for row in rows:
+            docs.setdefault(row['key'], row['doc'])
+    return docs
+
+
+def _bulk_save_multimedia(multimedia):
+    """Save multimedia docs in a single request
+
+    :returns: Set of ids of the docs that could not be saved
+    """
+    try:
+        CommCareMultimedia.get_db().bulk_save(multimedia)
+    except BulkSaveError as e:
+        notify_exception(None, "Error saving bulk uploaded multimedia", details={'errors': e.errors})
+        return {error['id'] for error in e.errors}
+    return set()
+
+
+def _get_blob_keys(doc):
+    return {meta.key for meta in doc.external_blobs.values()}
+
+
+def _delete_new_blobs(doc, old_blob_keys):
+    """Delete the blobs written for a doc that could not be saved
+
+    ``bulk_atomic_blobs`` only deletes them if the whole batch fails.
+    """
+    db = get_blob_db()
+    for key in _get_blob_keys(doc) - old_blob_keys:
+        db.delete(key=key)
+
+
 @task(serializer='pickle')
 def build_application_zip(include_multimedia_files, include_index_files, domain, app_id,
                           download_id, build_profile_id=None, compress_zip=False, filename="commcare.zip",
@@ -157,6 +291,7 @@ def _build_ccz_files(build, build_profile_id, include_multimedia_files, include_
     files, errors, file_count = iter_app_files(
         build, include_multimedia_files, include_index_files, build_profile_id,
         download_targeted_version=download_targeted_version,
+        media_prefetch_workers=CCZ_MEDIA_PREFETCH_WORKERS,
     )
 
     if toggles.CAUTIOUS_MULTIMEDIA.enabled(build.domain):
@@ -212,8 +347,15 @@ def create_files_for_ccz(build, build_profile_id, include_multimedia_files=True,
     fpath = _get_file_path(build, include_multimedia_files, include_index_files, build_profile_id,
                            download_targeted_version)
 
+    ccz_cache_key = _get_ccz_cache_key(build, build_profile_id, include_multimedia_files, include_index_files,
+                                       compress_zip, download_targeted_version)
+
     # Don't rebuild the file if it is already there
-    if not (os.path.isfile(fpath) and settings.SHARED_DRIVE_CONF.transfer_enabled):
+    if os.path.isfile(fpath) and settings.SHARED_DRIVE_CONF.transfer_enabled:
+        DownloadBase.set_progress(task, current_progress + file_progress, 100)
+    elif ccz_cache_key and _copy_cached_ccz(ccz_cache_key, fpath):
+        DownloadBase.set_progress(task, current_progress + file_progress, 100)
+    else:
         files, errors, file_count = _build_ccz_files(build, build_profile_id, include_multimedia_files,
                                                      include_index_files, download_id, compress_zip,
                                                      filename, download_targeted_version)
@@ -246,14 +388,57 @@ def create_files_for_ccz(build, build_profile_id, include_multimedia_files=True,
         if errors:
             os.remove(fpath)
             raise Exception('\t' + '\t'.join(errors))
-    else:
-        DownloadBase.set_progress(task, current_progress + file_progress, 100)
+        if ccz_cache_key:
+            _cache_ccz(build, ccz_cache_key, fpath)
     if expose_link:
         _expose_download_link(fpath, filename, compress_zip, download_id)
     DownloadBase.set_progress(task, 100, 100)
     return fpath
 
 
+def _get_ccz_cache_key(build, build_profile_id, include_multimedia_files, include_index_files,
+                       compress_zip, download_targeted_version):
+    """Key of the cached CCZ for a build, or None if the CCZ should not be cached
+
+    Only builds are cached, since their files and multimedia never change.
+    """
+    if not build.copy_of or toggles.CAUTIOUS_MULTIMEDIA.enabled(build.domain):
+        # the manifest of cautious multimedia CCZs is specific to each download
+        return None
+    return 'ccz-{}.zip'.format(hashlib.md5(json.dumps([
+        build.get_id,
+        build_profile_id,
+        include_multimedia_files,
+        include_index_files,
+        compress_zip,
+        download_targeted_version,
+    ]).encode('utf-8')).hexdigest())
+
+
+def _copy_cached_ccz(ccz_cache_key, fpath):
+    try:
+        blob = get_blob_db().get(key=ccz_cache_key)
+    except NotFound:
+        datadog_counter('commcare.app_build.ccz_cache', tags=['result:miss'])
+        return False
+    with blob, open(fpath, 'wb') as f:
+        shutil.copyfileobj(blob, f)
+    datadog_counter('commcare.app_build.ccz_cache', tags=['result:hit'])
+    return True
+
+
+def _cache_ccz(build, ccz_cache_key, fpath):
+    with open(fpath, 'rb') as f:
+        get_blob_db().put(
+            f,
+            domain=build.domain,
+            parent_id=build.get_id,
+            type_code=CODES.tempfile,
+            key=ccz_cache_key,
+            timeout=CCZ_CACHE_TIMEOUT,
+        )
+
+
 def _expose_download_link(fpath, filename, compress_zip, download_id):
     common_kwargs = {
         'mimetype': 'application/zip' if compress_zip else 'application/x-zip-compressed',
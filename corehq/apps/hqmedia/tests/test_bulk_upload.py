@@ -0,0 +1,95 @@
+import hashlib
+import io
+import zipfile
+
+from django.test import SimpleTestCase, TestCase
+
+from mock import Mock
+from PIL import Image
+
+from corehq.apps.hqmedia.cache import BulkMultimediaStatusCache
+from corehq.apps.hqmedia.models import CommCareImage
+from corehq.apps.hqmedia.tasks import (
+    _classify_zip_members,
+    _delete_new_blobs,
+    _get_blob_keys,
+    _match_app_paths,
+)
+from corehq.blobs import get_blob_db
+from corehq.blobs.mixin import bulk_atomic_blobs
+
+
+def _png_data():
+    output = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(output, 'PNG')
+    return output.getvalue()
+
+
+class BulkUploadZipTest(SimpleTestCase):
+
+    def setUp(self):
+        self.png = _png_data()
+        zip_file = io.BytesIO()
+        with zipfile.ZipFile(zip_file, 'w') as z:
+            z.writestr('images/Logo.png', self.png)
+            z.writestr('readme.txt', 'not multimedia')
+            z.writestr('other/logo.png', self.png)
+            z.writestr('images/missing.png', self.png)
+        self.uploaded_zip = zipfile.ZipFile(zip_file)
+        self.paths = self.uploaded_zip.namelist()
+        self.status = BulkMultimediaStatusCache('bulk-upload-test')
+
+    def tearDown(self):
+        self.uploaded_zip.close()
+
+    def test_classify(self):
+        members = _classify_zip_members(self.uploaded_zip, self.paths)
+        self.assertEqual([member.path for member in members], self.paths)
+        logo, readme = members[:2]
+        self.assertEqual(logo.media_class, CommCareImage)
+        self.assertEqual(logo.file_hash, hashlib.md5(self.png).hexdigest())
+        self.assertIsNone(readme.media_class)
+        self.assertEqual(readme.mime_type, 'text/plain')
+
+    def test_match_app_paths(self):
+        app = Mock()
+        app.get_all_paths_of_type.return_value = {'jr://file/images/logo.png', 'jr://file/other/logo.png'}
+        members = _classify_zip_members(self.uploaded_zip, self.paths)
+        matches_by_hash = _match_app_paths(app, members, self.status)
+
+        self.assertEqual(list(matches_by_hash), [hashlib.md5(self.png).hexdigest()])
+        self.assertEqual(
+            [(match.member.path, match.form_path) for match in matches_by_hash[members[0].file_hash]],
+            [('images/Logo.png', 'jr://file/images/logo.png'), ('other/logo.png', 'jr://file/other/logo.png')]
+        )
+        self.assertEqual([f['path'] for f in self.status.skipped_files], ['readme.txt'])
+        self.assertEqual([f['path'] for f in self.status.unmatched_files], ['images/missing.png'])
+        app.get_all_paths_of_type.assert_called_once_with(CommCareImage.__name__)
+
+
+class BulkUploadSaveTest(TestCase):
+
+    def setUp(self):
+        self.png = _png_data()
+        self.image = CommCareImage(file_hash=hashlib.md5(self.png).hexdigest())
+
+    def _attach(self):
+        self.image.attach_data(self.png, original_filename='logo.png', should_save=False)
+        (blob_key,) = _get_blob_keys(self.image)
+        return blob_key
+
+    def test_batch_not_saved(self):
+        with self.assertRaises(ValueError):
+            with bulk_atomic_blobs([self.image]):
+                blob_key = self._attach()
+                self.assertTrue(get_blob_db().exists(key=blob_key))
+                raise ValueError("bulk save failed")
+        self.assertFalse(get_blob_db().exists(key=blob_key))
+        self.assertFalse(CommCareImage.get_db().doc_exist(self.image._id))
+
+    def test_doc_not_saved(self):
+        with bulk_atomic_blobs([self.image]):
+            old_blob_keys = _get_blob_keys(self.image)
+            blob_key = self._attach()
+        _delete_new_blobs(self.image, old_blob_keys)
+        self.assertFalse(get_blob_db().exists(key=blob_key))
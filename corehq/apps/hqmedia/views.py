@@ -6,7 +6,8 @@ import os
 import shutil
 import uuid
 import zipfile
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from mimetypes import guess_all_extensions, guess_type
 
@@ -844,7 +845,7 @@ class RemoveLogoView(BaseMultimediaView):
         return HttpResponse()
 
 
-def iter_media_files(media_objects):
+def iter_media_files(media_objects, prefetch_workers=0):
     """
     take as input the output of get_media_objects
     and return an iterator of (path, data) tuples for the media files
@@ -854,26 +855,51 @@ def iter_media_files(media_objects):
     as a side effect of implementation,
     errors will not include all error messages until the iterator is exhausted
 
+    :param prefetch_workers: If set, fetch up to this many files ahead in
+    parallel threads, so at most this many extra files are held in memory.
+    Files are still yielded in the order of ``media_objects``.
     """
     errors = []
 
+    def _fetch(path, media):
+        try:
+            data, _ = media.get_display_file()
+        except NameError as e:
+            message = "%(path)s produced an ERROR: %(error)s" % {
+                'path': path,
+                'error': e,
+            }
+            return path, None, message
+        return path, data, None
+
+    def _fetched_files():
+        if not prefetch_workers:
+            for path, media in media_objects:
+                yield _fetch(path, media)
+            return
+
+        with ThreadPoolExecutor(max_workers=prefetch_workers) as executor:
+            pending = deque()
+            for path, media in media_objects:
+                pending.append(executor.submit(_fetch, path, media))
+                if len(pending) > prefetch_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     def _media_files():
-        for path, media in media_objects:
-            try:
-                data, _ = media.get_display_file()
-                folder = path.replace(MULTIMEDIA_PREFIX, "")
-                if not isinstance(data, str):
-                    yield os.path.join(folder), data
-            except NameError as e:
-                message = "%(path)s produced an ERROR: %(error)s" % {
-                    'path': path,
-                    'error': e,
-                }
-                errors.append(message)
+        for path, data, error in _fetched_files():
+            if error:
+                errors.append(error)
+                continue
+            folder = path.replace(MULTIMEDIA_PREFIX, "")
+            if not isinstance(data, str):
+                yield os.path.join(folder), data
     return _media_files(), errors
 
 
-def iter_app_files(app, include_multimedia_files, include_index_files, build_profile_id=None, download_targeted_version=False):
+def iter_app_files(app, include_multimedia_files, include_index_files, build_profile_id=None,
+                   download_targeted_version=False, media_prefetch_workers=0):
     file_iterator = []
     errors = []
     index_file_count = 0
@@ -881,7 +907,7 @@ def iter_app_files(app, include_multimedia_files, include_index_files, build_pro
     if include_multimedia_files:
         media_objects = list(app.get_media_objects(build_profile_id=build_profile_id, remove_unused=True))
         multimedia_file_count = len(media_objects)
-        file_iterator, errors = iter_media_files(media_objects)
+        file_iterator, errors = iter_media_files(media_objects, prefetch_workers=media_prefetch_workers)
     if include_index_files:
         index_files, index_file_errors, index_file_count = iter_index_files(
             app, build_profile_id=build_profile_id, download_targeted_version=download_targeted_version
@@ -32,6 +32,7 @@ from dimagi.utils.parsing import string_to_utc_datetime
 from corehq import toggles
 from corehq.apps.app_manager.dbaccessors import (
     get_app_cached,
+    get_build_doc_cached,
     get_latest_released_app_version,
 )
 from corehq.apps.app_manager.util import LatestAppInfo
@@ -391,7 +392,8 @@ def get_recovery_measures_cached(domain, app_id):
 @require_GET
 @toggles.MOBILE_RECOVERY_MEASURES.required_decorator()
 def recovery_measures(request, domain, build_id):
-    app_id = get_app_cached(domain, build_id).master_id
+    build = get_build_doc_cached(domain, build_id)
+    app_id = build.get('copy_of') or build['_id']
     response = {
         "latest_apk_version": get_default_build_spec().version,
         "latest_ccz_version": get_latest_released_app_version(domain, app_id),
@@ -11,6 +11,7 @@ from corehq.apps.es import (
     UserES,
     aggregations,
     filters,
+    run_queries,
 )
 from corehq.apps.es.aggregations import (
     MISSING_KEY,
@@ -73,6 +74,11 @@ def get_total_case_counts_by_owner(domain, datespan, case_types=None, owner_ids=
 
 
 def _get_case_case_counts_by_owner(domain, datespan, case_types, is_total=False, owner_ids=None, export=False):
+    case_query = _get_case_counts_by_owner_query(domain, datespan, case_types, is_total, owner_ids, export)
+    return case_query.run().aggregations.owner_id.counts_by_bucket()
+
+
+def _get_case_counts_by_owner_query(domain, datespan, case_types, is_total=False, owner_ids=None, export=False):
     es_instance = ES_EXPORT_INSTANCE if export else ES_DEFAULT_INSTANCE
     case_query = (CaseES(es_instance_alias=es_instance)
          .domain(domain)
@@ -95,7 +101,7 @@ def _get_case_case_counts_by_owner(domain, datespan, case_types, is_total=False,
     if owner_ids:
         case_query = case_query.owner(owner_ids)
 
-    return case_query.run().aggregations.owner_id.counts_by_bucket()
+    return case_query
 
 
 def get_case_counts_closed_by_user(domain, datespan, case_types=None, user_ids=None, export=False):
@@ -107,6 +113,12 @@ def get_case_counts_opened_by_user(domain, datespan, case_types=None, user_ids=N
 
 
 def _get_case_counts_by_user(domain, datespan, case_types=None, is_opened=True, user_ids=None, export=False):
+    case_query = _get_case_counts_by_user_query(domain, datespan, case_types, is_opened, user_ids, export)
+    return case_query.run().aggregations.by_user.counts_by_bucket()
+
+
+def _get_case_counts_by_user_query(domain, datespan, case_types=None, is_opened=True, user_ids=None,
+                                   export=False):
     date_field = 'opened_on' if is_opened else 'closed_on'
     user_field = 'opened_by' if is_opened else 'closed_by'
 
@@ -131,7 +143,7 @@ def _get_case_counts_by_user(domain, datespan, case_types=None, is_opened=True,
     if user_ids:
         case_query = case_query.filter(filters.term(user_field, user_ids))
 
-    return case_query.run().aggregations.by_user.counts_by_bucket()
+    return case_query
 
 
 def get_paged_forms_by_type(
@@ -233,6 +245,11 @@ def get_completed_counts_by_user(domain, datespan, user_ids=None, export=False):
 
 
 def _get_form_counts_by_user(domain, datespan, is_submission_time, user_ids=None, export=False):
+    form_query = _get_form_counts_by_user_query(domain, datespan, is_submission_time, user_ids, export)
+    return form_query.run().aggregations.user.counts_by_bucket()
+
+
+def _get_form_counts_by_user_query(domain, datespan, is_submission_time, user_ids=None, export=False):
     es_instance = ES_EXPORT_INSTANCE if export else ES_DEFAULT_INSTANCE
     form_query = FormES(es_instance_alias=es_instance).domain(domain)
     for xmlns in SYSTEM_FORM_XMLNS_MAP.keys():
@@ -250,10 +267,49 @@ def _get_form_counts_by_user(domain, datespan, is_submission_time, user_ids=None
     if user_ids:
         form_query = form_query.user_id(user_ids)
 
-    form_query = (form_query
+    return (form_query
         .user_aggregation()
         .size(0))
-    return form_query.run().aggregations.user.counts_by_bucket()
+
+
+def get_worker_activity_counts(domain, datespan, avg_datespan, case_types, user_ids, owner_ids,
+                               include_active_cases=True, export=False):
+    """
+    Gets the form and case counts of the worker activity report
+    in a single request
+
+    :return: dict of counts by user or owner id, e.g.
+    ``result['submissions_by_user'] == get_submission_counts_by_user(domain, datespan, user_ids)``
+    """
+    queries = {
+        'avg_submissions_by_user': (
+            _get_form_counts_by_user_query(domain, avg_datespan, True, user_ids, export), 'user'),
+        'submissions_by_user': (
+            _get_form_counts_by_user_query(domain, datespan, True, user_ids, export), 'user'),
+        'total_cases_by_owner': (
+            _get_case_counts_by_owner_query(domain, datespan, case_types, True, owner_ids, export),
+            'owner_id'),
+        'cases_closed_by_user': (
+            _get_case_counts_by_user_query(domain, datespan, case_types, False, user_ids, export),
+            'by_user'),
+        'cases_opened_by_user': (
+            _get_case_counts_by_user_query(domain, datespan, case_types, True, user_ids, export),
+            'by_user'),
+    }
+    if include_active_cases:
+        queries['active_cases_by_owner'] = (
+            _get_case_counts_by_owner_query(domain, datespan, case_types, False, owner_ids, export),
+            'owner_id')
+
+    names = list(queries)
+    results = run_queries([queries[name][0] for name in names])
+    counts = {
+        name: getattr(result.aggregations, queries[name][1]).counts_by_bucket()
+        for name, result in zip(names, results)
+    }
+    if not include_active_cases:
+        counts['active_cases_by_owner'] = {}
+    return counts
 
 
 def get_submission_counts_by_date(domain, user_ids, datespan, timezone):
@@ -395,9 +451,61 @@ def get_form_duration_stats_by_user(
         enddate,
         by_submission_time=True):
     """Gets stats on the duration of a selected form grouped by users"""
-    date_filter_fn = submitted_filter if by_submission_time else completed_filter
+    query = _get_form_duration_stats_by_user_query(
+        domain, app_id, xmlns, user_ids, startdate, enddate, by_submission_time)
+    return _get_duration_stats_by_user(query.run(), missing_users=None in user_ids)
+
+
+def get_form_duration_stats_for_users(
+        domain,
+        app_id,
+        xmlns,
+        user_ids,
+        startdate,
+        enddate,
+        by_submission_time=True):
+    """Gets the form duration stats for a group of users"""
+    query = _get_form_duration_stats_for_users_query(
+        domain, app_id, xmlns, user_ids, startdate, enddate, by_submission_time)
+    return query.run().aggregations.duration_stats.result
+
+
+def get_form_duration_stats(
+        domain,
+        app_id,
+        xmlns,
+        user_ids,
+        startdate,
+        enddate,
+        by_submission_time=True):
+    """
+    Gets the form duration stats grouped by users and for the group of users
+    together in a single request
+
+    :return: ``(get_form_duration_stats_by_user(...), get_form_duration_stats_for_users(...))``
+    """
+    args = (domain, app_id, xmlns, user_ids, startdate, enddate, by_submission_time)
+    by_user_results, for_users_results = run_queries([
+        _get_form_duration_stats_by_user_query(*args),
+        _get_form_duration_stats_for_users_query(*args),
+    ])
+    return (
+        _get_duration_stats_by_user(by_user_results, missing_users=None in user_ids),
+        for_users_results.aggregations.duration_stats.result,
+    )
+
+
+def _duration_stats_aggregation():
+    return ExtendedStatsAggregation(
+        'duration_stats',
+        'form.meta.timeStart',
+        script="doc['form.meta.timeEnd'].value - doc['form.meta.timeStart'].value",
+    )
 
-    missing_users = None in user_ids
+
+def _get_form_duration_stats_by_user_query(
+        domain, app_id, xmlns, user_ids, startdate, enddate, by_submission_time):
+    date_filter_fn = submitted_filter if by_submission_time else completed_filter
 
     query = (
         FormES()
@@ -408,11 +516,7 @@ def get_form_duration_stats_by_user(
         .filter(date_filter_fn(gte=startdate, lt=enddate))
         .aggregation(
             TermsAggregation('user_id', 'form.meta.userID').aggregation(
-                ExtendedStatsAggregation(
-                    'duration_stats',
-                    'form.meta.timeStart',
-                    script="doc['form.meta.timeEnd'].value - doc['form.meta.timeStart'].value",
-                )
+                _duration_stats_aggregation()
             )
         )
         .size(0)
@@ -421,19 +525,18 @@ def get_form_duration_stats_by_user(
     if app_id:
         query = query.app(app_id)
 
-    if missing_users:
+    if None in user_ids:
         query = query.aggregation(
             MissingAggregation('missing_user_id', 'form.meta.userID').aggregation(
-                ExtendedStatsAggregation(
-                    'duration_stats',
-                    'form.meta.timeStart',
-                    script="doc['form.meta.timeEnd'].value - doc['form.meta.timeStart'].value",
-                )
+                _duration_stats_aggregation()
             )
         )
+    return query
+
 
+def _get_duration_stats_by_user(es_results, missing_users):
     result = {}
-    aggregations = query.run().aggregations
+    aggregations = es_results.aggregations
 
     if missing_users:
         result[MISSING_KEY] = aggregations.missing_user_id.bucket.duration_stats.result
@@ -444,15 +547,8 @@ def get_form_duration_stats_by_user(
     return result
 
 
-def get_form_duration_stats_for_users(
-        domain,
-        app_id,
-        xmlns,
-        user_ids,
-        startdate,
-        enddate,
-        by_submission_time=True):
-    """Gets the form duration stats for a group of users"""
+def _get_form_duration_stats_for_users_query(
+        domain, app_id, xmlns, user_ids, startdate, enddate, by_submission_time):
     date_filter_fn = submitted_filter if by_submission_time else completed_filter
 
     query = (
@@ -462,20 +558,13 @@ def get_form_duration_stats_for_users(
         .remove_default_filter('has_user')
         .xmlns(xmlns)
         .filter(date_filter_fn(gte=startdate, lt=enddate))
-        .aggregation(
-            ExtendedStatsAggregation(
-                'duration_stats',
-                'form.meta.timeStart',
-                script="doc['form.meta.timeEnd'].value - doc['form.meta.timeStart'].value",
-            )
-        )
+        .aggregation(_duration_stats_aggregation())
         .size(0)
     )
 
     if app_id:
         query = query.app(app_id)
-
-    return query.run().aggregations.duration_stats.result
+    return query
 
 
 def get_form_counts_for_domains(domains):
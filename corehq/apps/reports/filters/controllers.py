@@ -74,7 +74,7 @@ class EmwfOptionsController(object):
                 .search_string_query(query, default_fields=["name"]))
 
     def get_groups_size(self, query):
-        return self.group_es_query(query).count()
+        return self.group_es_query(query).cached().count()
 
     def get_groups(self, query, start, size):
         groups_query = (self.group_es_query(query)
@@ -82,7 +82,7 @@ class EmwfOptionsController(object):
                         .start(start)
                         .size(size)
                         .sort("name.exact"))
-        return [self.utils.reporting_group_tuple(g) for g in groups_query.run().hits]
+        return [self.utils.reporting_group_tuple(g) for g in groups_query.cached().run().hits]
 
     def get_locations_query(self, query):
         show_inactive = json.loads(self.request.GET.get('show_inactive', 'false'))
@@ -118,7 +118,7 @@ class EmwfOptionsController(object):
             accessible_location_ids = SQLLocation.active_objects.accessible_location_ids(
                 self.request.domain, self.request.couch_user)
             users = users.location(accessible_location_ids)
-        return [self.utils.user_tuple(u) for u in users.run().hits]
+        return [self.utils.user_tuple(u) for u in users.cached().run().hits]
 
     def active_user_es_query(self, query):
         search_fields = ["first_name", "last_name", "base_username"]
@@ -130,10 +130,10 @@ class EmwfOptionsController(object):
         return self.active_user_es_query(query).show_inactive()
 
     def get_all_users_size(self, query):
-        return self.all_user_es_query(query).count()
+        return self.all_user_es_query(query).cached().count()
 
     def get_active_users_size(self, query):
-        return self.active_user_es_query(query).count()
+        return self.active_user_es_query(query).cached().count()
 
     def get_all_users(self, query, start, size):
         return self._get_users(query, start, size, include_inactive=True)
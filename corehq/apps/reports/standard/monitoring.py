@@ -19,7 +19,7 @@ from dimagi.utils.parsing import json_format_date, string_to_utc_datetime
 from corehq import toggles
 from corehq.apps.analytics.tasks import track_workflow
 from corehq.apps.es import cases as case_es
-from corehq.apps.es import filters
+from corehq.apps.es import filters, run_queries
 from corehq.apps.es.aggregations import (
     FilterAggregation,
     MissingAggregation,
@@ -31,19 +31,15 @@ from corehq.apps.locations.permissions import (
 )
 from corehq.apps.reports import util
 from corehq.apps.reports.analytics.esaccessors import (
-    get_active_case_counts_by_owner,
-    get_case_counts_closed_by_user,
-    get_case_counts_opened_by_user,
     get_completed_counts_by_date,
     get_completed_counts_by_user,
     get_form_counts_by_user_xmlns,
-    get_form_duration_stats_by_user,
-    get_form_duration_stats_for_users,
+    get_form_duration_stats,
     get_forms,
     get_last_submission_time_for_users,
     get_submission_counts_by_date,
     get_submission_counts_by_user,
-    get_total_case_counts_by_owner,
+    get_worker_activity_counts,
 )
 from corehq.apps.reports.datatables import (
     DataTablesColumn,
@@ -262,7 +258,9 @@ class CaseActivityReport(WorkerMonitoringCaseReportTableBase):
         # timezone stripping problem, and so I hadn't factored that in.
         # As a result, this was two timezones off from correct
         # and no one noticed all these years...
-        return datetime.datetime.utcnow()
+        # Truncated to the minute so that the ES queries of repeated
+        # requests are identical and can be served from the cache.
+        return datetime.datetime.utcnow().replace(second=0, microsecond=0)
 
     @property
     def total_records(self):
@@ -383,10 +381,13 @@ class CaseActivityReport(WorkerMonitoringCaseReportTableBase):
 
     @property
     def rows(self):
-        es_results = self.es_queryset(
-            user_ids=self.paginated_user_ids,
-            size=self.pagination.start + self.pagination.count
-        )
+        es_results, total_results = run_queries([
+            self._es_query(
+                user_ids=self.paginated_user_ids,
+                size=self.pagination.start + self.pagination.count
+            ),
+            self._total_row_query,
+        ])
         buckets = es_results.aggregations.users.buckets_list
         if self.missing_users:
             buckets.append(es_results.aggregations.missing_users.bucket)
@@ -401,7 +402,7 @@ class CaseActivityReport(WorkerMonitoringCaseReportTableBase):
             # ES handles sorting for all other columns
             rows.sort(key=lambda row: row.user.raw_username)
 
-        self.total_row = self._total_row
+        self.total_row = self._format_total_row(total_results)
         if len(rows) <= self.pagination.count:
             return list(map(self._format_row, rows))
         else:
@@ -412,7 +413,10 @@ class CaseActivityReport(WorkerMonitoringCaseReportTableBase):
 
     @property
     def get_all_rows(self):
-        es_results = self.es_queryset(user_ids=self.user_ids)
+        es_results, total_results = run_queries([
+            self._es_query(user_ids=self.user_ids),
+            self._total_row_query,
+        ])
         buckets = es_results.aggregations.users.buckets_list
         if self.missing_users:
             buckets.append(es_results.aggregations.missing_users.bucket)
@@ -423,7 +427,7 @@ class CaseActivityReport(WorkerMonitoringCaseReportTableBase):
 
         rows.extend(self._unmatched_buckets(buckets, self.user_ids))
 
-        self.total_row = self._total_row
+        self.total_row = self._format_total_row(total_results)
         return list(map(self._format_row, rows))
 
     def _unmatched_buckets(self, buckets, user_ids):
@@ -450,7 +454,7 @@ class CaseActivityReport(WorkerMonitoringCaseReportTableBase):
         return case_es.open_case_aggregation(name='inactive_total', lt=self.milestone_start)
 
     @property
-    def _total_row(self):
+    def _total_row_query(self):
         query = (
             case_es.CaseES()
             .domain(self.domain)
@@ -471,7 +475,10 @@ class CaseActivityReport(WorkerMonitoringCaseReportTableBase):
 
         query = self.add_landmark_aggregations(query, self.end_date)
 
-        return self._format_row(self.TotalRow(query.run(), _("All Users")))
+        return query.cached()
+
+    def _format_total_row(self, es_results):
+        return self._format_row(self.TotalRow(es_results, _("All Users")))
 
     @property
     @memoized
@@ -487,6 +494,9 @@ class CaseActivityReport(WorkerMonitoringCaseReportTableBase):
         return ServerTime(self.utc_now - self.milestone).phone_time(self.timezone).done()
 
     def es_queryset(self, user_ids, size=None):
+        return self._es_query(user_ids, size).run()
+
+    def _es_query(self, user_ids, size=None):
         top_level_aggregation = (
             TermsAggregation('users', 'user_id')
             .aggregation(self._touched_total_aggregation)
@@ -527,7 +537,7 @@ class CaseActivityReport(WorkerMonitoringCaseReportTableBase):
             missing_aggregation = self.add_landmark_aggregations(missing_aggregation, self.end_date)
             query = query.aggregation(missing_aggregation)
 
-        return query.run()
+        return query.cached()
 
     def add_landmark_aggregations(self, aggregation, end_date):
         for key, landmark in self.landmarks:
@@ -1040,7 +1050,7 @@ class FormCompletionTimeReport(WorkerMonitoringFormReportTableBase, DatespanMixi
         app_id = self.selected_form_data['app_id']
         xmlns = self.selected_form_data['xmlns']
 
-        data_map = get_form_duration_stats_by_user(
+        data_map, total_data = get_form_duration_stats(
             self.domain,
             app_id,
             xmlns,
@@ -1061,15 +1071,6 @@ class FormCompletionTimeReport(WorkerMonitoringFormReportTableBase, DatespanMixi
                 stats.get('count', 0),
             ])
 
-        total_data = get_form_duration_stats_for_users(
-            self.domain,
-            app_id,
-            xmlns,
-            user_ids,
-            self.datespan.startdate_utc,
-            self.datespan.enddate_utc,
-            by_submission_time=self.by_submission_time,
-        )
         self.total_row = ["All Users",
                           _fmt_ts(total_data.get('avg')),
                           _fmt_ts(total_data.get('std_deviation')),
@@ -1780,31 +1781,16 @@ class WorkerActivityReport(WorkerMonitoringCaseReportTableBase, DatespanMixin):
         case_owners = _get_owner_ids_from_users(users_to_iterate)
         user_ids = user_ids
 
-        if self.include_active_cases:
-            active_cases_by_owner = get_active_case_counts_by_owner(
-                self.domain, self.datespan, self.case_types, owner_ids=case_owners, export=export
-            )
-        else:
-            active_cases_by_owner = {}
-
-        return WorkerActivityReportData(
-            avg_submissions_by_user=get_submission_counts_by_user(
-                self.domain, avg_datespan, user_ids=user_ids, export=export
-            ),
-            submissions_by_user=get_submission_counts_by_user(
-                self.domain, self.datespan, user_ids=user_ids, export=export
-            ),
-            active_cases_by_owner=active_cases_by_owner,
-            total_cases_by_owner=get_total_case_counts_by_owner(
-                self.domain, self.datespan, self.case_types, owner_ids=case_owners, export=export
-            ),
-            cases_closed_by_user=get_case_counts_closed_by_user(
-                self.domain, self.datespan, self.case_types, user_ids=user_ids, export=export
-            ),
-            cases_opened_by_user=get_case_counts_opened_by_user(
-                self.domain, self.datespan, self.case_types, user_ids=user_ids, export=export
-            ),
-        )
+        return WorkerActivityReportData(**get_worker_activity_counts(
+            self.domain,
+            self.datespan,
+            avg_datespan,
+            self.case_types,
+            user_ids=user_ids,
+            owner_ids=case_owners,
+            include_active_cases=self.include_active_cases,
+            export=export,
+        ))
 
     def _total_row(self, rows, report_data, users):
         total_row = [_("Total")]
@@ -25,6 +25,7 @@ from corehq.apps.reports.analytics.esaccessors import (
     get_case_types_for_domain_es,
     get_completed_counts_by_user,
     get_form_counts_by_user_xmlns,
+    get_form_duration_stats,
     get_form_duration_stats_by_user,
     get_form_duration_stats_for_users,
     get_form_ids_having_multimedia,
@@ -690,6 +691,37 @@ class TestFormESAccessors(BaseESAccessorsTest):
         self.assertEqual(results['count'], 3)
         self.assertEqual(timedelta(milliseconds=results['max']), completion_time - time_start)
 
+    @run_with_all_backends
+    def test_get_form_duration_stats(self):
+        """
+        Tests that get_form_duration_stats gets the same stats as the separate queries
+        """
+        user1, user2 = 'u1', 'u2'
+        app1 = '123'
+        xmlns1 = 'abc'
+
+        start = datetime(2013, 7, 1)
+        end = datetime(2013, 7, 30)
+
+        time_start = datetime(2013, 6, 15, 0, 0, 0)
+        completion_time = datetime(2013, 7, 15, 0, 0, 0)
+
+        for user_id in [user1, user2, None]:
+            self._send_form_to_es(
+                completion_time=completion_time,
+                user_id=user_id,
+                app_id=app1,
+                xmlns=xmlns1,
+                time_start=time_start,
+            )
+
+        args = (self.domain, app1, xmlns1, [user1, user2, None], start, end)
+        by_user, for_users = get_form_duration_stats(*args, by_submission_time=False)
+
+        self.assertEqual(by_user, get_form_duration_stats_by_user(*args, by_submission_time=False))
+        self.assertEqual(for_users, get_form_duration_stats_for_users(*args, by_submission_time=False))
+        self.assertEqual(for_users['count'], 3)
+
     @run_with_all_backends
     def test_get_form_duration_stats_for_users_decoys(self):
         """
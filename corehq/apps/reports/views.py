@@ -113,6 +113,7 @@ from corehq.apps.reports.formdetails.readable import (
 )
 from corehq.apps.reports.util import validate_xform_for_edit
 from corehq.apps.reports.view_helpers import case_hierarchy_context
+from corehq.apps.saved_reports.content_cache import get_shared_report_content
 from corehq.apps.saved_reports.models import ReportConfig, ReportNotification
 from corehq.apps.saved_reports.tasks import (
     send_delayed_report,
@@ -828,13 +829,15 @@ def send_test_scheduled_report(request, domain, scheduled_report_id):
 
 def get_scheduled_report_response(couch_user, domain, scheduled_report_id,
                                   email=True, attach_excel=False,
-                                  send_only_active=False, request=None):
+                                  send_only_active=False, request=None, share_content=False):
     """
     This function somewhat confusingly returns a tuple of: (response, excel_files)
     If attach_excel is false, excel_files will always be an empty list.
     If send_only_active is True, then only ReportConfigs that have a start_date
     in the past will be sent. If none of the ReportConfigs are valid, no email will
     be sent.
+    If share_content is True, report content rendered for other notifications
+    including the same ReportConfigs is reused (see saved_reports.content_cache).
     """
     # todo: clean up this API?
     from django.http import HttpRequest
@@ -855,12 +858,13 @@ def get_scheduled_report_response(couch_user, domain, scheduled_report_id,
         attach_excel=attach_excel,
         lang=notification.language,
         send_only_active=send_only_active,
+        share_content=share_content,
     )
 
 
 def _render_report_configs(request, configs, domain, owner_id, couch_user, email,
                            notes=None, attach_excel=False, once=False, lang=None,
-                           send_only_active=False):
+                           send_only_active=False, share_content=False):
     """
     Renders only notification's main content, which then may be used to generate full notification body.
     """
@@ -879,7 +883,10 @@ def _render_report_configs(request, configs, domain, owner_id, couch_user, email
         return False, False
 
     for config in configs:
-        content, excel_file = config.get_report_content(lang, attach_excel=attach_excel)
+        if share_content:
+            content, excel_file = get_shared_report_content(config, lang, attach_excel=attach_excel)
+        else:
+            content, excel_file = config.get_report_content(lang, attach_excel=attach_excel)
         if excel_file:
             excel_attachments.append({
                 'title': config.full_name + "." + format.extension,
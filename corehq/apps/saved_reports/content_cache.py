@@ -0,0 +1,91 @@
+"""
+Shared cache of rendered scheduled report content
+
+Many scheduled reports are due at the top of the hour, and the same saved
+report config is often included in several notifications (or sent to
+recipients in several languages by one notification). Each unique
+(config, filters, date range, language) combination is rendered once by
+whichever ``send_report`` task gets to it first; the other tasks, running
+concurrently on the other background workers, wait for that render and reuse
+its content and Excel attachment instead of running the report again.
+"""
+import hashlib
+import io
+import json
+
+from django.core.cache import cache
+
+from dimagi.utils.couch import CriticalSection
+
+from corehq.apps.saved_reports.models import ReportContent
+from corehq.util.datadog.gauges import datadog_counter
+
+# long enough to cover all reports queued for one 15 minute scheduling slot
+CONTENT_CACHE_TIMEOUT = 15 * 60
+RENDER_LOCK_TIMEOUT = 10 * 60
+
+# in bytes of HTML content plus attachment
+MAX_CACHED_CONTENT_SIZE = 5 * 1024 * 1024
+
+
+def get_shared_report_content(config, lang, attach_excel=False):
+    """Get ``config.get_report_content(...)``, rendering it at most once
+    for all notifications that include the config
+
+    :return: ``ReportContent``. The attachment is a new file object on each
+    call so it can be attached to several emails.
+    """
+    key = _get_content_key(config, lang, attach_excel)
+    if key is None:
+        return config.get_report_content(lang, attach_excel=attach_excel)
+
+    cached = cache.get(key)
+    if cached is None:
+        with CriticalSection([key + '-lock'], timeout=RENDER_LOCK_TIMEOUT):
+            # another worker may have rendered it while we waited for the lock
+            cached = cache.get(key)
+            if cached is None:
+                _record_result('miss')
+                content = config.get_report_content(lang, attach_excel=attach_excel)
+                cached = _serialize(content)
+                if _get_size(cached) <= MAX_CACHED_CONTENT_SIZE:
+                    cache.set(key, cached, CONTENT_CACHE_TIMEOUT)
+                return _deserialize(cached)
+    _record_result('hit')
+    return _deserialize(cached)
+
+
+def _get_content_key(config, lang, attach_excel):
+    config_rev = getattr(config, '_rev', None)
+    if not config_rev:
+        # unsaved configs (e.g. legacy notifications) are never shared
+        return None
+    try:
+        date_range = config.get_date_range()
+    except Exception:
+        return None
+    return 'scheduled-report-content-{}'.format(hashlib.sha1(json.dumps([
+        config._id,
+        config_rev,
+        lang,
+        attach_excel,
+        date_range,
+    ], sort_keys=True, default=str).encode('utf-8')).hexdigest())
+
+
+def _serialize(content):
+    attachment = content.attachment.getvalue() if content.attachment is not None else None
+    return ReportContent(content.text, attachment)
+
+
+def _deserialize(cached):
+    attachment = io.BytesIO(cached.attachment) if cached.attachment is not None else None
+    return ReportContent(cached.text, attachment)
+
+
+def _get_size(cached):
+    return len(cached.text or '') + len(cached.attachment or b'')
+
+
+def _record_result(result):
+    datadog_counter('commcare.scheduled_reports.content_cache', tags=['result:{}'.format(result)])
@@ -693,7 +693,7 @@ class ReportNotification(CachedCouchDocumentMixin, Document):
             try:
                 content, excel_files = get_scheduled_report_response(
                     self.owner, self.domain, self._id, attach_excel=attach_excel,
-                    send_only_active=True
+                    send_only_active=True, share_content=True
                 )
 
                 # Will be False if ALL the ReportConfigs in the ReportNotification
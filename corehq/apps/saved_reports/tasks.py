@@ -1,5 +1,5 @@
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.http import HttpRequest
@@ -23,13 +23,18 @@ from corehq.apps.saved_reports.scheduled import (
 )
 from corehq.apps.users.models import CouchUser
 from corehq.elastic import ESError
+from corehq.util.datadog.gauges import datadog_histogram
 from corehq.util.decorators import serial_task
 from corehq.util.log import send_HTML_email
 
 
-def send_delayed_report(report_id):
+def send_delayed_report(report_id, scheduled=False):
     """
     Sends a scheduled report, via celery background task.
+
+    :param scheduled: True if the report was queued because it is due
+    (rather than sent on demand), in which case the time it waited in the
+    queue is recorded.
     """
     domain = ReportNotification.get(report_id).domain
     if (
@@ -39,19 +44,22 @@ def send_delayed_report(report_id):
         # This is to prevent a few scheduled reports from clogging up
         # the background queue.
         # https://manage.dimagi.com/default.asp?270029#BugEvent.1457969
-        send_report_throttled.delay(report_id)
+        send_report_throttled.delay(report_id, scheduled)
     else:
-        send_report.delay(report_id)
+        send_report.delay(report_id, scheduled)
 
 
 @task(serializer='pickle', queue='background_queue', ignore_result=True)
-def send_report(notification_id):
+def send_report(notification_id, scheduled=False):
     notification = ReportNotification.get(notification_id)
 
     # If the report's start date is later than today, return and do not send the email
     if notification.start_date and notification.start_date > datetime.today().date():
         return
 
+    if scheduled:
+        _record_queue_lag(notification)
+
     try:
         notification.send()
     except UnsupportedScheduledReportError:
@@ -59,8 +67,28 @@ def send_report(notification_id):
 
 
 @task(serializer='pickle', queue='send_report_throttled', ignore_result=True)
-def send_report_throttled(notification_id):
-    send_report(notification_id)
+def send_report_throttled(notification_id, scheduled=False):
+    send_report(notification_id, scheduled)
+
+
+def _record_queue_lag(notification, now=None):
+    """Record the time between the notification's scheduled time and now
+
+    Most notifications are due at the top of the hour, so lag is tagged
+    by hour slot to show which slots the background queue falls behind on.
+    """
+    now = now or datetime.utcnow()
+    scheduled_for = now.replace(hour=notification.hour, minute=notification.minute or 0,
+                                second=0, microsecond=0)
+    if scheduled_for > now:
+        # queued before midnight for yesterday's slot
+        scheduled_for -= timedelta(days=1)
+    lag = (now - scheduled_for).total_seconds()
+    datadog_histogram('commcare.scheduled_reports.queue_lag', lag, tags=[
+        'hour:{:02d}'.format(notification.hour),
+        'interval:{}'.format(notification.interval),
+    ])
+    return lag
 
 
 @periodic_task(
@@ -74,7 +102,7 @@ def initiate_queue_scheduled_reports():
 @serial_task('queue_scheduled_reports', queue=getattr(settings, 'CELERY_PERIODIC_QUEUE', 'celery'))
 def queue_scheduled_reports():
     for report_id in create_records_for_scheduled_reports():
-        send_delayed_report(report_id)
+        send_delayed_report(report_id, scheduled=True)
 
 
 @task(serializer='pickle', bind=True, default_retry_delay=15 * 60, max_retries=10, acks_late=True)
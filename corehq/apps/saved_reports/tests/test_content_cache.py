@@ -0,0 +1,78 @@
+import io
+from datetime import datetime
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from mock import MagicMock, patch
+
+from corehq.apps.saved_reports.content_cache import get_shared_report_content
+from corehq.apps.saved_reports.models import ReportContent, ReportNotification
+from corehq.apps.saved_reports.tasks import _record_queue_lag
+
+
+class FakeConfig(object):
+    domain = 'test'
+
+    def __init__(self, _id, _rev='1-abc'):
+        self._id = _id
+        self._rev = _rev
+        self.renders = 0
+
+    def get_date_range(self):
+        return {'startdate': '2019-01-01', 'enddate': '2019-01-31'}
+
+    def get_report_content(self, lang, attach_excel=False):
+        self.renders += 1
+        return ReportContent('<table/>', io.BytesIO(b'xlsx') if attach_excel else None)
+
+
+@patch('corehq.apps.saved_reports.content_cache.CriticalSection', MagicMock())
+class TestSharedReportContent(SimpleTestCase):
+
+    def setUp(self):
+        cache = LocMemCache('scheduled-report-content-test', {})
+        # locmem caches with the same name share their entries
+        self.addCleanup(cache.clear)
+        patcher = patch('corehq.apps.saved_reports.content_cache.cache', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rendered_once(self):
+        config = FakeConfig('abc')
+        first = get_shared_report_content(config, 'en', attach_excel=True)
+        second = get_shared_report_content(config, 'en', attach_excel=True)
+        self.assertEqual(config.renders, 1)
+        self.assertEqual(first.text, second.text)
+        # each email gets its own attachment file object
+        self.assertIsNot(first.attachment, second.attachment)
+        self.assertEqual(second.attachment.read(), b'xlsx')
+
+    def test_language(self):
+        config = FakeConfig('abc')
+        get_shared_report_content(config, 'en')
+        get_shared_report_content(config, 'fra')
+        self.assertEqual(config.renders, 2)
+
+    def test_edited_config(self):
+        get_shared_report_content(FakeConfig('abc'), 'en')
+        config = FakeConfig('abc', _rev='2-def')
+        get_shared_report_content(config, 'en')
+        self.assertEqual(config.renders, 1)
+
+    def test_unsaved_config(self):
+        config = FakeConfig('dummy', _rev=None)
+        get_shared_report_content(config, 'en')
+        get_shared_report_content(config, 'en')
+        self.assertEqual(config.renders, 2)
+
+
+class TestQueueLag(SimpleTestCase):
+
+    def test_lag(self):
+        notification = ReportNotification(hour=8, minute=0, interval='daily')
+        self.assertEqual(_record_queue_lag(notification, datetime(2019, 3, 4, 8, 2, 30)), 150)
+
+    def test_slot_before_midnight(self):
+        notification = ReportNotification(hour=23, minute=45, interval='daily')
+        self.assertEqual(_record_queue_lag(notification, datetime(2019, 3, 4, 0, 1)), 16 * 60)
@@ -1,3 +1,4 @@
+from corehq import toggles
 from corehq.apps.userreports.const import (
     DATA_SOURCE_TYPE_STANDARD,
     UCR_SQL_BACKEND,
@@ -9,6 +10,7 @@ from corehq.apps.userreports.models import (
     DataSourceConfiguration,
     get_datasource_config,
 )
+from corehq.apps.userreports.reports.result_cache import get_or_compute
 from corehq.apps.userreports.sql.data_source import (
     ConfigurableReportSqlDataSource,
 )
@@ -131,7 +133,7 @@ class ConfigurableReportDataSource(object):
         return self.data_source.column_warnings
 
     def get_data(self, start=None, limit=None):
-        data = self.data_source.get_data(start, limit)
+        data = self._get_cached('get_data', start, limit)
         self.track_load(len(data))
         return data
 
@@ -140,10 +142,25 @@ class ConfigurableReportDataSource(object):
         return self.data_source.has_total_row
 
     def get_total_records(self):
-        return self.data_source.get_total_records()
+        return self._get_cached('get_total_records')
 
     def get_total_row(self):
-        return self.data_source.get_total_row()
+        return self._get_cached('get_total_row')
+
+    def _get_cached(self, method, *args):
+        compute = getattr(self.data_source, method)
+        if not self._use_result_cache:
+            return compute(*args)
+        query_key = '{}:{}:{}'.format(method, args, self.data_source.result_cache_key)
+        return get_or_compute(self.config._id, query_key, lambda: compute(*args))
+
+    @property
+    def _use_result_cache(self):
+        return (
+            self.data_source_type == DATA_SOURCE_TYPE_STANDARD
+            and not self._custom_query_provider
+            and toggles.UCR_REPORT_RESULT_CACHE.enabled(self.domain)
+        )
 
     @property
     def total_column_ids(self):
@@ -0,0 +1,61 @@
+"""
+Cache of UCR report query results
+
+Report pages, filter changes and scheduled emails re-run the same SQL
+aggregations over a data source's table. Results are cached keyed by the
+data source, the query (columns, filters and filter values, sorting) and
+the requested page.
+
+Every write to a data source table records the time of the write (see
+``mark_data_source_modified``), and that time is part of the key, so cached
+results are never served once the table has changed. The time is kept
+without expiry. If it is missing anyway (e.g. evicted), a new one is
+recorded before results are looked up, so results cached before it was
+lost are not served.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+
+from corehq.util.datadog.gauges import datadog_counter
+
+RESULT_CACHE_TIMEOUT = 60 * 60
+
+
+def mark_data_source_modified(data_source_id):
+    """Call after (not before) committing writes to a data source table"""
+    cache.set(_get_last_write_key(data_source_id), time.time(), None)
+
+
+def get_or_compute(data_source_id, query_key, compute):
+    """
+    :param query_key: string identifying the query and its arguments
+    :param compute: function returning the result if it is not cached
+    """
+    last_write = _get_last_write(data_source_id)
+    key = 'ucr-report-result-{}'.format(hashlib.sha1('{}:{}:{}'.format(
+        data_source_id, last_write, query_key
+    ).encode('utf-8')).hexdigest())
+    result = cache.get(key)
+    datadog_counter('commcare.ucr.report_result_cache', tags=[
+        'result:{}'.format('miss' if result is None else 'hit'),
+    ])
+    if result is None:
+        result = compute()
+        cache.set(key, result, RESULT_CACHE_TIMEOUT)
+    return result
+
+
+def _get_last_write(data_source_id):
+    key = _get_last_write_key(data_source_id)
+    last_write = cache.get(key)
+    if last_write is None:
+        # never cached or evicted: writes since then are unknown
+        cache.add(key, time.time(), None)
+        last_write = cache.get(key)
+    return last_write
+
+
+def _get_last_write_key(data_source_id):
+    return 'ucr-data-source-last-write-{}'.format(data_source_id)
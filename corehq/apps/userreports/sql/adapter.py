@@ -17,6 +17,7 @@ from corehq.apps.userreports.exceptions import (
     TableRebuildError,
     translate_programming_error,
 )
+from corehq.apps.userreports.reports.result_cache import mark_data_source_modified
 from corehq.apps.userreports.sql.columns import column_to_sql
 from corehq.apps.userreports.util import get_table_name
 from corehq.sql_db.connections import connection_manager
@@ -106,6 +107,7 @@ class IndicatorSqlAdapter(IndicatorAdapter):
             raise TableRebuildError('problem rebuilding UCR table {}: {}'.format(self.config, e))
         finally:
             self.session_helper.Session.commit()
+        mark_data_source_modified(self.config._id)
 
     def build_table(self, initiated_by=None, source=None):
         self.log_table_build(initiated_by, source)
@@ -126,6 +128,7 @@ class IndicatorSqlAdapter(IndicatorAdapter):
             table = self.get_table()
             table.drop(connection, checkfirst=True)
             get_metadata(self.engine_id).remove(table)
+        mark_data_source_modified(self.config._id)
 
     @unit_testing_only
     def clear_table(self):
@@ -133,6 +136,7 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         with self.engine.begin() as connection:
             delete = table.delete()
             connection.execute(delete)
+        mark_data_source_modified(self.config._id)
 
     def get_query_object(self):
         """
@@ -184,6 +188,7 @@ class IndicatorSqlAdapter(IndicatorAdapter):
             config = self.config.sql_settings.citus_config
             if config.distribution_type == 'hash':
                 self._by_column_update(formatted_rows)
+                mark_data_source_modified(self.config._id)
                 return
         doc_ids = set(row['doc_id'] for row in formatted_rows)
         table = self.get_table()
@@ -204,6 +209,7 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         with self.session_context() as session:
             for query in queries:
                 session.execute(query)
+        mark_data_source_modified(self.config._id)
 
     def _by_column_update(self, rows):
         config = self.config.sql_settings.citus_config
@@ -259,12 +265,14 @@ class IndicatorSqlAdapter(IndicatorAdapter):
             config = self.config.sql_settings.citus_config
             if config.distribution_type == 'hash':
                 self._citus_bulk_delete(docs, config.distribution_column)
+                mark_data_source_modified(self.config._id)
                 return
         table = self.get_table()
         doc_ids = [doc['_id'] for doc in docs]
         delete = table.delete(table.c.doc_id.in_(doc_ids))
         with self.session_context() as session:
             session.execute(delete)
+        mark_data_source_modified(self.config._id)
 
     def _citus_bulk_delete(self, docs, column):
         """
@@ -1,3 +1,4 @@
+import json
 import numbers
 
 from django.utils.decorators import method_decorator
@@ -72,6 +73,18 @@ class ConfigurableReportSqlDataSource(ConfigurableReportDataSourceMixin, SqlData
 
         return ret
 
+    @property
+    def result_cache_key(self):
+        """Identifies the results of this data source's queries given its current state"""
+        return json.dumps({
+            'columns': self.top_level_columns,
+            'aggregation_columns': self.aggregation_columns,
+            'filters': self._filters,
+            'filter_values': self.filter_values,
+            'order_by': self._order_by,
+            'lang': self.lang,
+        }, sort_keys=True, default=_json_default)
+
     @method_decorator(catch_and_raise_exceptions)
     def get_query_strings(self):
         qc = self.query_context()
@@ -111,3 +124,9 @@ class ConfigurableReportSqlDataSource(ConfigurableReportDataSourceMixin, SqlData
         if total_row and total_row[0] == '':
             total_row[0] = ugettext('Total')
         return total_row
+
+
+def _json_default(value):
+    if hasattr(value, 'to_json'):
+        return value.to_json()
+    return str(value)
@@ -1,8 +1,11 @@
 import uuid
 from collections import namedtuple
 
+from django.core.cache import cache
 from django.test import TestCase
 
+from mock import patch
+
 from corehq.apps.userreports.models import (
     DataSourceConfiguration,
     ReportConfiguration,
@@ -10,9 +13,14 @@ from corehq.apps.userreports.models import (
 from corehq.apps.userreports.reports.data_source import (
     ConfigurableReportDataSource,
 )
+from corehq.apps.userreports.reports.result_cache import _get_last_write_key
+from corehq.apps.userreports.sql.data_source import (
+    ConfigurableReportSqlDataSource,
+)
 from corehq.apps.userreports.tests.utils import doc_to_change
 from corehq.apps.userreports.util import get_indicator_adapter
 from corehq.pillows.case import get_case_pillow
+from corehq.util.test_utils import flag_enabled
 
 ReportDataTestRow = namedtuple('ReportDataTestRow', ['name', 'number', 'sort_key'])
 
@@ -225,3 +233,36 @@ class ReportDataTest(TestCase):
         # These last two are untranslated
         self.assertEqual(rows_by_number[3]['string-number'], "3")
         self.assertEqual(rows_by_number[4]['string-number'], "4")
+
+    @flag_enabled('UCR_REPORT_RESULT_CACHE')
+    def test_result_cache(self):
+        self._add_some_rows(3)
+
+        report_data_source = ConfigurableReportDataSource.from_spec(self.report_config)
+        self.assertEqual(len(report_data_source.get_data()), 3)
+        self.assertEqual(report_data_source.get_total_records(), 3)
+
+        with patch.object(ConfigurableReportSqlDataSource, 'get_data') as get_data:
+            report_data_source = ConfigurableReportDataSource.from_spec(self.report_config)
+            self.assertEqual(len(report_data_source.get_data()), 3)
+        self.assertFalse(get_data.called)
+
+        # writes to the data source invalidate cached results
+        self._add_some_rows(2)
+        report_data_source = ConfigurableReportDataSource.from_spec(self.report_config)
+        self.assertEqual(len(report_data_source.get_data()), 5)
+        self.assertEqual(report_data_source.get_total_records(), 5)
+
+    @flag_enabled('UCR_REPORT_RESULT_CACHE')
+    def test_result_cache_last_write_missing(self):
+        last_write_key = _get_last_write_key(self.data_source._id)
+        self._add_some_rows(3)
+        cache.delete(last_write_key)
+        report_data_source = ConfigurableReportDataSource.from_spec(self.report_config)
+        self.assertEqual(len(report_data_source.get_data()), 3)
+
+        # the record of this write is lost too
+        self._add_some_rows(2)
+        cache.delete(last_write_key)
+        report_data_source = ConfigurableReportDataSource.from_spec(self.report_config)
+        self.assertEqual(len(report_data_source.get_data()), 5)
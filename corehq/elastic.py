@@ -1,8 +1,12 @@
 import copy
 import json
 import logging
+import queue
+import threading
 import time
-from collections import namedtuple
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from urllib.parse import unquote
 
 from django.conf import settings
@@ -152,9 +156,11 @@ def send_to_elasticsearch(index_name, doc, delete=False, es_merge_update=False):
 
 
 def refresh_elasticsearch_index(index_name):
+    from corehq.apps.es.cache import invalidate_cached_results
     es_meta = ES_META[index_name]
     es = get_es_new()
     es.indices.refresh(index=es_meta.index)
+    invalidate_cached_results(index_name)
 
 
 EsMeta = namedtuple('EsMeta', 'index, type')
@@ -200,14 +206,7 @@ def run_query(index_name, q, debug_host=None, es_instance_alias=ES_DEFAULT_INSTA
 
     es_interface = ElasticsearchInterface(es_instance)
 
-    try:
-        es_meta = ES_META[index_name]
-    except KeyError:
-        from corehq.apps.userreports.util import is_ucr_table
-        if is_ucr_table(index_name):
-            es_meta = EsMeta(index_name, 'indicator')
-        else:
-            raise
+    es_meta = _get_es_meta(index_name)
     try:
         results = es_interface.search(es_meta.index, es_meta.type, body=q)
         report_and_fail_on_shard_failures(results)
@@ -216,6 +215,41 @@ def run_query(index_name, q, debug_host=None, es_instance_alias=ES_DEFAULT_INSTA
         raise ESError(e)
 
 
+def run_multi_query(queries, es_instance_alias=ES_DEFAULT_INSTANCE):
+    """
+    Run several queries with a single multi search request
+
+    :param queries: list of ``(index_name, query)``
+    :return: list of results, in the same order as ``queries``
+    """
+    if not queries:
+        return []
+    es_interface = ElasticsearchInterface(get_es_instance(es_instance_alias))
+    searches = []
+    for index_name, q in queries:
+        es_meta = _get_es_meta(index_name)
+        searches.append((es_meta.index, es_meta.type, q))
+    try:
+        responses = es_interface.msearch(searches)
+    except ElasticsearchException as e:
+        raise ESError(e)
+    for results in responses:
+        if 'error' in results:
+            raise ESError(results['error'])
+        report_and_fail_on_shard_failures(results)
+    return responses
+
+
+def _get_es_meta(index_name):
+    try:
+        return ES_META[index_name]
+    except KeyError:
+        from corehq.apps.userreports.util import is_ucr_table
+        if is_ucr_table(index_name):
+            return EsMeta(index_name, 'indicator')
+        raise
+
+
 def mget_query(index_name, ids):
     if not ids:
         return []
@@ -228,16 +262,31 @@ def mget_query(index_name, ids):
         raise ESError(e)
 
 
-def iter_es_docs(index_name, ids):
-    """Returns a generator which pulls documents from elasticsearch in chunks"""
-    for ids_chunk in chunked(ids, 100):
-        yield from mget_query(index_name, ids_chunk)
+def iter_es_docs(index_name, ids, prefetch_workers=0):
+    """Returns a generator which pulls documents from elasticsearch in chunks
+
+    :param prefetch_workers: If set, fetch up to this many chunks ahead in
+    parallel threads. Documents are still yielded in the order of ``ids``.
+    """
+    if not prefetch_workers:
+        for ids_chunk in chunked(ids, 100):
+            yield from mget_query(index_name, ids_chunk)
+        return
+
+    with ThreadPoolExecutor(max_workers=prefetch_workers) as executor:
+        pending = deque()
+        for ids_chunk in chunked(ids, 100):
+            pending.append(executor.submit(mget_query, index_name, ids_chunk))
+            if len(pending) > prefetch_workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
 
 def iter_es_docs_from_query(query):
     """Returns all docs which match query
     """
-    scroll_result = query.scroll_ids()
+    scroll_result = query.scroll_ids(parallel=True)
 
     def iter_export_docs():
         with TransientTempfile() as temp_path:
@@ -248,16 +297,21 @@ def iter_es_docs_from_query(query):
             # Stream doc ids from disk and fetch documents from ES in chunks
             with open(temp_path, 'r', encoding='utf-8') as f:
                 doc_ids = (doc_id.strip() for doc_id in f)
-                for doc in iter_es_docs(query.index, doc_ids):
+                for doc in iter_es_docs(query.index, doc_ids, prefetch_workers=ES_DOCS_PREFETCH_WORKERS):
                     yield doc
 
     return ScanResult(scroll_result.count, iter_export_docs())
 
 
-def scroll_query(index_name, q, es_instance_alias=ES_DEFAULT_INSTANCE):
+def scroll_query(index_name, q, es_instance_alias=ES_DEFAULT_INSTANCE, parallel=False):
+    """
+    :param parallel: Scroll each shard of the index separately, in parallel
+    threads. Results are in no particular order.
+    """
     es_meta = ES_META[index_name]
+    scan_fn = parallel_scan if parallel else scan
     try:
-        return scan(
+        return scan_fn(
             get_es_instance(es_instance_alias),
             index=es_meta.index,
             doc_type=es_meta.type,
@@ -344,6 +398,94 @@ def scan(client, query=None, scroll='5m', **kwargs):
 SIZE_LIMIT = 1000000
 SCROLL_PAGE_SIZE_LIMIT = 1000
 
+# Shards scrolled at once by parallel_scan
+PARALLEL_SCAN_MAX_WORKERS = 8
+# Hits held in memory by parallel_scan
+PARALLEL_SCAN_BUFFER_SIZE = 10000
+# Chunks of documents fetched ahead when iterating export documents
+ES_DOCS_PREFETCH_WORKERS = 4
+
+
+def parallel_scan(client, query=None, index=None, doc_type=None, max_workers=PARALLEL_SCAN_MAX_WORKERS,
+                  buffer_size=PARALLEL_SCAN_BUFFER_SIZE):
+    """
+    Like ``scan`` but scrolls each shard of the index separately
+    (using the ``_shards:<n>`` search preference), reading up to
+    ``max_workers`` shards at once in parallel threads.
+
+    The scroll of a shard is only opened once a thread is free to read it,
+    so that it doesn't expire while waiting for other shards to be read.
+
+    Hits are yielded as they arrive from any shard. At most ``buffer_size``
+    hits are held in memory: readers wait while the buffer is full.
+    """
+    shards = client.search_shards(index=index, doc_type=doc_type)['shards']
+    count = _get_scan_count(client, query, index=index, doc_type=doc_type)
+    open_scans = [
+        partial(scan, client, query=query, index=index, doc_type=doc_type, preference='_shards:{}'.format(shard))
+        for shard in range(len(shards))
+    ]
+    return ScanResult(count, _iter_scan_results_parallel(open_scans, max_workers, buffer_size))
+
+
+def _get_scan_count(client, query, **kwargs):
+    """Get the number of hits of a scan query without fetching any"""
+    body = {
+        key: value for key, value in (query or {}).items()
+        if key not in ('size', 'from', 'sort', 'fields', '_source', 'aggs', 'aggregations', 'facets')
+    }
+    body['size'] = 0
+    return ElasticsearchInterface(client).search(body=body, **kwargs)['hits']['total']
+
+
+def _iter_scan_results_parallel(open_scans, max_workers, buffer_size):
+    """
+    :param open_scans: Functions each starting a scan and returning the
+    iterable of its hits. They are called by the reader threads.
+    """
+    hits = queue.Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                hits.put(item, timeout=1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read(open_scan):
+        if stopped.is_set():
+            return
+        try:
+            for hit in open_scan():
+                if not put(hit):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(open_scans))))
+    try:
+        for open_scan in open_scans:
+            executor.submit(read, open_scan)
+        remaining = len(open_scans)
+        while remaining:
+            item = hits.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        # also stops readers if the consumer stops early
+        stopped.set()
+        executor.shutdown(wait=False)
+
 
 def es_query(params=None, facets=None, terms=None, q=None, es_index=None, start_at=None, size=None, dict_only=False,
              fields=None, facet_size=None):
@@ -15,6 +15,11 @@ ASYNC_RETRY_AFTER = 5
 
 ASYNC_RESTORE_CACHE_KEY_PREFIX = "async-restore-task"
 RESTORE_CACHE_KEY_PREFIX = "ota-restore"
+SHARED_CASE_PAYLOAD_CACHE_KEY_PREFIX = "shared-case-payload"
+
+# how long the case payload of a fresh restore is shared with other users
+# having the same owner ids (in seconds)
+SHARED_CASE_PAYLOAD_TIMEOUT = 60 * 60  # 1 hour
 
 # case sync algorithms
 CLEAN_OWNERS = 'clean_owners'
@@ -28,15 +28,19 @@ from itertools import chain, islice
 
 from casexml.apps.case.const import CASE_INDEX_EXTENSION as EXTENSION
 from casexml.apps.phone.const import ASYNC_RETRY_AFTER
-from casexml.apps.phone.data_providers.case.load_testing import (
-    get_xml_for_response,
-)
 from casexml.apps.phone.data_providers.case.stock import get_stock_payload
 from casexml.apps.phone.data_providers.case.utils import get_case_sync_updates
+from casexml.apps.phone.data_providers.case.xml_cache import (
+    get_xml_for_updates,
+)
 from casexml.apps.phone.tasks import ASYNC_RESTORE_SENT
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.sql_db.routers import read_from_plproxy_standbys
-from corehq.toggles import LIVEQUERY_READ_FROM_STANDBYS, NAMESPACE_USER
+from corehq.toggles import (
+    LIVEQUERY_READ_FROM_STANDBYS,
+    LIVEQUERY_RECURSIVE_INDICES,
+    NAMESPACE_USER,
+)
 from corehq.util.datadog.utils import case_load_counter
 
 
@@ -187,7 +191,7 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
             if index.relationship == 'extension'
         }
         check_cases = list(set(case_ids) - open_cases)
-        rows = accessor.get_closed_and_deleted_ids(check_cases)
+        rows = related_accessor.get_closed_and_deleted_ids(check_cases)
         for case_id, closed, deleted in rows:
             if deleted:
                 deleted_ids.add(case_id)
@@ -215,6 +219,12 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
             owned_ids = accessor.get_case_ids_by_owners(owner_ids, closed=False)
             debug("owned: %r", owned_ids)
 
+        if LIVEQUERY_RECURSIVE_INDICES.enabled(restore_state.restore_user.user_id, NAMESPACE_USER):
+            with timing_context("get_related_indices_recursive({} cases)".format(len(owned_ids))):
+                related_accessor = CaseGraph(accessor, owned_ids)
+        else:
+            related_accessor = accessor
+
         next_ids = all_ids = set(owned_ids)
         owned_ids = set(owned_ids)  # owned, open case ids (may be extensions)
         open_ids = set(owned_ids)
@@ -222,7 +232,7 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
             exclude = set(chain.from_iterable(seen_ix[id] for id in next_ids))
             with timing_context("get_related_indices({} cases, {} seen)".format(
                     len(next_ids), len(exclude))):
-                related = accessor.get_related_indices(list(next_ids), exclude)
+                related = related_accessor.get_related_indices(list(next_ids), exclude)
                 if not related:
                     break
                 update_open_and_deleted_ids(related)
@@ -270,6 +280,43 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
             )
 
 
+class CaseGraph(object):
+    """Indices and closed/deleted status of all cases related to a set of cases
+
+    The whole graph is fetched with one database call and then serves the
+    `get_related_indices` and `get_closed_and_deleted_ids` queries made by
+    `do_livequery` from memory. It may contain more cases than livequery
+    visits since it is not pruned by liveness rules.
+    """
+
+    def __init__(self, accessor, case_ids):
+        indices, closed_and_deleted = accessor.get_related_indices_recursive(list(case_ids))
+        self.closed_and_deleted = {row[0]: row for row in closed_and_deleted}
+        self.indices_by_case = defaultdict(list)
+        self.extensions_by_host = defaultdict(list)
+        for index in indices:
+            self.indices_by_case[index.case_id].append(index)
+            if index.relationship == EXTENSION:
+                self.extensions_by_host[index.referenced_id].append(index)
+
+    def get_related_indices(self, case_ids, exclude_indices):
+        related = {}
+        for case_id in case_ids:
+            # parent and host indices
+            for index in self.indices_by_case.get(case_id, []):
+                related['{} {}'.format(index.case_id, index.identifier)] = index
+            # open extension indices
+            for index in self.extensions_by_host.get(case_id, []):
+                if index.case_id not in self.closed_and_deleted:
+                    related['{} {}'.format(index.case_id, index.identifier)] = index
+        return [index for key, index in related.items() if key not in exclude_indices]
+
+    def get_closed_and_deleted_ids(self, case_ids):
+        return [self.closed_and_deleted[case_id]
+            for case_id in case_ids
+            if case_id in self.closed_and_deleted]
+
+
 def discard_already_synced_cases(live_ids, restore_state, accessor):
     debug = logging.getLogger(__name__).debug
     sync_log = restore_state.last_sync_log
@@ -348,9 +395,7 @@ def compile_response(timing_context, restore_state, response, batches, update_pr
                 restore_state.domain, cases, restore_state.last_sync_log)
 
         with timing_context("get_xml_for_response (%s updates)" % len(updates)):
-            response.extend(item
-                for update in updates
-                for item in get_xml_for_response(update, restore_state))
+            response.extend(get_xml_for_updates(updates, restore_state))
 
         done += len(cases)
         update_progress(done)
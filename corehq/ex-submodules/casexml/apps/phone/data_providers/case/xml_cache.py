@@ -0,0 +1,79 @@
+"""
+Cache of serialized case XML for restores
+
+Cases shared by a group are rendered identically for every user in the group,
+so serialized ``<case>`` elements are cached by case id, last modified time,
+restore version and required updates (create/update/close). A case saved
+after its XML was cached gets a new key, so entries are never invalidated,
+they just expire.
+
+The cache is also primed when a case is saved, with the XML a fresh restore
+would need for it.
+"""
+import hashlib
+
+from django.core.cache import cache
+
+from casexml.apps.case import const
+from casexml.apps.case.xml import V2
+from casexml.apps.phone.data_providers.case.load_testing import (
+    get_xml_for_response,
+)
+from casexml.apps.phone.xml import get_case_element, tostring
+from corehq.toggles import RESTORE_CASE_XML_CACHE
+from corehq.util.datadog.gauges import datadog_counter
+
+CASE_XML_CACHE_TIMEOUT = 12 * 60 * 60
+
+
+def get_xml_for_updates(updates, restore_state):
+    """Get serialized case XML for a batch of case sync updates
+
+    :returns: List of serialized elements for all updates, in order.
+    """
+    if restore_state.loadtest_factor > 1 or not RESTORE_CASE_XML_CACHE.enabled(restore_state.domain):
+        return [item for update in updates for item in get_xml_for_response(update, restore_state)]
+
+    keys = [_get_cache_key(update.case, update.required_updates, restore_state.version)
+            for update in updates]
+    cached = cache.get_many([key for key in keys if key is not None])
+    items = []
+    rendered = {}
+    for key, update in zip(keys, updates):
+        if key in cached:
+            items.append(cached[key])
+        else:
+            xml = tostring(get_case_element(update.case, update.required_updates, restore_state.version))
+            items.append(xml)
+            if key is not None:
+                rendered[key] = xml
+    if rendered:
+        cache.set_many(rendered, CASE_XML_CACHE_TIMEOUT)
+
+    tags = ['domain:{}'.format(restore_state.domain)]
+    datadog_counter('commcare.restore.case_xml_cache.hits', len(cached), tags=tags)
+    datadog_counter('commcare.restore.case_xml_cache.misses', len(updates) - len(cached), tags=tags)
+    return items
+
+
+def cache_case_xml_for_fresh_restore(case):
+    """Cache the XML a fresh restore needs for the case"""
+    required_updates = [const.CASE_ACTION_CREATE, const.CASE_ACTION_UPDATE]
+    if case.closed:
+        required_updates.append(const.CASE_ACTION_CLOSE)
+    key = _get_cache_key(case, required_updates, V2)
+    if key is not None:
+        xml = tostring(get_case_element(case, required_updates, V2))
+        cache.set(key, xml, CASE_XML_CACHE_TIMEOUT)
+
+
+def _get_cache_key(case, required_updates, version):
+    if not case.server_modified_on:
+        return None
+    return 'restore-case-xml-{}'.format(hashlib.md5('{} {} {} {} {}'.format(
+        case.domain,
+        case.case_id,
+        case.server_modified_on.isoformat(),
+        version,
+        ','.join(sorted(required_updates)),
+    ).encode('utf-8')).hexdigest())
@@ -2,7 +2,7 @@ from django_bulk_update.helper import bulk_update as bulk_update_helper
 from django.core.management import BaseCommand
 
 from casexml.apps.phone.models import SyncLogSQL, LOG_FORMAT_SIMPLIFIED, \
-    properly_wrap_sync_log
+    properly_wrap_sync_log, synclog_to_sql_object
 
 
 class Command(BaseCommand):
@@ -23,7 +23,7 @@ class Command(BaseCommand):
             log_format=LOG_FORMAT_SIMPLIFIED
         )
         for synclog in synclogs_sql:
-            doc = properly_wrap_sync_log(synclog.doc)
+            doc = properly_wrap_sync_log(synclog.doc, synclog)
             doc.case_ids_on_phone = {'broken to force 412'}
-            synclog.doc = doc.to_json()
+            synclog_to_sql_object(doc)
         bulk_update_helper(synclogs_sql)
@@ -21,6 +21,12 @@ from casexml.apps.phone.exceptions import (
     IncompatibleSyncLogType,
     MissingSyncLog,
 )
+from casexml.apps.phone.synclog_encoding import (
+    CASE_STATE_FIELDS,
+    decode_case_state,
+    encode_case_state,
+    encode_case_state_delta,
+)
 from dimagi.ext.couchdbkit import (
     BooleanProperty,
     DateTimeProperty,
@@ -40,7 +46,11 @@ from dimagi.utils.couch import LooselyEqualDocumentSchema
 from dimagi.utils.logging import notify_exception
 
 from corehq.apps.domain.models import Domain
-from corehq.toggles import ENABLE_LOADTEST_USERS, LEGACY_SYNC_SUPPORT
+from corehq.toggles import (
+    COMPACT_SYNCLOG_CASE_STATE,
+    ENABLE_LOADTEST_USERS,
+    LEGACY_SYNC_SUPPORT,
+)
 from corehq.util.global_request import get_request_domain
 from corehq.util.soft_assert import soft_assert
 
@@ -412,7 +422,11 @@ def synclog_to_sql_object(synclog_json_object):
     ]
     for from_field, to_field in field_mapping:
         setattr(synclog, to_field, getattr(synclog_json_object, from_field, None))
-    synclog.doc = synclog_json_object.to_json()
+    if COMPACT_SYNCLOG_CASE_STATE.enabled(synclog_json_object.domain):
+        synclog.doc, synclog.case_state = synclog_json_object.to_compact_json()
+    else:
+        synclog.doc = synclog_json_object.to_json()
+        synclog.case_state = None
     return synclog
 
 
@@ -425,6 +439,8 @@ class SyncLogSQL(models.Model):
     date = models.DateTimeField(db_index=True, null=True, blank=True)
     previous_synclog_id = models.UUIDField(max_length=255, default=None, null=True, blank=True)
     doc = JSONField()
+    # case ids and index trees of the doc, see casexml.apps.phone.synclog_encoding
+    case_state = models.BinaryField(null=True)
     log_format = models.CharField(
         max_length=10,
         choices=[
@@ -574,6 +590,27 @@ def _reverse_index_map(index_map):
     return dict(reverse_indices)
 
 
+class _CaseStateProperty(object):
+    """Decodes the compact case state of the sync log on first access"""
+
+    def __get__(self, instance, owner):
+        if instance is not None:
+            instance._decode_case_state()
+        return super(_CaseStateProperty, self).__get__(instance, owner)
+
+    def __set__(self, instance, value):
+        instance._decode_case_state()
+        super(_CaseStateProperty, self).__set__(instance, value)
+
+
+class CaseStateSetProperty(_CaseStateProperty, SetProperty):
+    pass
+
+
+class CaseStateSchemaProperty(_CaseStateProperty, SchemaProperty):
+    pass
+
+
 class SimplifiedSyncLog(AbstractSyncLog):
     """
     New, simplified sync log class that is used by ownership cleanliness restore.
@@ -582,18 +619,61 @@ class SimplifiedSyncLog(AbstractSyncLog):
     lists from the SyncLog class.
     """
     log_format = StringProperty(default=LOG_FORMAT_SIMPLIFIED)
-    case_ids_on_phone = SetProperty(six.text_type)
+    case_ids_on_phone = CaseStateSetProperty(six.text_type)
     # this is a subset of case_ids_on_phone used to flag that a case is only around because it has dependencies
     # this allows us to purge it if possible from other actions
-    dependent_case_ids_on_phone = SetProperty(six.text_type)
+    dependent_case_ids_on_phone = CaseStateSetProperty(six.text_type)
     owner_ids_on_phone = SetProperty(six.text_type)
-    index_tree = SchemaProperty(IndexTree)  # index tree of subcases / children
-    extension_index_tree = SchemaProperty(IndexTree)  # index tree of extensions
-    closed_cases = SetProperty(six.text_type)
+    index_tree = CaseStateSchemaProperty(IndexTree)  # index tree of subcases / children
+    extension_index_tree = CaseStateSchemaProperty(IndexTree)  # index tree of extensions
+    closed_cases = CaseStateSetProperty(six.text_type)
     extensions_checked = BooleanProperty(default=False)
     device_id = StringProperty()
 
     _purged_cases = None
+    # compact case state (see synclog_encoding) that has not been decoded yet
+    _encoded_case_state = None
+    # compact case state and what it decoded to, to save changes as a delta
+    _decoded_case_state = None
+
+    def _decode_case_state(self):
+        if self._encoded_case_state is None:
+            return
+        encoded, self._encoded_case_state = self._encoded_case_state, None
+        state = decode_case_state(encoded)
+        self._decoded_case_state = (encoded, state)
+        # copy the state since the properties are changed in place
+        self.case_ids_on_phone = set(state['case_ids_on_phone'])
+        self.dependent_case_ids_on_phone = set(state['dependent_case_ids_on_phone'])
+        self.closed_cases = set(state['closed_cases'])
+        for field in ['index_tree', 'extension_index_tree']:
+            indices = state[field]['indices']
+            setattr(self, field, IndexTree(indices={
+                case_id: dict(case_indices) for case_id, case_indices in indices.items()
+            }))
+
+    def to_json(self):
+        self._decode_case_state()
+        return super(SimplifiedSyncLog, self).to_json()
+
+    def to_compact_json(self):
+        """Get the JSON of this sync log without its case state, and the
+        case state in the compact encoding of ``synclog_encoding``
+
+        Case state that was never accessed is returned as it was loaded,
+        and changes to case state that was loaded are encoded as a delta.
+        """
+        doc = super(SimplifiedSyncLog, self).to_json()
+        if self._encoded_case_state is not None:
+            for field in CASE_STATE_FIELDS:
+                doc.pop(field, None)
+            return doc, self._encoded_case_state
+        if self._decoded_case_state is not None:
+            encoded, previous = self._decoded_case_state
+            # the next save encodes the whole state again
+            self._decoded_case_state = None
+            return doc, encode_case_state_delta(encoded, previous, doc)
+        return doc, encode_case_state(doc)
 
     @property
     def purged_cases(self):
@@ -1024,6 +1104,9 @@ def properly_wrap_sync_log(doc, synclog_sql=None):
     synclog = SimplifiedSyncLog.wrap(doc)
     if synclog_sql:
         synclog._synclog_sql = synclog_sql
+        if synclog_sql.case_state is not None:
+            # decoded when the case state is first accessed
+            synclog._encoded_case_state = bytes(synclog_sql.case_state)
     return synclog
 
 
@@ -1052,3 +1135,7 @@ class OwnershipCleanlinessFlag(models.Model):
     class Meta(object):
         app_label = 'phone'
         unique_together = [('domain', 'owner_id')]
+
+
+# import signals
+import casexml.apps.phone.signals  # noqa: F401
@@ -6,14 +6,19 @@ import uuid
 from io import BytesIO
 from uuid import uuid4
 from distutils.version import LooseVersion
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from wsgiref.util import FileWrapper
 from xml.etree import cElementTree as ElementTree
 
+from celery._state import _task_stack, get_current_task
 from celery.exceptions import TimeoutError
 from celery.result import AsyncResult
 from django.http import HttpResponse, StreamingHttpResponse
 from django.conf import settings
+from django.db import connections
+from django.utils import translation
 from django.utils.text import slugify
 
 from casexml.apps.phone.data_providers import get_element_providers, get_async_providers
@@ -21,13 +26,24 @@ from casexml.apps.phone.exceptions import (
     InvalidSyncLogException, SyncLogUserMismatch,
     BadStateException, RestoreException
 )
-from casexml.apps.phone.restore_caching import AsyncRestoreTaskIdCache, RestorePayloadPathCache
+from casexml.apps.phone.restore_caching import (
+    AsyncRestoreTaskIdCache,
+    RestorePayloadPathCache,
+    SharedCasePayloadCache,
+)
 from casexml.apps.phone.tasks import get_async_restore_payload, ASYNC_RESTORE_SENT
 from casexml.apps.phone.utils import get_cached_items_with_count
-from corehq.toggles import EXTENSION_CASES_SYNC_ENABLED, LIVEQUERY_SYNC
+from corehq.sql_db.connections import connection_manager
+from corehq.toggles import (
+    EXTENSION_CASES_SYNC_ENABLED,
+    LIVEQUERY_SYNC,
+    PARALLEL_RESTORE_SECTIONS,
+    SHARED_RESTORE_CASE_PAYLOAD,
+)
 from corehq.util.datadog.utils import bucket_value, maybe_add_domain_tag
 from corehq.util.timer import TimingContext
 from corehq.util.datadog.gauges import datadog_counter
+from corehq.util.global_request.api import get_request, set_request
 from memoized import memoized
 from casexml.apps.phone.models import (
     get_properly_wrapped_sync_log,
@@ -55,6 +71,7 @@ from casexml.apps.phone.const import (
 from casexml.apps.phone.xml import get_sync_element, get_progress_element
 from corehq.blobs import CODES, get_blob_db
 from corehq.blobs.exceptions import NotFound
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 
 
 logger = logging.getLogger('restore')
@@ -130,6 +147,19 @@ class RestoreContent(object):
         for element in iterable:
             self.append(element)
 
+    def extend_content(self, other):
+        """Append the body of another (open) ``RestoreContent``"""
+        other.response_body.seek(0)
+        self.extend_fileobj(other.response_body, other.num_items)
+
+    def extend_fileobj(self, fileobj, num_items):
+        """Append serialized elements read from a file-like object
+
+        :param num_items: The number of items in the file's content.
+        """
+        self.num_items += num_items
+        shutil.copyfileobj(fileobj, self.response_body)
+
     def _write_to_file(self, fileobj):
         # Add 1 to num_items to account for message element
         items = (self.items_template % ('%s' % (self.num_items + 1)).encode('utf-8')) if self.items else b''
@@ -690,16 +720,146 @@ class RestoreConfig(object):
         username = self.restore_user.username
         count_items = self.params.include_item_count
         with RestoreContent(username, count_items) as content:
-            for provider in get_element_providers(self.timing_context):
-                with self.timing_context(provider.__class__.__name__):
-                    content.extend(provider.get_elements(self.restore_state))
-
-            for provider in get_async_providers(self.timing_context, async_task):
-                with self.timing_context(provider.__class__.__name__):
-                    provider.extend_response(self.restore_state, content)
+            if PARALLEL_RESTORE_SECTIONS.enabled(self.domain):
+                self._generate_sections_concurrently(content, async_task)
+            else:
+                self._write_elements(content, self.timing_context)
+                self._write_async_elements(content, async_task)
 
             return content.get_fileobj()
 
+    def _generate_sections_concurrently(self, content, async_task):
+        """Generate the element providers' section (sync, registration,
+        fixtures) in a worker thread while the case payload is generated
+
+        The sections do not depend on each other, so they are written to
+        separate files and joined in the order the phone expects.
+        """
+        self._resolve_shared_restore_state()
+        elements_timing = TimingContext('element providers')
+        thread_state = _get_thread_local_state()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._write_elements_in_thread, content, elements_timing, thread_state)
+            with RestoreContent() as case_content:
+                self._write_async_elements(case_content, async_task)
+                future.result()
+                for timer in elements_timing.root.subs:
+                    self.timing_context.peek().append(timer)
+                content.extend_content(case_content)
+
+    def _resolve_shared_restore_state(self):
+        """Load the lazily computed restore state used by the providers of
+        both threads before the threads start, so it is not loaded twice
+        or seen half set up by one of them"""
+        restore_state = self.restore_state
+        assert restore_state.current_sync_log is not None, "sync not started"
+        restore_state.last_sync_log
+        restore_state.owner_ids
+        restore_state.stock_settings
+        restore_state.loadtest_factor
+        restore_state.restore_user.project
+
+    def _write_elements_in_thread(self, content, timing_context, thread_state):
+        try:
+            with _restore_thread_local_state(thread_state), timing_context:
+                self._write_elements(content, timing_context)
+        finally:
+            # database connections and sessions are local to the worker thread
+            connection_manager.close_scoped_sessions()
+            connections.close_all()
+
+    def _write_elements(self, content, timing_context):
+        for provider in get_element_providers(timing_context):
+            with timing_context(provider.__class__.__name__):
+                content.extend(provider.get_elements(self.restore_state))
+
+    def _write_async_elements(self, content, async_task):
+        shared_cache = self._get_shared_case_payload_cache()
+        if shared_cache is None:
+            self._generate_async_elements(content, async_task)
+            return
+
+        if not self.overwrite_cache and self._extend_with_shared_case_payload(content, shared_cache):
+            self._record_shared_case_payload('hit')
+            return
+
+        self._record_shared_case_payload('miss')
+        generated_on = datetime.utcnow()
+        with RestoreContent() as section:
+            self._generate_async_elements(section, async_task)
+            self._save_shared_case_payload(section, shared_cache, generated_on)
+            content.extend_content(section)
+
+    def _generate_async_elements(self, content, async_task):
+        for provider in get_async_providers(self.timing_context, async_task):
+            with self.timing_context(provider.__class__.__name__):
+                provider.extend_response(self.restore_state, content)
+
+    def _get_shared_case_payload_cache(self):
+        """Get the cache of case payloads shared by users with the same
+        owner ids, if this restore can use it
+
+        Only fresh livequery restores are shared since their case payload
+        depends on nothing but the owner ids. A user's own id is always
+        one of their owner ids, so users who own no open cases themselves
+        (only their groups and locations do) share the payload of the
+        other owner ids.
+        """
+        restore_state = self.restore_state
+        if not (restore_state.is_livequery
+                and restore_state.is_initial
+                and restore_state.loadtest_factor <= 1
+                and SHARED_RESTORE_CASE_PAYLOAD.enabled(self.domain)):
+            return None
+        user_id = self.restore_user.user_id
+        if CaseAccessors(self.domain).get_case_ids_by_owners([user_id], closed=False):
+            return None
+        shared_owner_ids = restore_state.owner_ids - {user_id}
+        if not shared_owner_ids:
+            return None
+        return SharedCasePayloadCache(self.domain, shared_owner_ids, restore_state.version)
+
+    def _extend_with_shared_case_payload(self, content, shared_cache):
+        shared = shared_cache.get_value()
+        if not shared:
+            return False
+        with self.timing_context('shared_case_payload'):
+            try:
+                fileobj = get_blob_db().get(key=shared['name'])
+            except NotFound:
+                return False
+            with fileobj:
+                content.extend_fileobj(fileobj, shared['num_items'])
+        sync_log = self.restore_state.current_sync_log
+        sync_log.case_ids_on_phone = set(shared['case_ids'])
+        # cases modified after the payload was generated are sent on the next sync
+        sync_log.date = min(sync_log.date, shared['date'])
+        return True
+
+    def _save_shared_case_payload(self, section, shared_cache, generated_on):
+        name = 'restore-shared-cases-{}.xml'.format(uuid4().hex)
+        section.response_body.seek(0)
+        get_blob_db().put(
+            NoClose(section.response_body),
+            domain=self.domain,
+            parent_id=self.restore_user.user_id,
+            type_code=CODES.restore,
+            key=name,
+            timeout=max(shared_cache.timeout // 60, 60),
+        )
+        shared_cache.set_value({
+            'name': name,
+            'num_items': section.num_items,
+            'case_ids': list(self.restore_state.current_sync_log.case_ids_on_phone),
+            'date': generated_on,
+        })
+
+    def _record_shared_case_payload(self, result):
+        datadog_counter('commcare.restores.shared_case_payload', tags=[
+            'domain:{}'.format(self.domain),
+            'result:{}'.format(result),
+        ])
+
     def set_cached_payload_if_necessary(self, fileobj, duration, is_async):
         # must cache if the duration was longer than the threshold
         is_long_restore = duration > timedelta(seconds=INITIAL_SYNC_CACHE_THRESHOLD)
@@ -816,6 +976,7 @@ RESTORE_SEGMENTS = {
     "wait_for_task_to_start": "waiting",
     "FixtureElementProvider": "fixtures",
     "CasePayloadProvider": "cases",
+    "shared_case_payload": "shared_cases",
 }
 
 
@@ -833,3 +994,25 @@ class NoClose(object):
 
     def close(self):
         pass
+
+
+def _get_thread_local_state():
+    """Get the thread local state element providers may read: the active
+    language, the current request and the current celery task"""
+    return translation.get_language(), get_request(), get_current_task()
+
+
+@contextmanager
+def _restore_thread_local_state(thread_state):
+    """Set the state from ``_get_thread_local_state`` in a worker thread"""
+    language, request, task = thread_state
+    set_request(request)
+    if task is not None:
+        _task_stack.push(task)
+    try:
+        with translation.override(language):
+            yield
+    finally:
+        if task is not None:
+            _task_stack.pop()
+        set_request(None)
@@ -1,7 +1,12 @@
 import hashlib
 import logging
 import datetime
-from casexml.apps.phone.const import RESTORE_CACHE_KEY_PREFIX, ASYNC_RESTORE_CACHE_KEY_PREFIX
+from casexml.apps.phone.const import (
+    ASYNC_RESTORE_CACHE_KEY_PREFIX,
+    RESTORE_CACHE_KEY_PREFIX,
+    SHARED_CASE_PAYLOAD_CACHE_KEY_PREFIX,
+    SHARED_CASE_PAYLOAD_TIMEOUT,
+)
 from corehq.toggles import ENABLE_LOADTEST_USERS
 from corehq.util.quickcache import quickcache
 from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
@@ -97,3 +102,29 @@ class RestorePayloadPathCache(_RestoreCache):
 class AsyncRestoreTaskIdCache(_RestoreCache):
     timeout = 24 * 60 * 60
     prefix = ASYNC_RESTORE_CACHE_KEY_PREFIX
+
+
+class SharedCasePayloadCache(_CacheAccessor):
+    """Pointer to the case payload of a recent fresh restore
+
+    The case payload of a fresh livequery restore depends only on the
+    owner ids of the user, so it is shared by all users with the same
+    owner ids. The value is a dict with the blob ``name`` of the payload,
+    its ``num_items``, the ``case_ids`` it contains and the ``date`` it
+    was generated.
+    """
+    timeout = SHARED_CASE_PAYLOAD_TIMEOUT
+
+    def __init__(self, domain, owner_ids, version):
+        self.cache_key = self._make_cache_key(domain, owner_ids, version)
+        self.debug_info = (self.__class__.__name__, domain, version)
+
+    @classmethod
+    def _make_cache_key(cls, domain, owner_ids, version):
+        hashable_key = ','.join([str(part) for part in [
+            domain,
+            SHARED_CASE_PAYLOAD_CACHE_KEY_PREFIX,
+            version,
+            _get_domain_freshness_token(domain),
+        ] + sorted(owner_ids)])
+        return hashlib.md5(hashable_key.encode('utf-8')).hexdigest()
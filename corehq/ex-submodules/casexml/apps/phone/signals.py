@@ -0,0 +1,13 @@
+from casexml.apps.case.signals import case_post_save
+from corehq.toggles import RESTORE_CASE_XML_CACHE
+
+
+def prime_case_xml_cache(sender, case, **kwargs):
+    from casexml.apps.phone.data_providers.case.xml_cache import (
+        cache_case_xml_for_fresh_restore,
+    )
+    if RESTORE_CASE_XML_CACHE.enabled(case.domain):
+        cache_case_xml_for_fresh_restore(case)
+
+
+case_post_save.connect(prime_case_xml_cache, dispatch_uid='prime_restore_case_xml_cache')
@@ -0,0 +1,296 @@
+"""
+Compact binary encoding of the case state of a sync log
+
+The case ids and index trees of a ``SimplifiedSyncLog`` make up nearly all
+of its size. Stored as JSON they take tens of MB for users with 100k cases.
+This module encodes them as:
+
+- a table of every case id in the state, sorted, with UUIDs packed into
+  16 bytes (the formatting of each id is preserved exactly);
+- each case id set as a sorted array of table positions;
+- each index tree as arrays of table positions of the indexing cases, the
+  number of indices of each, and the identifier and referenced case
+  position of each index.
+
+Numbers are packed as little endian unsigned 32 bit integer arrays so that
+both directions run at C speed, and the result is compressed with zlib.
+``encode_case_state`` removes the case state fields from a sync log doc and
+``decode_case_state`` returns them in the doc format again.
+
+Form submissions only change a few cases of the state, so rather than
+encoding the whole state again ``encode_case_state_delta`` appends the case
+ids added to and removed from each set, and the changed index tree entries,
+as a delta frame. Decoding applies the deltas in order. Once there are
+``MAX_DELTA_FRAMES`` deltas, or they are larger than the full state, the
+whole state is encoded again.
+"""
+import binascii
+import re
+import struct
+import sys
+import zlib
+from array import array
+
+ENCODING_VERSION = 2
+
+FULL_FRAME = 0
+DELTA_FRAME = 1
+
+MAX_DELTA_FRAMES = 20
+
+CASE_ID_SET_FIELDS = [
+    'case_ids_on_phone',
+    'dependent_case_ids_on_phone',
+    'closed_cases',
+]
+INDEX_TREE_FIELDS = [
+    'index_tree',
+    'extension_index_tree',
+]
+CASE_STATE_FIELDS = CASE_ID_SET_FIELDS + INDEX_TREE_FIELDS
+
+_HEX_ID = re.compile(r'^[0-9a-f]{32}$')
+_DASHED_ID = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+_COUNT = struct.Struct('<I')
+# version, frame type and length of the compressed frame
+_FRAME_HEADER = struct.Struct('<BBI')
+
+
+class CaseStateEncodingError(Exception):
+    pass
+
+
+def encode_case_state(doc):
+    """Remove the case state fields from a sync log doc and encode them
+
+    :param doc: Sync log JSON doc. It is modified in place.
+    :returns: Encoded case state (bytes).
+    """
+    sets, trees = _pop_case_state(doc)
+    return _frame(FULL_FRAME, _encode_state(sets, trees))
+
+
+def encode_case_state_delta(data, previous, doc):
+    """Remove the case state fields from a sync log doc and append their
+    changes to previously encoded case state
+
+    :param data: Encoded case state.
+    :param previous: The case state ``data`` decodes to, as returned by
+    ``decode_case_state``. Set fields may be sets.
+    :param doc: Sync log JSON doc. It is modified in place.
+    :returns: Encoded case state (bytes).
+    """
+    sets, trees = _pop_case_state(doc)
+    frames = list(_iter_frames(bytes(data)))
+    delta_size = sum(len(body) for frame_type, body in frames[1:])
+    if len(frames) > MAX_DELTA_FRAMES or delta_size > len(frames[0][1]):
+        return _frame(FULL_FRAME, _encode_state(sets, trees))
+
+    added_sets = []
+    removed_sets = []
+    for field, case_ids in zip(CASE_ID_SET_FIELDS, sets):
+        case_ids = set(case_ids)
+        previous_ids = set(previous[field])
+        added_sets.append(case_ids - previous_ids)
+        removed_sets.append(previous_ids - case_ids)
+    changed_trees = []
+    removed_trees = []
+    for field, indices in zip(INDEX_TREE_FIELDS, trees):
+        previous_indices = previous[field]['indices']
+        changed_trees.append({
+            case_id: case_indices for case_id, case_indices in indices.items()
+            if previous_indices.get(case_id) != case_indices
+        })
+        removed_trees.append({case_id: {} for case_id in previous_indices if case_id not in indices})
+
+    payload = _encode_state(added_sets, changed_trees) + _encode_state(removed_sets, removed_trees)
+    return bytes(data) + _frame(DELTA_FRAME, payload)
+
+
+def decode_case_state(data):
+    """Decode case state encoded by ``encode_case_state``
+
+    :returns: A dict of the case state fields in sync log doc format.
+    """
+    frames = _iter_frames(bytes(data))
+    frame_type, body = next(frames, (None, None))
+    if frame_type != FULL_FRAME:
+        raise CaseStateEncodingError('Case state does not start with a full frame')
+    reader = _Reader(zlib.decompress(body))
+    sets, trees = _decode_state(reader)
+    deltas = False
+    for frame_type, body in frames:
+        if frame_type != DELTA_FRAME:
+            raise CaseStateEncodingError('Unknown case state frame type')
+        if not deltas:
+            sets = [set(case_ids) for case_ids in sets]
+            deltas = True
+        reader = _Reader(zlib.decompress(body))
+        added_sets, changed_trees = _decode_state(reader)
+        removed_sets, removed_trees = _decode_state(reader)
+        for case_ids, added, removed in zip(sets, added_sets, removed_sets):
+            case_ids.difference_update(removed)
+            case_ids.update(added)
+        for indices, changed, removed in zip(trees, changed_trees, removed_trees):
+            for case_id in removed:
+                del indices[case_id]
+            indices.update(changed)
+
+    state = {}
+    for field, case_ids in zip(CASE_ID_SET_FIELDS, sets):
+        state[field] = list(case_ids) if deltas else case_ids
+    for field, indices in zip(INDEX_TREE_FIELDS, trees):
+        state[field] = {'doc_type': 'IndexTree', 'indices': indices}
+    return state
+
+
+def _pop_case_state(doc):
+    sets = [doc.pop(field, None) or [] for field in CASE_ID_SET_FIELDS]
+    trees = [(doc.pop(field, None) or {}).get('indices') or {} for field in INDEX_TREE_FIELDS]
+    return sets, trees
+
+
+def _frame(frame_type, payload):
+    # packed UUIDs do not compress, favor speed
+    body = zlib.compress(payload, 1)
+    return _FRAME_HEADER.pack(ENCODING_VERSION, frame_type, len(body)) + body
+
+
+def _iter_frames(data):
+    reader = _Reader(data)
+    while reader.position < len(data):
+        version, frame_type, length = _FRAME_HEADER.unpack(reader.read_bytes(_FRAME_HEADER.size))
+        if version != ENCODING_VERSION:
+            raise CaseStateEncodingError('Unknown case state encoding version')
+        yield frame_type, reader.read_bytes(length)
+
+
+def _encode_state(sets, trees):
+    all_ids = set()
+    identifiers = set()
+    for case_ids in sets:
+        all_ids.update(case_ids)
+    for indices in trees:
+        all_ids.update(indices)
+        for case_indices in indices.values():
+            all_ids.update(case_indices.values())
+            identifiers.update(case_indices)
+
+    hex_ids = []
+    dashed_ids = []
+    other_ids = []
+    for case_id in all_ids:
+        if _HEX_ID.match(case_id):
+            hex_ids.append(case_id)
+        elif _DASHED_ID.match(case_id):
+            dashed_ids.append(case_id)
+        else:
+            other_ids.append(case_id)
+    hex_ids.sort()
+    dashed_ids.sort()
+    other_ids.sort()
+    positions = {case_id: i for i, case_id in enumerate(hex_ids + dashed_ids + other_ids)}
+    identifiers = sorted(identifiers)
+    identifier_positions = {identifier: i for i, identifier in enumerate(identifiers)}
+
+    parts = [
+        _COUNT.pack(len(hex_ids)),
+        _COUNT.pack(len(dashed_ids)),
+        binascii.unhexlify(''.join(hex_ids)),
+        binascii.unhexlify(''.join(dashed_ids).replace('-', '')),
+        _pack_strings(other_ids),
+        _pack_strings(identifiers),
+    ]
+
+    for case_ids in sets:
+        parts.append(_pack_ints(sorted(positions[case_id] for case_id in case_ids)))
+
+    for indices in trees:
+        case_ids = sorted(indices, key=positions.__getitem__)
+        all_indices = [sorted(indices[case_id].items()) for case_id in case_ids]
+        parts.append(_pack_ints([positions[case_id] for case_id in case_ids]))
+        parts.append(_pack_ints([len(case_indices) for case_indices in all_indices]))
+        parts.append(_pack_ints([identifier_positions[identifier]
+            for case_indices in all_indices for identifier, referenced_id in case_indices]))
+        parts.append(_pack_ints([positions[referenced_id]
+            for case_indices in all_indices for identifier, referenced_id in case_indices]))
+
+    return b''.join(parts)
+
+
+def _decode_state(reader):
+    num_hex = reader.read_count()
+    num_dashed = reader.read_count()
+    hex_ids = binascii.hexlify(reader.read_bytes(16 * num_hex)).decode('ascii')
+    table = [hex_ids[i:i + 32] for i in range(0, len(hex_ids), 32)]
+    dashed_ids = binascii.hexlify(reader.read_bytes(16 * num_dashed)).decode('ascii')
+    table.extend(
+        '-'.join([h[0:8], h[8:12], h[12:16], h[16:20], h[20:32]])
+        for h in (dashed_ids[i:i + 32] for i in range(0, len(dashed_ids), 32))
+    )
+    table.extend(reader.read_strings())
+    identifiers = reader.read_strings()
+
+    sets = []
+    for _ in CASE_ID_SET_FIELDS:
+        sets.append([table[position] for position in reader.read_ints()])
+    trees = []
+    for _ in INDEX_TREE_FIELDS:
+        case_positions = reader.read_ints()
+        counts = reader.read_ints()
+        index_identifiers = reader.read_ints()
+        referenced_positions = reader.read_ints()
+        indices = {}
+        start = 0
+        for case_position, count in zip(case_positions, counts):
+            end = start + count
+            indices[table[case_position]] = {
+                identifiers[identifier]: table[referenced]
+                for identifier, referenced in zip(
+                    index_identifiers[start:end], referenced_positions[start:end])
+            }
+            start = end
+        trees.append(indices)
+    return sets, trees
+
+
+def _pack_ints(values):
+    values = array('I', values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return _COUNT.pack(len(values)) + values.tobytes()
+
+
+def _pack_strings(strings):
+    encoded = [value.encode('utf-8') for value in strings]
+    return _pack_ints([len(value) for value in encoded]) + b''.join(encoded)
+
+
+class _Reader(object):
+
+    def __init__(self, data, position=0):
+        self.data = data
+        self.position = position
+
+    def read_bytes(self, length):
+        if self.position + length > len(self.data):
+            raise CaseStateEncodingError('Truncated case state')
+        value = self.data[self.position:self.position + length]
+        self.position += length
+        return value
+
+    def read_count(self):
+        return _COUNT.unpack(self.read_bytes(_COUNT.size))[0]
+
+    def read_ints(self):
+        values = array('I')
+        values.frombytes(self.read_bytes(self.read_count() * values.itemsize))
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values
+
+    def read_strings(self):
+        strings = []
+        for length in self.read_ints():
+            strings.append(self.read_bytes(length).decode('utf-8'))
+        return strings
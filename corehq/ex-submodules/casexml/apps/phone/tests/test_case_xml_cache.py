@@ -0,0 +1,71 @@
+import datetime
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from mock import Mock, patch
+
+from casexml.apps.case import const
+from casexml.apps.case.models import CommCareCase
+from casexml.apps.case.xml import V2
+from casexml.apps.phone.data_providers.case.utils import CaseSyncUpdate
+from casexml.apps.phone.data_providers.case.xml_cache import (
+    cache_case_xml_for_fresh_restore,
+    get_xml_for_updates,
+)
+from corehq.util.test_utils import flag_enabled
+
+FRESH_RESTORE_UPDATES = [const.CASE_ACTION_CREATE, const.CASE_ACTION_UPDATE]
+
+
+@flag_enabled('RESTORE_CASE_XML_CACHE')
+class TestCaseXMLCache(SimpleTestCase):
+
+    def setUp(self):
+        cache = LocMemCache('restore-case-xml-test', {})
+        # locmem caches with the same name share their entries
+        self.addCleanup(cache.clear)
+        patcher = patch('casexml.apps.phone.data_providers.case.xml_cache.cache', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.case = CommCareCase(
+            _id='melisandre',
+            domain='winterfell',
+            opened_on=datetime.datetime(2016, 5, 31),
+            modified_on=datetime.datetime(2016, 5, 31),
+            server_modified_on=datetime.datetime(2016, 5, 31),
+            type='priestess',
+            closed=False,
+            name='melisandre',
+            owner_id='lordoflight',
+        )
+        self.restore_state = Mock(domain='winterfell', version=V2, loadtest_factor=1)
+
+    def _get_xml(self, required_updates=FRESH_RESTORE_UPDATES):
+        update = CaseSyncUpdate(self.case, None, required_updates=required_updates)
+        return get_xml_for_updates([update], self.restore_state)
+
+    def _assert_rendered(self, rendered, required_updates=FRESH_RESTORE_UPDATES):
+        with patch('casexml.apps.phone.data_providers.case.xml_cache.get_case_element',
+                   return_value=None) as get_case_element, \
+                patch('casexml.apps.phone.data_providers.case.xml_cache.tostring', lambda element: b''):
+            self._get_xml(required_updates)
+        self.assertEqual(get_case_element.called, rendered)
+
+    def test_cached(self):
+        xml = self._get_xml()
+        self._assert_rendered(False)
+        self.assertEqual(self._get_xml(), xml)
+
+    def test_modified_case(self):
+        self._get_xml()
+        self.case.server_modified_on = datetime.datetime(2016, 6, 1)
+        self._assert_rendered(True)
+
+    def test_required_updates(self):
+        self._get_xml()
+        self._assert_rendered(True, [const.CASE_ACTION_UPDATE])
+
+    def test_primed_on_save(self):
+        cache_case_xml_for_fresh_restore(self.case)
+        self._assert_rendered(False)
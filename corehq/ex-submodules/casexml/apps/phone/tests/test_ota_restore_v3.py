@@ -1,7 +1,9 @@
 import six
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
+from django.utils import translation
 from django.test.testcases import SimpleTestCase
 from django.test.utils import override_settings
+from mock import patch
 from corehq.apps.users.dbaccessors.all_commcare_users import delete_all_users
 from corehq.apps.domain.models import Domain
 from casexml.apps.case.tests.util import (
@@ -12,6 +14,8 @@ from casexml.apps.case.mock import CaseBlock
 from casexml.apps.phone.restore import RestoreContent
 from casexml.apps.phone.tests.utils import create_restore_user
 from casexml.apps.phone.utils import MockDevice
+from corehq.util.global_request.api import get_request, set_request
+from corehq.util.test_utils import flag_enabled
 
 
 class OtaV3RestoreTest(TestCase):
@@ -42,6 +46,44 @@ class OtaV3RestoreTest(TestCase):
         ))
         self.assertIn(case_id, device.sync().cases)
 
+    def test_parallel_restore_sections(self):
+        restore_user = create_restore_user(domain=self.domain)
+        device = MockDevice(self.project, restore_user)
+        device.post_changes(CaseBlock(
+            create=True,
+            case_id='my-case-id',
+            user_id=restore_user.user_id,
+            owner_id=restore_user.user_id,
+            case_type='test-case-type',
+        ))
+        sequential = device.restore(items=True, overwrite_cache=True)
+        with flag_enabled('PARALLEL_RESTORE_SECTIONS'):
+            parallel = device.restore(items=True, overwrite_cache=True)
+        self.assertIn('my-case-id', parallel.cases)
+        # only the sync token differs
+        self.assertEqual(
+            sequential.payload.replace(sequential.restore_id.encode('utf-8'), b''),
+            parallel.payload.replace(parallel.restore_id.encode('utf-8'), b''),
+        )
+
+    def test_parallel_restore_sections_thread_local_state(self):
+        seen = []
+
+        class Provider(object):
+            def get_elements(self, restore_state):
+                seen.append((translation.get_language(), get_request()))
+                return []
+
+        restore_user = create_restore_user(domain=self.domain)
+        device = MockDevice(self.project, restore_user)
+        request = RequestFactory().get('/')
+        set_request(request)
+        self.addCleanup(set_request, None)
+        with flag_enabled('PARALLEL_RESTORE_SECTIONS'), translation.override('fra'), \
+                patch('casexml.apps.phone.restore.get_element_providers', return_value=[Provider()]):
+            device.restore(items=True, overwrite_cache=True)
+        self.assertEqual(seen, [('fra', request)])
+
 
 class TestRestoreContent(SimpleTestCase):
 
@@ -75,3 +117,13 @@ class TestRestoreContent(SimpleTestCase):
             response.append(body.encode('utf-8'))
             with response.get_fileobj() as fileobj:
                 self.assertEqual(expected, fileobj.read().decode('utf-8'))
+
+    def test_extend_content(self):
+        user = 'user1'
+        expected = self._expected(user, '<elem>data0</elem><elem>data1</elem>', items=3)
+        with RestoreContent(user, True) as response, RestoreContent() as section:
+            response.append(b'<elem>data0</elem>')
+            section.append(b'<elem>data1</elem>')
+            response.extend_content(section)
+            with response.get_fileobj() as fileobj:
+                self.assertEqual(expected, fileobj.read().decode('utf-8'))
@@ -8,7 +8,7 @@ from mock import patch
 
 from casexml.apps.case.util import post_case_blocks
 from casexml.apps.phone.exceptions import RestoreException
-from casexml.apps.phone.restore_caching import RestorePayloadPathCache
+from casexml.apps.phone.restore_caching import RestorePayloadPathCache, invalidate_restore_cache
 from casexml.apps.case.mock import CaseBlock, CaseStructure, CaseIndex
 from casexml.apps.phone.tests.utils import create_restore_user
 from casexml.apps.phone.utils import get_restore_config, MockDevice
@@ -825,6 +825,12 @@ class LiveQuerySyncDeletedCasesTestSQL(LiveQuerySyncDeletedCasesTest):
     pass
 
 
+@use_sql_backend
+@flag_enabled('LIVEQUERY_RECURSIVE_INDICES')
+class LiveQueryRecursiveIndicesSyncDeletedCasesTestSQL(LiveQuerySyncDeletedCasesTest):
+    pass
+
+
 class ExtensionCasesSyncTokenUpdates(BaseSyncTest):
     """Makes sure the extension case trees are propertly updated
     """
@@ -1066,6 +1072,12 @@ class LiveQueryExtensionCasesSyncTokenUpdatesSQL(LiveQueryExtensionCasesSyncToke
     pass
 
 
+@use_sql_backend
+@flag_enabled('LIVEQUERY_RECURSIVE_INDICES')
+class LiveQueryRecursiveIndicesExtensionCasesSyncTokenUpdatesSQL(LiveQueryExtensionCasesSyncTokenUpdates):
+    pass
+
+
 class ExtensionCasesFirstSync(BaseSyncTest):
 
     def setUp(self):
@@ -1109,6 +1121,12 @@ class LiveQueryExtensionCasesFirstSyncSQL(LiveQueryExtensionCasesFirstSync):
     pass
 
 
+@use_sql_backend
+@flag_enabled('LIVEQUERY_RECURSIVE_INDICES')
+class LiveQueryRecursiveIndicesExtensionCasesFirstSyncSQL(LiveQueryExtensionCasesFirstSync):
+    pass
+
+
 class ChangingOwnershipTest(BaseSyncTest):
 
     def test_remove_user_from_group(self):
@@ -1848,6 +1866,70 @@ class LiveQueryMultiUserSyncTestSQL(LiveQueryMultiUserSyncTest):
     pass
 
 
+@use_sql_backend
+@flag_enabled('SHARED_RESTORE_CASE_PAYLOAD')
+class SharedCasePayloadTestSQL(BaseSyncTest):
+    """
+    Tests fresh restores sharing the case payload of users with the same owners
+    """
+    restore_options = {'case_sync': LIVEQUERY}
+
+    @classmethod
+    def setUpClass(cls):
+        super(SharedCasePayloadTestSQL, cls).setUpClass()
+        cls.other_user = create_restore_user(
+            cls.project.name,
+            username=OTHER_USERNAME,
+        )
+        cls.shared_group = Group(
+            domain=cls.project.name,
+            name='shared_group',
+            case_sharing=True,
+            users=[cls.other_user.user_id, cls.user.user_id]
+        )
+        cls.shared_group.save()
+
+    def setUp(self):
+        super(SharedCasePayloadTestSQL, self).setUp()
+        invalidate_restore_cache(self.project.name)
+        self.web = self.get_device(default_owner_id=self.shared_group._id)
+        self.web.post_changes(case_id='shared', create=True)
+
+    def _restore_other_user(self):
+        with patch.object(RestoreConfig, '_generate_async_elements',
+                          autospec=True, side_effect=RestoreConfig._generate_async_elements) as generate:
+            result = self.get_device(user=self.other_user).sync()
+        return result, generate.called
+
+    def test_shared_payload(self):
+        self.get_device().sync()
+        result, generated = self._restore_other_user()
+        self.assertFalse(generated)
+        self.assertEqual(set(result.cases), {'shared'})
+        self.assertEqual(result.log.case_ids_on_phone, {'shared'})
+
+    def test_invalidated(self):
+        self.get_device().sync()
+        invalidate_restore_cache(self.project.name)
+        result, generated = self._restore_other_user()
+        self.assertTrue(generated)
+        self.assertEqual(set(result.cases), {'shared'})
+
+    def test_user_owns_cases(self):
+        self.get_device().sync()
+        self.get_device(user=self.other_user).post_changes(case_id='own', create=True)
+        result, generated = self._restore_other_user()
+        self.assertTrue(generated)
+        self.assertEqual(set(result.cases), {'shared', 'own'})
+
+    def test_case_modified_after_payload(self):
+        self.get_device().sync()
+        self.web.post_changes(case_id='shared', update={'color': 'blue'})
+        device = self.get_device(user=self.other_user)
+        device.sync()
+        self.assertIn('shared', device.sync().cases)
+
+
 class SteadyStateExtensionSyncTest(BaseSyncTest):
     """
     Test that doing multiple clean syncs with extensions does what we think it will
@@ -0,0 +1,83 @@
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from casexml.apps.phone.synclog_encoding import (
+    CASE_STATE_FIELDS,
+    decode_case_state,
+    encode_case_state,
+    encode_case_state_delta,
+)
+
+HEX_ID = '6a5f2c3e0d9b4c5aa1e2f3b4c5d6e7f8'
+DASHED_ID = '0e1d2c3b-4a59-4867-9f8e-7d6c5b4a3928'
+OTHER_ID = 'not-a-uuid'
+
+
+class TestSyncLogEncoding(SimpleTestCase):
+
+    def _doc(self):
+        return {
+            '_id': 'abc',
+            'case_ids_on_phone': [HEX_ID, DASHED_ID, OTHER_ID],
+            'dependent_case_ids_on_phone': [DASHED_ID],
+            'closed_cases': [],
+            'index_tree': {'doc_type': 'IndexTree', 'indices': {
+                HEX_ID: {'parent': DASHED_ID},
+                OTHER_ID: {'parent': HEX_ID, 'mother': DASHED_ID},
+            }},
+            'extension_index_tree': {'doc_type': 'IndexTree', 'indices': {
+                DASHED_ID: {'host': 'unknown é'},
+            }},
+        }
+
+    def test_round_trip(self):
+        doc = self._doc()
+        state = decode_case_state(encode_case_state(doc))
+        expected = self._doc()
+        for field in ['case_ids_on_phone', 'dependent_case_ids_on_phone', 'closed_cases']:
+            self.assertEqual(set(state[field]), set(expected[field]))
+        self.assertEqual(state['index_tree'], expected['index_tree'])
+        self.assertEqual(state['extension_index_tree'], expected['extension_index_tree'])
+
+    def test_fields_removed_from_doc(self):
+        doc = self._doc()
+        encode_case_state(doc)
+        self.assertEqual(doc, {'_id': 'abc'})
+
+    def test_empty(self):
+        state = decode_case_state(encode_case_state({}))
+        self.assertEqual(set(state), set(CASE_STATE_FIELDS))
+        self.assertEqual(state['case_ids_on_phone'], [])
+        self.assertEqual(state['index_tree'], {'doc_type': 'IndexTree', 'indices': {}})
+
+    def test_delta(self):
+        encoded = encode_case_state(self._doc())
+        previous = decode_case_state(encoded)
+        doc = self._doc()
+        doc['case_ids_on_phone'] = [HEX_ID, OTHER_ID, 'new']
+        doc['dependent_case_ids_on_phone'] = []
+        doc['index_tree']['indices'][HEX_ID] = {'parent': 'new'}
+        del doc['index_tree']['indices'][OTHER_ID]
+        expected = self._doc_state(doc)
+
+        encoded_delta = encode_case_state_delta(encoded, previous, doc)
+        self.assertEqual(doc, {'_id': 'abc'})
+        self.assertTrue(encoded_delta.startswith(encoded))
+        self.assertEqual(self._doc_state(decode_case_state(encoded_delta)), expected)
+
+    def test_deltas_replaced_by_full_state(self):
+        doc = self._doc()
+        encoded = encode_case_state(dict(doc))
+        with patch('casexml.apps.phone.synclog_encoding.MAX_DELTA_FRAMES', 2):
+            for case_id in ['new1', 'new2', 'new3']:
+                previous = decode_case_state(encoded)
+                doc['case_ids_on_phone'] = doc['case_ids_on_phone'] + [case_id]
+                encoded = encode_case_state_delta(encoded, previous, dict(doc))
+        self.assertEqual(encoded, encode_case_state(dict(doc)))
+        self.assertEqual(self._doc_state(decode_case_state(encoded)), self._doc_state(doc))
+
+    def _doc_state(self, doc):
+        state = {field: set(doc[field]) for field in ['case_ids_on_phone', 'dependent_case_ids_on_phone']}
+        state['index_tree'] = doc['index_tree']
+        return state
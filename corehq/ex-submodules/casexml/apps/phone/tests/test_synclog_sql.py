@@ -2,7 +2,15 @@ from datetime import datetime
 
 from django.test import TestCase
 
-from casexml.apps.phone.models import SyncLogSQL, SimplifiedSyncLog
+from mock import patch
+
+from casexml.apps.phone import models
+from casexml.apps.phone.models import (
+    SimplifiedSyncLog,
+    SyncLogSQL,
+    get_properly_wrapped_sync_log,
+)
+from corehq.util.test_utils import flag_enabled
 
 
 class SyncLogQueryTest(TestCase):
@@ -28,3 +36,69 @@ class SyncLogQueryTest(TestCase):
         with self.assertNumQueries(1):
             # previously this was 2 queries, fetch + update
             synclog.save()
+
+    @flag_enabled('COMPACT_SYNCLOG_CASE_STATE')
+    def test_compact_case_state(self):
+        synclog = SimplifiedSyncLog(
+            domain='test',
+            user_id='user1',
+            date=datetime(2015, 7, 1, 0, 0),
+            case_ids_on_phone={'parent', 'child'},
+            dependent_case_ids_on_phone={'parent'},
+        )
+        synclog.index_tree.set_index('child', 'parent', 'parent')
+        synclog.save()
+
+        synclog_sql = SyncLogSQL.objects.get(synclog_id=synclog._id)
+        self.assertIsNotNone(synclog_sql.case_state)
+        self.assertNotIn('case_ids_on_phone', synclog_sql.doc)
+
+        wrapped = get_properly_wrapped_sync_log(synclog._id)
+        self.assertEqual(wrapped.case_ids_on_phone, {'parent', 'child'})
+        self.assertEqual(wrapped.dependent_case_ids_on_phone, {'parent'})
+        self.assertEqual(wrapped.index_tree.indices, {'child': {'parent': 'parent'}})
+
+    def _save_compact_synclog(self):
+        synclog = SimplifiedSyncLog(
+            domain='test',
+            user_id='user1',
+            date=datetime(2015, 7, 1, 0, 0),
+            case_ids_on_phone={'parent', 'child'},
+            dependent_case_ids_on_phone={'parent'},
+        )
+        synclog.index_tree.set_index('child', 'parent', 'parent')
+        synclog.save()
+        return synclog
+
+    @flag_enabled('COMPACT_SYNCLOG_CASE_STATE')
+    def test_compact_case_state_decoded_on_access(self):
+        synclog = self._save_compact_synclog()
+        case_state = bytes(SyncLogSQL.objects.get(synclog_id=synclog._id).case_state)
+
+        with patch.object(models, 'decode_case_state', wraps=models.decode_case_state) as decode:
+            wrapped = get_properly_wrapped_sync_log(synclog._id)
+            wrapped.last_submitted = datetime(2015, 7, 2, 0, 0)
+            wrapped.save()
+            self.assertFalse(decode.called)
+            self.assertEqual(bytes(SyncLogSQL.objects.get(synclog_id=synclog._id).case_state), case_state)
+
+            self.assertEqual(wrapped.case_ids_on_phone, {'parent', 'child'})
+            self.assertEqual(wrapped.index_tree.indices, {'child': {'parent': 'parent'}})
+            self.assertEqual(decode.call_count, 1)
+
+    @flag_enabled('COMPACT_SYNCLOG_CASE_STATE')
+    def test_compact_case_state_delta(self):
+        synclog = self._save_compact_synclog()
+        case_state = bytes(SyncLogSQL.objects.get(synclog_id=synclog._id).case_state)
+
+        wrapped = get_properly_wrapped_sync_log(synclog._id)
+        wrapped.case_ids_on_phone.add('other')
+        wrapped.dependent_case_ids_on_phone.remove('parent')
+        wrapped.index_tree.delete_index('child', 'parent')
+        wrapped.save()
+        self.assertTrue(bytes(SyncLogSQL.objects.get(synclog_id=synclog._id).case_state).startswith(case_state))
+
+        wrapped = get_properly_wrapped_sync_log(synclog._id)
+        self.assertEqual(wrapped.case_ids_on_phone, {'parent', 'child', 'other'})
+        self.assertEqual(wrapped.dependent_case_ids_on_phone, set())
+        self.assertEqual(wrapped.index_tree.indices, {})
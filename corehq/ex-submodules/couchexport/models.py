@@ -15,6 +15,7 @@ class Format(object):
     PYTHON_DICT = "dict"
     UNZIPPED_CSV = 'unzipped-csv'
     CDISC_ODM = 'cdisc-odm'
+    PARQUET = 'parquet'
 
     FORMAT_DICT = {CSV: {"mimetype": "application/zip",
                          "extension": "zip",
@@ -46,6 +47,9 @@ class Format(object):
                    CDISC_ODM: {'mimetype': 'application/cdisc-odm+xml',
                                'extension': 'xml',
                                'download': True},
+                   PARQUET: {"mimetype": "application/zip",
+                             "extension": "zip",
+                             "download": True},
 
     }
 
@@ -1,7 +1,9 @@
 from codecs import BOM_UTF8
 from contextlib import closing
+import datetime
 import io
 import os
+import zipfile
 
 from django.test import SimpleTestCase
 from lxml import html, etree
@@ -12,6 +14,8 @@ from couchexport.models import Format
 from couchexport.writers import (
     MAX_XLS_COLUMNS,
     CsvFileWriter,
+    ParquetExportWriter,
+    ParquetFileWriter,
     PythonDictWriter,
     XlsLengthException,
     ZippedExportWriter,
@@ -121,6 +125,92 @@ class Excel2007ExportWriterTests(SimpleTestCase):
         export_from_tables(tables, file_, format_)
 
 
+class ParquetFileWriterTests(SimpleTestCase):
+
+    def _write(self, column_types, rows, row_group_size=10000):
+        import pyarrow.parquet as pq
+        writer = ParquetFileWriter(column_types, row_group_size=row_group_size)
+        writer.open('table')
+        try:
+            for row in rows:
+                writer.write_row(row)
+            writer.finish()
+            return pq.ParquetFile(writer.get_path())
+        finally:
+            writer.close()
+
+    def test_typed_columns(self):
+        parquet_file = self._write(['integer', 'decimal', 'date', 'datetime', None], [
+            ['int', 'dec', 'date', 'datetime', 'text'],
+            ['1', '2.5', '2020-01-02', '2020-01-02T10:00:00.000+05:30', 'spam'],
+            ['---', '', '---', '2020-01-02 11:00:00', 5],
+            [3, 4, datetime.date(2020, 1, 3), None, None],
+        ])
+        self.assertEqual(
+            [str(field.type) for field in parquet_file.schema.to_arrow_schema()],
+            ['int64', 'double', 'date32[day]', 'timestamp[us]', 'string'],
+        )
+        self.assertEqual(parquet_file.read().to_pydict(), {
+            'int': [1, None, 3],
+            'dec': [2.5, None, 4.0],
+            'date': [datetime.date(2020, 1, 2), None, datetime.date(2020, 1, 3)],
+            'datetime': [datetime.datetime(2020, 1, 2, 10), datetime.datetime(2020, 1, 2, 11), None],
+            'text': ['spam', '5', None],
+        })
+
+    def test_integer_values(self):
+        parquet_file = self._write(['integer'], [['int'], ['12.0'], [' 7 '], [8.0], [2 ** 63 - 1]])
+        self.assertEqual(str(parquet_file.schema.to_arrow_schema().field('int').type), 'int64')
+        self.assertEqual(parquet_file.read().column('int').to_pylist(), [12, 7, 8, 2 ** 63 - 1])
+
+    def test_untyped_columns(self):
+        # values that would be changed or lost by converting them are kept as strings
+        parquet_file = self._write(['integer', 'integer', 'integer', 'decimal', 'date', 'datetime'], [
+            ['fraction', 'text', 'too_large', 'nan', 'time', 'bad'],
+            ['1', '1', '1', '1.5', '2020-01-02', '2020-01-02'],
+            [3.7, 'spam', 2 ** 63, 'nan', '2020-01-02T10:00', 'bad'],
+            ['---', '---', '---', '---', '---', '---'],
+        ])
+        self.assertEqual(
+            [str(field.type) for field in parquet_file.schema.to_arrow_schema()],
+            ['string'] * 6,
+        )
+        self.assertEqual(parquet_file.read().to_pydict(), {
+            'fraction': ['1', '3.7', '---'],
+            'text': ['1', 'spam', '---'],
+            'too_large': ['1', str(2 ** 63), '---'],
+            'nan': ['1.5', 'nan', '---'],
+            'time': ['2020-01-02', '2020-01-02T10:00', '---'],
+            'bad': ['2020-01-02', 'bad', '---'],
+        })
+
+    def test_row_groups(self):
+        parquet_file = self._write(None, [['a']] + [[str(i)] for i in range(5)], row_group_size=2)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        self.assertEqual(parquet_file.read().column('a').to_pylist(), ['0', '1', '2', '3', '4'])
+
+
+class ParquetExportWriterTests(SimpleTestCase):
+
+    def test_table_directories(self):
+        file_ = io.BytesIO()
+        writer = ParquetExportWriter()
+        writer.open(
+            [('forms', [['q1']]), ('repeat', [['q2']])],
+            file_,
+            table_titles={'forms': 'Forms', 'repeat': 'Repeat'},
+            archive_basepath='export',
+            column_types={'forms': ['integer']},
+        )
+        writer.write([('forms', [['1']]), ('repeat', [['spam']])])
+        writer.close()
+        with zipfile.ZipFile(file_) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                ['export/Forms/Forms.parquet', 'export/Repeat/Repeat.parquet'],
+            )
+
+
 class Excel2003ExportWriterTests(SimpleTestCase):
 
     def test_data_length(self):
@@ -1,3 +1,4 @@
+import datetime
 import io
 from base64 import b64decode
 from codecs import BOM_UTF8
@@ -8,13 +9,17 @@ import zipfile
 import csv
 import json
 import bz2
+import math
+import pickle
 from collections import OrderedDict
 import openpyxl
 
+from dateutil.parser import isoparse
 from django.template.loader import render_to_string, get_template
 from django.utils.functional import Promise
 import xlwt
 
+from corehq.apps.export.const import EMPTY_VALUE, MISSING_VALUE
 from couchexport.models import Format
 from openpyxl.styles import numbers
 from openpyxl.cell import WriteOnlyCell
@@ -126,6 +131,194 @@ class CsvFileWriter(ExportFileWriter):
         self._file.write(buffer.getvalue().encode('utf-8'))
 
 
+class ParquetFileWriter(ExportFileWriter):
+    """
+    Writes a single table to a Parquet file.
+
+    The first row written is the header row. Data rows are spooled to a
+    temporary file, and written as a row group every ``row_group_size``
+    rows when the file is finished. String columns are dictionary encoded.
+
+    :param column_types: list of data types (``ExportItem.datatype``
+    values) aligned with the headers. A typed column is only written with
+    its type if all of its values convert to it without losing data, and
+    as strings otherwise. Columns without a known type are written as
+    strings. Empty and missing values are written as nulls.
+    """
+
+    def __init__(self, column_types=None, row_group_size=10000):
+        super(ParquetFileWriter, self).__init__()
+        self.column_types = column_types or []
+        self.row_group_size = row_group_size
+        self._headers = None
+        self._column_types = None
+        self._spool = None
+
+    def write_row(self, row):
+        import pyarrow as pa
+
+        if self._headers is None:
+            self._headers = [_to_parquet_string(header) for header in row]
+            datatypes = list(self.column_types) + [None] * (len(row) - len(self.column_types))
+            self._column_types = [_get_parquet_column_type(pa, datatype) for datatype in datatypes]
+            self._spool = tempfile.TemporaryFile()
+            return
+        values = []
+        for index, (value, (_, converter)) in enumerate(zip(row, self._column_types)):
+            if converter is not _to_parquet_string:
+                try:
+                    converter(value)
+                except _NotConvertible:
+                    # the column can't be typed, so it is written as strings
+                    self._column_types[index] = _get_parquet_column_type(pa, None)
+                else:
+                    values.append(value)
+                    continue
+            values.append(_to_parquet_string(value))
+        pickle.dump(values, self._spool, pickle.HIGHEST_PROTOCOL)
+
+    def _end_file(self):
+        if self._headers is None:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            pa.field(header, arrow_type)
+            for header, (arrow_type, _) in zip(self._headers, self._column_types)
+        ])
+        converters = [converter for _, converter in self._column_types]
+        # write through the path so closing the Parquet writer leaves our file open
+        parquet_writer = pq.ParquetWriter(self.get_path(), schema, use_dictionary=True)
+        try:
+            self._spool.seek(0)
+            columns = [[] for _ in self._headers]
+            for values in self._iter_spooled_rows():
+                for column, converter, value in zip(columns, converters, values):
+                    column.append(converter(value))
+                if len(columns[0]) >= self.row_group_size:
+                    _write_parquet_row_group(parquet_writer, schema, columns)
+                    columns = [[] for _ in self._headers]
+            if columns[0]:
+                _write_parquet_row_group(parquet_writer, schema, columns)
+        finally:
+            parquet_writer.close()
+            self._spool.close()
+            self._headers = self._spool = None
+
+    def _iter_spooled_rows(self):
+        while True:
+            try:
+                yield pickle.load(self._spool)
+            except EOFError:
+                return
+
+
+def _write_parquet_row_group(parquet_writer, schema, columns):
+    import pyarrow as pa
+
+    parquet_writer.write_table(pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    ))
+
+
+class _NotConvertible(Exception):
+    pass
+
+
+def _is_parquet_null(value):
+    return value is None or value == EMPTY_VALUE or value == MISSING_VALUE
+
+
+def _to_parquet_string(value):
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return str(value)
+
+
+def _to_parquet_int(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    if _is_parquet_null(value):
+        return None
+    if isinstance(value, bool):
+        raise _NotConvertible(value)
+    if isinstance(value, str):
+        if re.match(r'^\s*[-+]?\d+\s*$', value):
+            number = int(value)
+        else:
+            # e.g. "12.0"
+            number = _to_parquet_float(value)
+    else:
+        number = value
+    if isinstance(number, float):
+        if not number.is_integer() or abs(number) >= 2 ** 53:
+            raise _NotConvertible(value)
+        number = int(number)
+    if not isinstance(number, int) or not -2 ** 63 <= number < 2 ** 63:
+        raise _NotConvertible(value)
+    return number
+
+
+def _to_parquet_float(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    if _is_parquet_null(value):
+        return None
+    if isinstance(value, bool) or (isinstance(value, str) and '_' in value):
+        raise _NotConvertible(value)
+    try:
+        number = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise _NotConvertible(value)
+    if not math.isfinite(number) or (isinstance(value, int) and number != value):
+        # "nan", "inf" or integers too large to be exact
+        raise _NotConvertible(value)
+    return number
+
+
+def _to_parquet_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    if _is_parquet_null(value):
+        return None
+    if not isinstance(value, str):
+        raise _NotConvertible(value)
+    try:
+        # keep the local time of values with a UTC offset, like other formats do
+        return isoparse(value).replace(tzinfo=None)
+    except (ValueError, OverflowError):
+        raise _NotConvertible(value)
+
+
+def _to_parquet_date(value):
+    converted = _to_parquet_datetime(value)
+    if converted is None:
+        return None
+    if converted.time() != datetime.time():
+        raise _NotConvertible(value)
+    return converted.date()
+
+
+def _get_parquet_column_type(pa, datatype):
+    """
+    :return: ``(pyarrow type, value converter)`` for an ``ExportItem.datatype``
+    """
+    return {
+        'integer': (pa.int64(), _to_parquet_int),
+        'decimal': (pa.float64(), _to_parquet_float),
+        'date': (pa.date32(), _to_parquet_date),
+        'datetime': (pa.timestamp('us'), _to_parquet_datetime),
+    }.get(datatype, (pa.string(), _to_parquet_string))
+
+
 class PartialHtmlFileWriter(ExportFileWriter):
 
     def _write_from_template(self, context):
@@ -162,14 +355,18 @@ class ExportWriter(object):
     max_table_name_size = 500
     target_app = 'Excel'  # Where does this writer export to? Export button to say "Export to Excel"
 
-    def open(self, header_table, file, max_column_size=2000, table_titles=None, archive_basepath=''):
+    def open(self, header_table, file, max_column_size=2000, table_titles=None, archive_basepath='',
+             column_types=None):
         """
         Create any initial files, headings, etc necessary.
         :param header_table: tuple of one of the following formats
             tuple(sheet_name, [['col1header', 'col2header', ....]])
             tuple(sheet_name, [FormattedRow])
+        :param column_types: optional dict mapping table index to a list of
+            column data types, used by writers of typed formats
         """
         table_titles = table_titles or {}
+        self.column_types = dict(column_types or {})
 
         self._isopen = True
         self.max_column_size = max_column_size
@@ -188,7 +385,7 @@ class ExportWriter(object):
                 table_title=table_titles.get(table_index)
             )
 
-    def add_table(self, table_index, headers, table_title=None):
+    def add_table(self, table_index, headers, table_title=None, column_types=None):
         def _clean_name(name):
             if isinstance(name, bytes):
                 name = name.decode('utf8')
@@ -208,6 +405,8 @@ class ExportWriter(object):
             except AttributeError:
                 headers = [g.next_unique(header) for header in headers]
 
+        if column_types is not None:
+            self.column_types[table_index] = column_types
         self._init_table(table_index, table_title_truncated)
         self.write_row(table_index, headers)
 
@@ -345,6 +544,30 @@ class CsvExportWriter(ZippedExportWriter):
     format = Format.CSV
 
 
+class ParquetExportWriter(ZippedExportWriter):
+    """
+    Writer that creates a zip file containing a Parquet file for each table.
+
+    Each table is written to its own directory so the multiprocess
+    exporter's pages of a table form a single Parquet dataset.
+    """
+    format = Format.PARQUET
+    table_file_extension = ".parquet"
+    row_group_size = 10000
+
+    def _init_table(self, table_index, table_title):
+        writer = ParquetFileWriter(self.column_types.get(table_index), self.row_group_size)
+        self.tables[table_index] = writer
+        writer.open(table_title)
+        self.table_names[table_index] = table_title
+
+    def _write_row(self, sheet_index, row):
+        self.tables[sheet_index].write_row(list(row))
+
+    def _get_archive_filename(self, name):
+        return os.path.join(self.archive_basepath, name, '{}{}'.format(name, self.table_file_extension))
+
+
 class UnzippedCsvExportWriter(OnDiskExportWriter):
     """
     Serve the first table as a csv
@@ -174,6 +174,34 @@ class CaseAccessorCouch(AbstractCaseAccessor):
     def get_related_indices(domain, case_ids, exclude_indices):
         return get_related_indices(domain, case_ids, exclude_indices)
 
+    @staticmethod
+    def get_related_indices_recursive(domain, case_ids):
+        """WARNING this is inefficient (one query per level, better version in SQL)."""
+        def index_key(index):
+            return '{} {}'.format(index.case_id, index.identifier)
+
+        indices = []
+        closed_and_deleted = []
+        seen_indices = set()
+        visited = set(case_ids)
+        next_ids = list(case_ids)
+        while next_ids:
+            related = [index
+                for index in get_related_indices(domain, next_ids, seen_indices)
+                if index_key(index) not in seen_indices]
+            indices.extend(related)
+            seen_indices.update(index_key(index) for index in related)
+            new_ids = {case_id
+                for index in related
+                for case_id in [index.case_id, index.referenced_id]
+                if case_id not in visited}
+            visited.update(new_ids)
+            rows = CaseAccessorCouch.get_closed_and_deleted_ids(domain, list(new_ids))
+            closed_and_deleted.extend(rows)
+            deleted_ids = {case_id for case_id, closed, deleted in rows if deleted}
+            next_ids = list(new_ids - deleted_ids)
+        return indices, closed_and_deleted
+
     @staticmethod
     def get_closed_and_deleted_ids(domain, case_ids):
         """Get the subset of given list of case ids that are closed or deleted
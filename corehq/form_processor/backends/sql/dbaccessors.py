@@ -1062,6 +1062,32 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             'SELECT * FROM get_related_indices(%s, %s, %s)',
             [domain, case_ids, list(exclude_indices)]))
 
+    @staticmethod
+    def get_related_indices_recursive(domain, case_ids):
+        assert isinstance(case_ids, list), case_ids
+        if not case_ids:
+            return [], []
+        indices = []
+        closed_and_deleted = []
+        with CommCareCaseIndexSQL.get_plproxy_cursor(readonly=True) as cursor:
+            cursor.execute(
+                'SELECT * FROM get_related_indices_recursive(%s, %s)',
+                [domain, case_ids]
+            )
+            for row in fetchall_as_namedtuple(cursor):
+                if row.identifier is None:
+                    closed_and_deleted.append((row.case_id, row.closed, row.deleted))
+                else:
+                    indices.append(CommCareCaseIndexSQL(
+                        domain=domain,
+                        case_id=row.case_id,
+                        identifier=row.identifier,
+                        referenced_id=row.referenced_id,
+                        referenced_type=row.referenced_type,
+                        relationship_id=row.relationship_id,
+                    ))
+        return indices, closed_and_deleted
+
     @staticmethod
     def get_closed_and_deleted_ids(domain, case_ids):
         assert isinstance(case_ids, list), case_ids
@@ -287,6 +287,10 @@ class AbstractCaseAccessor(metaclass=ABCMeta):
     def get_related_indices(case_ids, exclude_indices):
         raise NotImplementedError
 
+    @abstractmethod
+    def get_related_indices_recursive(domain, case_ids):
+        raise NotImplementedError
+
     @abstractmethod
     def get_case_ids_modified_with_owner_since(domain, owner_id, reference_date):
         raise NotImplementedError
@@ -412,6 +416,19 @@ class CaseAccessors(object):
         """
         return self.db_accessor.get_related_indices(self.domain, case_ids, exclude_indices)
 
+    def get_related_indices_recursive(self, case_ids):
+        """Get all indices reachable from the given cases by repeatedly
+        following the indices returned by ``get_related_indices``, and the
+        closed/deleted status of the cases found. Deleted cases are not
+        traversed.
+
+        :param case_ids: A list of case ids.
+        :returns: Two-tuple: a list of CommCareCaseIndex-like objects and
+        a list of three-tuples for closed or deleted cases:
+        `(case_id, closed, deleted)`
+        """
+        return self.db_accessor.get_related_indices_recursive(self.domain, case_ids)
+
     def get_closed_and_deleted_ids(self, case_ids):
         """Get the subset of given list of case ids that are closed or deleted
 
@@ -0,0 +1,62 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from corehq.project_limits.rate_counter.rate_counter import LOCMEM
+from corehq.project_limits.rate_limiter import RateDefinition, RateLimiter
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency of checking and reporting usage against a rate limiter "
+        "with all windows (week, day, hour, minute, second), "
+        "fetching windows one at a time and all together in a single round trip"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000)
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            default=False,
+            help="Clear the local memory cache before each check",
+        )
+
+    def handle(self, iterations, cold, **options):
+        rate_limiter = RateLimiter(
+            'benchmark-{}'.format(uuid.uuid4().hex),
+            RateDefinition(per_week=10 ** 9, per_day=10 ** 9, per_hour=10 ** 9,
+                           per_minute=10 ** 9, per_second=10 ** 9).get_rate_limits,
+        )
+
+        def per_window_check(scope):
+            scope = rate_limiter.get_normalized_scope(scope)
+            rate_limits = rate_limiter.get_rate_limits(*scope)
+            allowed = all(rate_counter.get((rate_limiter.feature_key,) + scope) < limit
+                          for rate_counter, limit in rate_limits)
+            for rate_counter, limit in rate_limits:
+                rate_counter.increment((rate_limiter.feature_key,) + scope)
+            return allowed
+
+        def batched_check(scope):
+            allowed = rate_limiter.allow_usage(scope)
+            rate_limiter.report_usage(scope)
+            return allowed
+
+        for name, check in [('per window', per_window_check), ('batched', batched_check)]:
+            timings = []
+            for i in range(iterations):
+                if cold:
+                    LOCMEM.clear()
+                start = time.perf_counter()
+                check('benchmark-domain')
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            print("{}: mean {:.3f}ms, p50 {:.3f}ms, p99 {:.3f}ms ({} checks)".format(
+                name,
+                sum(timings) / len(timings) * 1000,
+                timings[len(timings) // 2] * 1000,
+                timings[int(len(timings) * .99)] * 1000,
+                len(timings),
+            ))
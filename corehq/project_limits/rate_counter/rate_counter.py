@@ -1,5 +1,6 @@
 import hashlib
 import time
+from collections import defaultdict
 
 from django.core.cache import caches, DEFAULT_CACHE_ALIAS
 
@@ -54,13 +55,17 @@ class SlidingWindowRateCounter(AbstractRateCounter):
         )
 
     def get(self, scope, timestamp=None):
-        if timestamp is None:
-            timestamp = time.time()
-        counts = [
-            self.grain_counter.get(scope, timestamp - i * self.grain_duration,
-                                   key_is_active=(i is 0))
+        return get_many([self], scope, timestamp=timestamp)[0]
+
+    def _get_grain_lookups(self, scope, timestamp):
+        return [
+            self.grain_counter._get_lookup(scope, timestamp - i * self.grain_duration,
+                                           key_is_active=(i == 0))
             for i in range(self.grains_per_window + 1)
         ]
+
+    def _get_from_grain_counts(self, counts, timestamp):
+        counts = list(counts)
         earliest_grain_count = counts.pop()
         # This is the percentage of the way through the current grain we are
         progress_in_current_grain = (timestamp % self.grain_duration) / self.grain_duration
@@ -114,6 +119,12 @@ class FixedWindowRateCounter(AbstractRateCounter):
     def get(self, scope, timestamp=None, key_is_active=True):
         return self.counter.get(self._cache_key(scope, timestamp=timestamp), key_is_active=key_is_active)
 
+    def _get_lookup(self, scope, timestamp, key_is_active=True):
+        return self.counter, self._cache_key(scope, timestamp=timestamp), key_is_active
+
+    def _get_increment(self, scope, delta, timestamp):
+        return self.counter, self._cache_key(scope, timestamp=timestamp), delta
+
     def increment_and_get(self, scope, delta=1, timestamp=None):
         return self.counter.incr(self._cache_key(scope, timestamp=timestamp), delta)
 
@@ -141,10 +152,99 @@ class CounterCache(object):
         :param key_is_active: Whether you believe the key is being actively updated
             If not, then use the longer timeout for local memory cache as well.
         """
-        local_timeout = self.memoized_timeout if key_is_active else self.timeout
         value = self.local_cache.get(key, default=None)
         if value is None:
             value = self.shared_cache.get(key, default=0)
-            self.local_cache.set(key, value, timeout=local_timeout)
+            self.local_cache.set(key, value, timeout=self.get_local_timeout(key_is_active))
         assert value is not None
         return value
+
+    def get_local_timeout(self, key_is_active=True):
+        return self.memoized_timeout if key_is_active else self.timeout
+
+
+def get_many(rate_counters, scope, timestamp=None):
+    """
+    Get the current value of each sliding window rate counter for scope
+
+    Equivalent to ``[rate_counter.get(scope) for rate_counter in rate_counters]``
+    except that all grains not memoized in local memory are fetched
+    from the shared cache in a single round trip.
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    lookups = [rate_counter._get_grain_lookups(scope, timestamp) for rate_counter in rate_counters]
+    counts = _get_counts([lookup for grain_lookups in lookups for lookup in grain_lookups])
+    rates = []
+    start = 0
+    for rate_counter, grain_lookups in zip(rate_counters, lookups):
+        end = start + len(grain_lookups)
+        rates.append(rate_counter._get_from_grain_counts(counts[start:end], timestamp))
+        start = end
+    return rates
+
+
+def increment_many(rate_counters, scope, delta=1, timestamp=None):
+    """
+    Increment each sliding window rate counter for scope
+
+    Equivalent to calling ``rate_counter.increment(scope, delta)`` for each
+    rate counter except that all increments are sent to the shared cache
+    in a single round trip.
+    """
+    if timestamp is None:
+        timestamp = time.time()
+    _incr_counts([
+        rate_counter.grain_counter._get_increment(scope, delta, timestamp)
+        for rate_counter in rate_counters
+    ])
+
+
+def _get_counts(lookups):
+    """
+    :param lookups: list of ``(counter_cache, key, key_is_active)``
+    :return: list of values, one for each lookup, as ``CounterCache.get`` would return them
+    """
+    values = []
+    misses = defaultdict(list)
+    for index, (counter_cache, key, key_is_active) in enumerate(lookups):
+        value = counter_cache.local_cache.get(key, default=None)
+        if value is None:
+            misses[counter_cache.shared_cache].append(index)
+        values.append(value)
+
+    for shared_cache, indices in misses.items():
+        found = shared_cache.get_many([lookups[index][1] for index in indices])
+        for index in indices:
+            counter_cache, key, key_is_active = lookups[index]
+            value = found.get(key, 0)
+            counter_cache.local_cache.set(key, value, timeout=counter_cache.get_local_timeout(key_is_active))
+            values[index] = value
+    return values
+
+
+def _incr_counts(increments):
+    """
+    :param increments: list of ``(counter_cache, key, delta)``
+    :return: list of new values, as ``CounterCache.incr`` would return them
+    """
+    values = [None] * len(increments)
+    by_shared_cache = defaultdict(list)
+    for index, (counter_cache, key, delta) in enumerate(increments):
+        by_shared_cache[counter_cache.shared_cache].append(index)
+
+    for shared_cache, indices in by_shared_cache.items():
+        # Not a transaction (MULTI) so it also works against a redis cluster
+        pipeline = shared_cache.client.get_client(write=True).pipeline(transaction=False)
+        for index in indices:
+            counter_cache, key, delta = increments[index]
+            redis_key = shared_cache.make_key(key)
+            # Set the expiry only when the key is created (like CounterCache.incr)
+            pipeline.set(redis_key, 0, ex=counter_cache.timeout, nx=True)
+            pipeline.incrby(redis_key, delta)
+        results = pipeline.execute()
+        for index, value in zip(indices, results[1::2]):
+            counter_cache, key, delta = increments[index]
+            counter_cache.local_cache.set(key, value, timeout=counter_cache.memoized_timeout)
+            values[index] = value
+    return values
@@ -12,6 +12,10 @@ from corehq.project_limits.rate_counter.presets import (
     second_rate_counter,
     week_rate_counter,
 )
+from corehq.project_limits.rate_counter.rate_counter import (
+    get_many,
+    increment_many,
+)
 from corehq.util.quickcache import quickcache
 
 
@@ -47,8 +51,8 @@ class RateLimiter(object):
 
     def report_usage(self, scope=None, delta=1):
         scope = self.get_normalized_scope(scope)
-        for rate_counter, limit in self.get_rate_limits(*scope):
-            rate_counter.increment((self.feature_key,) + scope, delta=delta)
+        rate_counters = [rate_counter for rate_counter, limit in self.get_rate_limits(*scope)]
+        increment_many(rate_counters, (self.feature_key,) + scope, delta=delta)
 
     def allow_usage(self, scope=None):
         return all(current_rate < limit
@@ -65,9 +69,13 @@ class RateLimiter(object):
 
         """
         scope = self.get_normalized_scope(scope)
+        rate_limits = self.get_rate_limits(*scope)
+        # all windows are fetched together in a single round trip
+        current_rates = get_many([rate_counter for rate_counter, limit in rate_limits],
+                                 (self.feature_key,) + scope)
         return (
-            (rate_counter.key, rate_counter.get((self.feature_key,) + scope), limit)
-            for rate_counter, limit in self.get_rate_limits(*scope)
+            (rate_counter.key, current_rate, limit)
+            for (rate_counter, limit), current_rate in zip(rate_limits, current_rates)
         )
 
     def wait(self, scope, timeout, windows_not_to_wait_on=('hour', 'day', 'week')):
@@ -3,7 +3,7 @@ from datetime import timedelta
 import testil
 
 from corehq.project_limits.rate_counter.rate_counter import CounterCache, \
-    FixedWindowRateCounter, SlidingWindowRateCounter
+    FixedWindowRateCounter, SlidingWindowRateCounter, get_many, increment_many
 
 
 _CounterCache = CounterCache
@@ -74,3 +74,28 @@ def test_sliding_window_with_grains_rate_counter():
 
     float_eq(counter.increment_and_get('alice', timestamp=timestamp + 1 * DAYS), 4)
     float_eq(counter.get('alice', timestamp=timestamp + 2 * DAYS), 3 * 6. / 7 + 1)
+
+
+def test_get_many_and_increment_many():
+    # this timestamp is chosen to be 6 days into a week window
+    timestamp = (1000 * 7 * DAYS + 6 * DAYS)
+    week_counter = _SlidingWindowRateCounter('test-many-week', 7 * DAYS, grains_per_window=7)
+    day_counter = _SlidingWindowRateCounter('test-many-day', DAYS, grains_per_window=4)
+    counters = [week_counter, day_counter]
+    week_counter.grain_counter.counter.shared_cache.clear()
+    week_counter.grain_counter.counter.local_cache.clear()
+
+    testil.eq(get_many(counters, 'alice', timestamp=timestamp), [0, 0])
+    # memoized zeros are replaced by the incremented values
+    increment_many(counters, 'alice', timestamp=timestamp)
+    increment_many(counters, 'alice', delta=2, timestamp=timestamp)
+    day_counter.increment('alice', timestamp=timestamp - DAYS / 2)
+    testil.eq(get_many(counters, 'alice', timestamp=timestamp), [3, 4])
+
+    for offset in [DAYS / 3, DAYS, 3 * DAYS, 8 * DAYS]:
+        week_counter.grain_counter.counter.local_cache.clear()
+        expected = [counter.get('alice', timestamp=timestamp + offset) for counter in counters]
+        week_counter.grain_counter.counter.local_cache.clear()
+        rates = get_many(counters, 'alice', timestamp=timestamp + offset)
+        for rate, expected_rate in zip(rates, expected):
+            float_eq(rate, expected_rate, offset)
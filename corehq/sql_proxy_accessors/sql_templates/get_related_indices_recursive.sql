@@ -0,0 +1,79 @@
+DROP FUNCTION IF EXISTS get_related_indices_recursive(TEXT, TEXT[]);
+
+-- Get all indices reachable from case_ids_array by repeatedly following the
+-- indices returned by get_related_indices, along with the closed and deleted
+-- status of the cases found on the way. Deleted cases are not traversed.
+--
+-- Two kinds of rows are returned:
+-- - indices: identifier is not null, closed and deleted are null
+-- - closed or deleted cases: identifier is null
+--
+-- Only get_related_indices and get_closed_and_deleted_ids are used to query
+-- tables so the same function works on plproxy databases, where it resolves
+-- the whole case graph in one call from the application.
+CREATE FUNCTION get_related_indices_recursive(
+    domain_name TEXT,
+    case_ids_array TEXT[]
+) RETURNS TABLE (
+    case_id VARCHAR(255),
+    identifier VARCHAR(255),
+    referenced_id VARCHAR(255),
+    referenced_type VARCHAR(255),
+    relationship_id SMALLINT,
+    closed BOOLEAN,
+    deleted BOOLEAN
+) AS $$
+#variable_conflict use_column
+DECLARE
+    frontier TEXT[] := case_ids_array;
+    visited TEXT[] := case_ids_array;
+    seen_indices TEXT[] := ARRAY[]::TEXT[];
+    related form_processor_commcarecaseindexsql[];
+    new_ids TEXT[];
+    -- closed or deleted cases among new_ids, as parallel arrays
+    status_ids TEXT[];
+    status_closed BOOLEAN[];
+    status_deleted BOOLEAN[];
+BEGIN
+    WHILE cardinality(frontier) > 0 LOOP
+        SELECT array_agg(ix) INTO related
+        FROM get_related_indices(domain_name, frontier, seen_indices) ix;
+        EXIT WHEN related IS NULL;
+
+        RETURN QUERY
+        SELECT ix.case_id, ix.identifier, ix.referenced_id, ix.referenced_type, ix.relationship_id,
+            NULL::BOOLEAN, NULL::BOOLEAN
+        FROM UNNEST(related) ix;
+
+        -- exclude_indices is a set of '<index.case_id> <index.identifier>'
+        seen_indices := seen_indices || ARRAY(
+            SELECT ix.case_id || ' ' || ix.identifier FROM UNNEST(related) ix
+        );
+        -- EXCEPT is a hashed set operation: "x = ANY(array)" would scan
+        -- the whole array for each element
+        new_ids := ARRAY(
+            SELECT ends.cid
+            FROM UNNEST(related) ix, LATERAL (VALUES (ix.case_id), (ix.referenced_id)) AS ends(cid)
+            EXCEPT
+            SELECT UNNEST(visited)
+        );
+        EXIT WHEN cardinality(new_ids) = 0;
+        visited := visited || new_ids;
+
+        SELECT array_agg(status.case_id::TEXT), array_agg(status.closed), array_agg(status.deleted)
+        INTO status_ids, status_closed, status_deleted
+        FROM get_closed_and_deleted_ids(domain_name, new_ids) status;
+
+        RETURN QUERY
+        SELECT sx.cid::VARCHAR(255), NULL::VARCHAR(255), NULL::VARCHAR(255), NULL::VARCHAR(255),
+            NULL::SMALLINT, sx.closed, sx.deleted
+        FROM UNNEST(status_ids, status_closed, status_deleted) AS sx(cid, closed, deleted);
+
+        frontier := ARRAY(
+            SELECT UNNEST(new_ids)
+            EXCEPT
+            SELECT sx.cid FROM UNNEST(status_ids, status_deleted) AS sx(cid, deleted) WHERE sx.deleted
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
@@ -1286,6 +1286,28 @@ PAGINATED_EXPORTS = StaticToggle(
     [NAMESPACE_DOMAIN]
 )
 
+INCREMENTAL_SAVED_EXPORTS = StaticToggle(
+    'incremental_saved_exports',
+    'Rebuild daily saved form and case exports from the rows of the previous rebuild, '
+    'only recomputing rows for forms and cases modified since then',
+    TAG_SOLUTIONS_LIMITED,
+    [NAMESPACE_DOMAIN]
+)
+
+PARQUET_EXPORTS = StaticToggle(
+    'parquet_exports',
+    'Allow exports to be downloaded as Parquet files, for loading into pandas or Spark',
+    TAG_SOLUTIONS_LIMITED,
+    [NAMESPACE_DOMAIN]
+)
+
+UCR_REPORT_RESULT_CACHE = StaticToggle(
+    'ucr_report_result_cache',
+    'Cache the results of report builder and UCR report queries until their data source changes',
+    TAG_SOLUTIONS_LIMITED,
+    [NAMESPACE_DOMAIN]
+)
+
 PUBLISH_CUSTOM_REPORTS = StaticToggle(
     'publish_custom_reports',
     "Publish custom reports (No needed Authorization)",
@@ -1796,6 +1818,60 @@ LIVEQUERY_READ_FROM_STANDBYS = DynamicallyPredictablyRandomToggle(
     """
 )
 
+RESTORE_CASE_XML_CACHE = StaticToggle(
+    'restore_case_xml_cache',
+    'Cache the serialized XML of cases for restores, shared between users syncing the same cases',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+)
+
+LIVEQUERY_RECURSIVE_INDICES = DynamicallyPredictablyRandomToggle(
+    'livequery_recursive_indices',
+    'Fetch the whole case index graph for livequery restore in one database call',
+    TAG_INTERNAL,
+    [NAMESPACE_USER],
+    description="""
+    To allow a gradual rollout and timing comparisons of resolving related
+    cases with get_related_indices_recursive rather than one pair of
+    queries per level of the case graph.
+    """
+)
+
+PARALLEL_RESTORE_SECTIONS = StaticToggle(
+    'parallel_restore_sections',
+    'Generate restore fixtures in a separate thread while the case payload is generated',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+)
+
+SHARED_RESTORE_CASE_PAYLOAD = StaticToggle(
+    'shared_restore_case_payload',
+    'Reuse the case payload of a recent fresh restore for users with the same case owners',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description="""
+    Fresh livequery restores by users with identical owner ids (e.g. users
+    in the same case sharing group and location) reuse the case and stock
+    payload of a restore done in the last hour instead of generating it
+    again. Cases modified since the payload was generated are sent on the
+    next sync.
+    """
+)
+
+COMPACT_SYNCLOG_CASE_STATE = StaticToggle(
+    'compact_synclog_case_state',
+    'Store the case ids and index trees of sync logs in a compact binary encoding',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+)
+
+SUITE_MODULE_FRAGMENT_CACHE = StaticToggle(
+    'suite_module_fragment_cache',
+    'Reuse the suite entries and menus of modules that have not changed since the suite was last generated',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+)
+
 
 RUN_CUSTOM_DATA_PULL_REQUESTS = StaticToggle(
     'run_custom_data_pull_requests',
@@ -68,6 +68,23 @@ class AbstractElasticsearchInterface(metaclass=abc.ABCMeta):
         self._fix_hits_in_results(results)
         return results
 
+    def msearch(self, searches):
+        """
+        Run several searches in a single request
+
+        :param searches: list of ``(index, doc_type, body)``
+        :return: list of results in the same order. Failed searches
+        have an ``error`` key instead of hits.
+        """
+        body = []
+        for index, doc_type, query in searches:
+            body.append({'index': index, 'type': doc_type})
+            body.append(query)
+        responses = self.es.msearch(body=body)['responses']
+        for results in responses:
+            self._fix_hits_in_results(results)
+        return responses
+
     def scroll(self, scroll_id=None, body=None, params=None, **kwargs):
         results = self.es.scroll(scroll_id, body, params=params or {}, **kwargs)
         self._fix_hits_in_results(results)